@@ -0,0 +1,121 @@
+# C:\...\extracao\agendador.py
+
+import asyncio
+
+import config
+from arquivo_bruto import usar_arquivo
+from decodificador import usar_decodificador
+from gravador import usar_gravador
+from rede import ClienteIntegra, LimitadorConexoes
+from monitoramento import LimitadorFrequencia, log
+from scraper import run_for_institution
+
+def _somar(valores):
+    """Soma pares (atual, total) ignorando totais ainda desconhecidos ("?")."""
+    atual = sum(a for a, _ in valores)
+    total = sum(t for _, t in valores if t != "?")
+    return atual, max(total, atual)
+
+async def run_all_institutions(instituicoes, db_manager, callbacks, max_instituicoes=config.MAX_INSTITUICOES,
+                               refresh=config.REFRESH, run_id=None):
+    """
+    Coleta várias instituições em paralelo.
+
+    Cada instituição é um host diferente; todas usam o mesmo ClienteIntegra,
+    cujo LimitadorConexoes aplica o teto global e o controle AIMD por host,
+    o mesmo GravadorSQLite, o mesmo arquivo de respostas brutas e o mesmo
+    pool de extração dos TCCs. Os
+    callbacks 'prof_progress' e 'det_progress' recebem o progresso
+    agregado, 'inst_status' recebe
+    (sigla, fase, atual, total) por instituição e 'inst_progress' recebe
+    (concluidas, total) a cada instituição finalizada. `refresh` e `run_id`
+    são repassados a run_for_institution.
+
+    As atualizações de progresso são limitadas a uma a cada
+    config.PROGRESSO_INTERVALO segundos por fase (e por instituição, em
+    'inst_status'); a última de cada instituição sempre é entregue.
+    """
+    semaforo = asyncio.Semaphore(max_instituicoes or len(instituicoes) or 1)
+    progresso = {"prof": {}, "det": {}}
+    concluidas = 0
+    total_inst = len(instituicoes)
+    falhas = {}
+    resumo_falhas = {"falhas": 0, "recuperados": 0, "descartados": 0}
+    limite = LimitadorFrequencia(config.PROGRESSO_INTERVALO)
+
+    def reportar(sigla, fase, atual, total):
+        progresso[fase][sigla] = (atual if atual != "?" else 0, total)
+        final = atual == total
+        if (cb := callbacks.get(f"{fase}_progress")) and limite.liberar(fase, final):
+            cb(*_somar(progresso[fase].values()))
+        if (cb := callbacks.get("inst_status")) and limite.liberar((sigla, fase), final):
+            cb(sigla, fase, atual, total)
+
+    async def rodar(sigla, url, uf):
+        nonlocal concluidas
+        async with semaforo:
+            inst_callbacks = {
+                "prof_progress": lambda c, t: reportar(sigla, "prof", c, t),
+                "det_progress": lambda c, t: reportar(sigla, "det", c, t),
+            }
+            try:
+                resumo = await run_for_institution(sigla, url, uf, db_manager, inst_callbacks, cliente=cliente,
+                                                   gravador=gravador, refresh=refresh, run_id=run_id,
+                                                   arquivo=arquivo, decodificador=decodificador)
+                for chave, valor in resumo.items():
+                    resumo_falhas[chave] += valor
+            except Exception as e:
+                log(f"[{sigla}] Falha na coleta: {e}")
+                falhas[sigla] = str(e)
+
+        concluidas += 1
+        log(f"=== Instituições concluídas: {concluidas}/{total_inst} ===")
+        if cb := callbacks.get("inst_progress"):
+            cb(concluidas, total_inst)
+        if cb := callbacks.get("inst_done"):
+            cb(sigla)
+
+    if cb := callbacks.get("inst_progress"):
+        cb(0, total_inst)
+    async with ClienteIntegra(LimitadorConexoes()) as cliente, usar_gravador(db_manager) as gravador, \
+            usar_arquivo(run_id=run_id) as arquivo, usar_decodificador() as decodificador:
+        await asyncio.gather(*(rodar(s, url, uf) for s, (_, url, uf, *_) in instituicoes.items()))
+
+    # Estado final agregado, mesmo que a última atualização tenha sido suprimida
+    for fase in ("prof", "det"):
+        if (cb := callbacks.get(f"{fase}_progress")) and progresso[fase]:
+            cb(*_somar(progresso[fase].values()))
+
+    log(f"=== Professores com falha: {resumo_falhas['falhas']} | recuperados: {resumo_falhas['recuperados']} "
+        f"| descartados: {resumo_falhas['descartados']} ===")
+    return falhas
+
+async def executar_coleta(instituicoes, siglas, db_manager, callbacks, resume=False, refresh=config.REFRESH,
+                          max_instituicoes=config.MAX_INSTITUICOES):
+    """
+    Ponto de entrada de uma execução com checkpoint.
+
+    Com `resume`, retoma a última execução não concluída (com as siglas
+    dela); caso contrário, registra uma nova execução para `siglas`. A
+    execução só é marcada como concluída quando todas as instituições
+    terminam sem slugs pendentes ou com falha. `max_instituicoes` limita
+    quantas instituições rodam ao mesmo tempo.
+    """
+    pendente = db_manager.ultima_execucao_pendente() if resume else None
+    if pendente:
+        run_id, siglas = pendente
+        log(f"=== Retomando execução {run_id} ({len(siglas)} instituições) ===")
+    else:
+        if resume:
+            log("=== Nenhuma execução pendente; iniciando uma nova ===")
+        run_id = db_manager.iniciar_execucao(siglas)
+
+    selecionadas = {s: instituicoes[s] for s in siglas if s in instituicoes}
+    falhas = await run_all_institutions(selecionadas, db_manager, callbacks, max_instituicoes=max_instituicoes,
+                                        refresh=refresh, run_id=run_id)
+
+    if db_manager.instituicoes_concluidas(run_id) >= set(selecionadas):
+        db_manager.finalizar_execucao(run_id)
+    else:
+        log(f"=== Execução {run_id} incompleta; use --resume para continuar ===")
+    return falhas
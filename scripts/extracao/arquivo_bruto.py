@@ -0,0 +1,160 @@
+# C:\...\extracao\arquivo_bruto.py
+
+import asyncio
+import gzip
+import json
+import queue
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+import config
+from monitoramento import log_evento
+
+_FIM = object()
+
+def caminho_execucao(raiz, run_id=None):
+    """Pasta do arquivo de uma execução: run-<run_id> ou run-<data-hora> sem checkpoint."""
+    tag = run_id if run_id is not None else datetime.now().strftime("%Y%m%d-%H%M%S")
+    return Path(raiz) / f"run-{tag}"
+
+class ArquivoBruto:
+    """
+    Arquivo das respostas brutas da API em segmentos JSONL comprimidos
+    (gzip), um conjunto por instituição e execução:
+
+        <raiz>/run-<run_id>/<sigla>/listagem-00001.jsonl.gz
+        <raiz>/run-<run_id>/<sigla>/detalhe-00001.jsonl.gz
+
+    Com `sufixo` (ex.: o nome do worker na coleta distribuída), os nomes
+    ganham o sufixo (detalhe-<sufixo>-00001.jsonl.gz), para que vários
+    processos gravem na mesma execução sem disputar os mesmos segmentos.
+
+    Cada linha é um registro com o corpo recebido e o contexto necessário
+    para reinterpretá-lo offline (ver replay.py). Um segmento é fechado a
+    cada `registros_por_segmento` linhas. A compressão e a escrita rodam em
+    uma thread própria, alimentada por uma fila limitada, como no gravador.
+    """
+
+    def __init__(self, raiz=config.ARQUIVO_DIR, run_id=None, registros_por_segmento=config.ARQUIVO_REGISTROS_SEGMENTO,
+                 nivel=config.ARQUIVO_NIVEL_GZIP, max_fila=config.WRITER_QUEUE_SIZE, sufixo=None):
+        self.pasta = caminho_execucao(raiz, run_id)
+        self.sufixo = sufixo
+        self.registros_por_segmento = registros_por_segmento
+        self.nivel = nivel
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._thread = threading.Thread(target=self._run, name="arquivo-bruto", daemon=True)
+        self._segmentos = {}
+        self.erro = None
+        self.registros = 0
+        self.bytes_brutos = 0
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    # --- API usada pelo event loop ---
+
+    async def registrar_listagem(self, sigla, base_url, start, lote):
+        await self._enfileirar((sigla, "listagem", {"sigla": sigla, "base_url": base_url, "start": start,
+                                                     "lote": lote}))
+
+    async def registrar_detalhe(self, sigla, uf, prof, texto, hash_corpo):
+        """Arquiva um corpo de detalhe já decodificado (`texto`)."""
+        await self._enfileirar((sigla, "detalhe", {
+            "sigla": sigla, "uf": uf, "slug": prof["slug"], "nome": prof.get("nome"),
+            "campus": prof.get("campus"), "coletado_em": datetime.now().isoformat(timespec="seconds"),
+            "hash": hash_corpo, "corpo": texto,
+        }))
+
+    async def fechar(self):
+        """Fecha os segmentos abertos, encerra a thread e relança um eventual erro."""
+        await asyncio.to_thread(self._fila.put, _FIM)
+        await asyncio.to_thread(self._thread.join)
+        self._verificar_erro()
+
+    async def _enfileirar(self, item):
+        self._verificar_erro()
+        try:
+            self._fila.put_nowait(item)
+        except queue.Full:
+            await asyncio.to_thread(self._fila.put, item)
+
+    def _verificar_erro(self):
+        if self.erro is not None:
+            raise RuntimeError(f"Arquivo bruto falhou: {self.erro}") from self.erro
+
+    # --- Thread de escrita ---
+
+    def _run(self):
+        recebeu_fim = False
+        try:
+            while (item := self._fila.get()) is not _FIM:
+                sigla, tipo, registro = item
+                linha = json.dumps(registro, ensure_ascii=False) + "\n"
+                self._segmento(sigla, tipo).write(linha)
+                self.registros += 1
+                self.bytes_brutos += len(linha)
+            recebeu_fim = True
+        except Exception as e:
+            self.erro = e
+            while not recebeu_fim:
+                recebeu_fim = self._fila.get() is _FIM
+        finally:
+            for arquivo, _, _ in self._segmentos.values():
+                arquivo.close()
+
+    def _segmento(self, sigla, tipo):
+        """Segmento aberto de (sigla, tipo), abrindo o próximo quando o atual enche."""
+        arquivo, linhas, numero = self._segmentos.get((sigla, tipo), (None, 0, None))
+        if arquivo is None or linhas >= self.registros_por_segmento:
+            if arquivo is not None:
+                arquivo.close()
+            pasta = self.pasta / sigla
+            pasta.mkdir(parents=True, exist_ok=True)
+            prefixo = f"{tipo}-{self.sufixo}-" if self.sufixo else f"{tipo}-"
+            if numero is None:
+                # Execução retomada: continua depois dos segmentos já gravados
+                existentes = [int(p.name[len(prefixo):].split(".")[0]) for p in pasta.glob(f"{prefixo}*.jsonl.gz")
+                              if p.name[len(prefixo):].split(".")[0].isdigit()]
+                numero = max(existentes, default=0)
+            numero += 1
+            arquivo = gzip.open(pasta / f"{prefixo}{numero:05d}.jsonl.gz", "wt", encoding="utf-8",
+                                compresslevel=self.nivel)
+            linhas = 0
+        self._segmentos[(sigla, tipo)] = (arquivo, linhas + 1, numero)
+        return arquivo
+
+def ler_segmento(caminho):
+    """
+    Itera os registros de um segmento. Um segmento truncado (coleta
+    interrompida no meio da escrita) é lido até o último registro íntegro.
+    """
+    try:
+        with gzip.open(caminho, "rt", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    return
+    except (EOFError, gzip.BadGzipFile):
+        return
+
+@asynccontextmanager
+async def usar_arquivo(arquivo=None, run_id=None, sufixo=None):
+    """
+    Reaproveita `arquivo` se informado; senão abre um para a execução
+    `run_id` (ou não arquiva nada, se config.ARQUIVO_BRUTO estiver desligado).
+    """
+    if arquivo is not None or not config.ARQUIVO_BRUTO:
+        yield arquivo
+        return
+    novo = ArquivoBruto(run_id=run_id, sufixo=sufixo).iniciar()
+    try:
+        yield novo
+    finally:
+        await novo.fechar()
+        if novo.registros:
+            log_evento("arquivo", respostas=novo.registros, pasta=novo.pasta,
+                       sem_compressao=f"{novo.bytes_brutos / 1e6:.1f}MB")
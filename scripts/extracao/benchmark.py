@@ -0,0 +1,132 @@
+# C:\...\extracao\benchmark.py
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import socket
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import config
+from database import DatabaseManager
+from gravador import GravadorSQLite
+from rede import ClienteIntegra, HistoricoLatencia, LimitadorConexoes
+from scraper import run_for_institution
+from servidor_mock import servir
+
+def _aguardar_porta(porta, prazo=30.0):
+    """Espera o servidor mock aceitar conexões."""
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", porta), timeout=0.5):
+            return
+        time.sleep(0.1)
+    raise TimeoutError(f"Servidor mock não respondeu na porta {porta}")
+
+def _percentil(ordenadas, p):
+    return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))] if ordenadas else 0.0
+
+async def medir(porta, db_name, streaming=config.STREAMING, refresh=False):
+    """Coleta a instituição servida em `porta` para um banco vazio e devolve as métricas da rodada."""
+    db = DatabaseManager(db_name)
+    db.init_db()
+    gravador = GravadorSQLite(db_name).iniciar()
+    cliente = ClienteIntegra(LimitadorConexoes())
+    # todas as amostras, não só a janela do hedge
+    cliente.latencias = HistoricoLatencia(janela=None)
+    cliente.duracoes = HistoricoLatencia(janela=None)
+
+    inicio = time.perf_counter()
+    async with cliente:
+        resumo = await run_for_institution("MOCK", f"http://127.0.0.1:{porta}", "GO", db, {}, streaming=streaming,
+                                           cliente=cliente, gravador=gravador, refresh=refresh)
+        await gravador.fechar()
+    duracao = time.perf_counter() - inicio
+
+    with sqlite3.connect(db_name) as conn:
+        professores = conn.execute("SELECT COUNT(*) FROM professores").fetchone()[0]
+        tccs = conn.execute("SELECT COUNT(*) FROM tccs").fetchone()[0]
+    # Servidor: cada tentativa dentro da vaga. Total: a chamada inteira, com a espera pelo limitador e o backoff
+    latencias = sorted(cliente.latencias.amostras(f"127.0.0.1:{porta}"))
+    duracoes = sorted(cliente.duracoes.amostras(f"127.0.0.1:{porta}"))
+    return {
+        "professores": professores,
+        "tccs": tccs,
+        "duracao": duracao,
+        "professores_s": professores / duracao,
+        "tccs_s": tccs / duracao,
+        "p50": _percentil(latencias, 0.50),
+        "p99": _percentil(latencias, 0.99),
+        "p50_total": _percentil(duracoes, 0.50),
+        "p99_total": _percentil(duracoes, 0.99),
+        "escrita": gravador.tempo_escrita,
+        "transacoes": gravador.transacoes,
+        "retentativas": cliente.retry.retentativas,
+        "descartados": resumo["descartados"],
+    }
+
+def rodar_escala(escala, args):
+    """Sobe um servidor mock com `escala` professores em outro processo e mede uma coleta."""
+    servidor = multiprocessing.Process(target=servir, daemon=True, kwargs={
+        "porta": args.porta, "professores": escala, "tccs_por_professor": args.tccs, "latencia": args.latencia,
+        "jitter": args.jitter, "taxa_erro": args.taxa_erro, "tamanho_pagina": args.tamanho_pagina, "seed": 0,
+    })
+    servidor.start()
+    try:
+        _aguardar_porta(args.porta)
+        with tempfile.TemporaryDirectory() as pasta:
+            silencio = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with silencio:
+                return asyncio.run(medir(args.porta, str(Path(pasta) / "bench.db"), not args.sem_streaming))
+    finally:
+        servidor.terminate()
+        servidor.join()
+
+def imprimir(resultados, base=None):
+    # p50/p99: latência do servidor (por tentativa, dentro da vaga); total: com a fila do limitador e o backoff
+    print(f"{'escala':>8} {'prof':>7} {'tccs':>7} {'tempo':>8} {'prof/s':>9} {'tccs/s':>9} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'p50 total':>10} {'p99 total':>10} {'escrita':>8} {'transações':>10}"
+          + ("  vs base" if base else ""))
+    for escala, r in resultados.items():
+        linha = (f"{escala:>8} {r['professores']:>7} {r['tccs']:>7} {r['duracao']:>7.2f}s {r['professores_s']:>9.1f} "
+                 f"{r['tccs_s']:>9.1f} {r['p50'] * 1000:>8.1f} {r['p99'] * 1000:>8.1f} "
+                 f"{r['p50_total'] * 1000:>10.1f} {r['p99_total'] * 1000:>10.1f} {r['escrita']:>7.2f}s "
+                 f"{r['transacoes']:>10}")
+        if base and escala in base:
+            linha += f"  {r['professores_s'] / base[escala]['professores_s'] - 1:+.1%}"
+        print(linha)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do scraper contra o servidor mock local")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[200, 1000, 5000], help="professores por rodada")
+    parser.add_argument("--tccs", type=int, default=3, help="TCCs por professor")
+    parser.add_argument("--latencia", type=float, default=0.02, help="latência base do servidor (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="latência extra aleatória máxima (s)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--tamanho-pagina", type=int, default=config.PAGE_SIZE)
+    parser.add_argument("--porta", type=int, default=8799)
+    parser.add_argument("--sem-streaming", action="store_true", help="lista tudo antes de buscar os detalhes")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--comparar", help="JSON de uma rodada anterior para comparar professores/s")
+    parser.add_argument("--verbose", action="store_true", help="mostra o log do scraper")
+    args = parser.parse_args()
+
+    config.ARQUIVO_BRUTO = False  # o benchmark mede rede e banco, não o arquivo de respostas
+    resultados = {}
+    for escala in args.escalas:
+        resultados[str(escala)] = rodar_escala(escala, args)
+        print(f"escala {escala}: {resultados[str(escala)]['duracao']:.2f}s")
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+    imprimir(resultados, base)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
@@ -0,0 +1,63 @@
+# C:\...\extracao\checkpoint.py
+
+from gravador import salvar
+
+class CheckpointColeta:
+    """
+    Checkpoint de uma instituição dentro de uma execução (run_id).
+
+    Guarda o offset até o qual a listagem já foi recebida e o status de
+    cada slug (pendente/concluido/falhou), permitindo que uma execução
+    interrompida continue exatamente de onde parou.
+    """
+
+    def __init__(self, db_manager, gravador, run_id, sigla):
+        self.db_manager = db_manager
+        self.gravador = gravador
+        self.run_id = run_id
+        self.sigla = sigla
+
+        estado = db_manager.carregar_estado_instituicao(run_id, sigla)
+        self.offset_listagem = estado["offset_listagem"]
+        self.listagem_concluida = estado["listagem_concluida"]
+        self.concluida = estado["status"] == "concluida"
+        self.concluidos = estado["concluidos"]
+        self.pendentes = estado["pendentes"]
+        self._retomados = {p["slug"] for p in self.pendentes}
+        self._falhados = set()
+
+    @property
+    def falhas(self):
+        """Quantidade de slugs desta instituição que ainda estão com falha."""
+        return len(self._falhados)
+
+    def ja_processado(self, slug):
+        """Slug já concluído, ou já reagendado a partir do checkpoint."""
+        return slug in self.concluidos or slug in self._retomados
+
+    async def registrar_listados(self, professores):
+        linhas = [(self.run_id, self.sigla, p["slug"], "pendente") for p in professores]
+        if linhas:
+            await salvar(self.db_manager, self.gravador, "estado_slugs", linhas)
+
+    async def registrar_offset(self, offset, listagem_concluida=False):
+        self.offset_listagem = offset
+        self.listagem_concluida = self.listagem_concluida or listagem_concluida
+        await self._salvar_instituicao("em_andamento")
+
+    async def registrar_slug(self, slug, sucesso):
+        if sucesso:
+            self.concluidos.add(slug)
+            self._falhados.discard(slug)
+        else:
+            self._falhados.add(slug)
+        status = "concluido" if sucesso else "falhou"
+        await salvar(self.db_manager, self.gravador, "estado_slugs", [(self.run_id, self.sigla, slug, status)])
+
+    async def concluir(self):
+        self.concluida = True
+        await self._salvar_instituicao("concluida")
+
+    async def _salvar_instituicao(self, status):
+        linha = (self.run_id, self.sigla, self.offset_listagem, int(self.listagem_concluida), status)
+        await salvar(self.db_manager, self.gravador, "estado_instituicao", [linha])
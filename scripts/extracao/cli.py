@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# C:\...\extracao\cli.py
+
+import argparse
+import asyncio
+import sys
+
+import config
+from agendador import executar_coleta
+from database import DatabaseManager
+from monitoramento import log_evento
+
+def criar_callbacks():
+    """Callbacks de progresso que viram eventos de log (o agendador já limita a frequência)."""
+    return {
+        "prof_progress": lambda c, t: log_evento("progresso", fase="professores", atual=c, total=t),
+        "det_progress": lambda c, t: log_evento("progresso", fase="detalhes", atual=c, total=t),
+        "inst_progress": lambda c, t: log_evento("progresso", fase="instituicoes", atual=c, total=t),
+        "inst_done": lambda s: log_evento("instituicao_concluida", sigla=s),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Integra Scraper (sem interface gráfica)")
+    parser.add_argument("siglas", nargs="*", help="instituições a coletar (padrão: todas)")
+    parser.add_argument("--db", default=config.DB_NAME, help="banco SQLite de destino")
+    parser.add_argument("--concorrencia", type=int, default=config.MAX_CONCURRENT,
+                        help="teto de requisições simultâneas por instituição")
+    parser.add_argument("--max-instituicoes", type=int, default=config.MAX_INSTITUICOES,
+                        help="instituições coletadas ao mesmo tempo (padrão: todas)")
+    parser.add_argument("--resume", action="store_true", help="retoma a última coleta interrompida")
+    parser.add_argument("--refresh", action="store_true", default=config.REFRESH,
+                        help="reprocessa só os portfólios alterados")
+    parser.add_argument("--sem-arquivo", action="store_true", help="não guarda as respostas brutas")
+    parser.add_argument("--log", choices=["texto", "json"], default=config.LOG_FORMATO, help="formato do log")
+    parser.add_argument("--intervalo-progresso", type=float, default=config.PROGRESSO_INTERVALO,
+                        help="segundos mínimos entre eventos de progresso")
+    args = parser.parse_args(argv)
+
+    desconhecidas = [s for s in args.siglas if s not in config.INSTITUICOES]
+    if desconhecidas:
+        parser.error(f"instituições desconhecidas: {', '.join(desconhecidas)}")
+
+    config.DB_NAME = args.db
+    config.MAX_CONCURRENT = config.PER_HOST_CONN_LIMIT = config.AIMD_MAXIMO = args.concorrencia
+    config.LOG_FORMATO = args.log
+    config.PROGRESSO_INTERVALO = args.intervalo_progresso
+    config.ARQUIVO_BRUTO = config.ARQUIVO_BRUTO and not args.sem_arquivo
+
+    db = DatabaseManager(args.db)
+    db.init_db()
+    siglas = args.siglas or list(config.INSTITUICOES)
+    falhas = asyncio.run(executar_coleta(config.INSTITUICOES, siglas, db, criar_callbacks(), resume=args.resume,
+                                         refresh=args.refresh, max_instituicoes=args.max_instituicoes))
+
+    resumo = db.get_status_summary()
+    log_evento("resumo", professores=resumo["total_professores"], tccs=resumo["total_tccs"],
+               detalhes_com_falha=resumo["total_falhas"], instituicoes_com_falha=len(falhas))
+    for sigla, erro in falhas.items():
+        log_evento("falha_instituicao", sigla=sigla, erro=erro)
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,80 @@
 
 import json
 from pathlib import Path
+from urllib.parse import urlsplit
 
 # CONFIGURAÇÕES GERAIS
 DB_NAME = "integra.db"
+DB_JOURNAL_MODE = "WAL"  # leituras (ex.: tabela de status) não esperam o gravador
 PAGE_SIZE = 50
-MAX_CONCURRENT = 50
+MAX_CONCURRENT = 50  # teto de requisições simultâneas por instituição (o AIMD decide quanto usar)
+LIST_CONCURRENT = 8  # páginas da listagem buscadas em paralelo
+STREAMING = True  # sobrepõe listagem e busca de detalhes
+REFRESH = False  # recoleta incremental: reprocessa só portfólios alterados
+
+# COLETA DE VÁRIAS INSTITUIÇÕES ("TODAS")
+MAX_INSTITUICOES = None  # instituições simultâneas (None = todas)
+GLOBAL_CONN_LIMIT = 200  # requisições simultâneas somando todos os hosts
+PER_HOST_CONN_LIMIT = MAX_CONCURRENT  # teto de conexões por host no pool
+
+# CONTROLE ADAPTATIVO POR HOST (AIMD)
+AIMD_INICIAL = 10  # requisições simultâneas ao começar a falar com um host
+AIMD_MINIMO = 1
+AIMD_MAXIMO = PER_HOST_CONN_LIMIT
+AIMD_INCREMENTO = 1.0  # aumento aditivo por janela de respostas saudáveis
+AIMD_FATOR_REDUCAO = 0.5  # redução multiplicativa em 429/5xx/timeout
+
+# POOL DE CONEXÕES
+DNS_CACHE_TTL = 300  # segundos
+KEEPALIVE_TIMEOUT = 30  # segundos que uma conexão ociosa fica no pool
+
+# RETENTATIVAS
+RETRY_TENTATIVAS = 4  # tentativas por requisição (1 original + 3 retentativas)
+RETRY_BASE = 0.5  # segundos; espera máxima dobra a cada tentativa
+RETRY_TETO = 20.0  # segundos; limite da espera entre tentativas
+RETRY_FINAL = True  # reprocessa ao fim da instituição os detalhes que falharam
+
+# PRAZOS E HEDGE (LATÊNCIA DE CAUDA)
+REQUEST_TIMEOUT = 30  # segundos por tentativa (padrão da sessão)
+CONNECT_TIMEOUT = 10  # segundos para abrir a conexão
+LIST_TIMEOUT = 30  # prazo de cada página da listagem
+DETAIL_TIMEOUT = 60  # prazo de cada detalhe (portfólios grandes)
+HEDGE = True  # dispara uma cópia dos detalhes que passam do percentil abaixo
+HEDGE_PERCENTIL = 0.95
+HEDGE_ATRASO_MIN = 0.5  # segundos mínimos antes de disparar a cópia
+HEDGE_MIN_AMOSTRAS = 50  # latências observadas no host antes de habilitar o hedge
+HEDGE_JANELA = 500  # latências recentes guardadas por host
+
+# EXTRAÇÃO DOS DETALHES (fora do event loop)
+PARSE_PROCESSOS = None  # processos do pool de extração (None = núcleos - 1; 0 = extrai no loop)
+PARSE_LIMITE_INLINE = 64 * 1024  # corpos menores que isso (bytes) são extraídos no próprio loop
+
+# GRAVADOR SQLITE
+WRITER_BATCH_SIZE = 500  # linhas por transação
+WRITER_FLUSH_INTERVAL = 1.0  # segundos máximos entre transações
+WRITER_QUEUE_SIZE = 1000  # itens na fila antes de aplicar contrapressão
+
+# ARQUIVO DAS RESPOSTAS BRUTAS (replay offline)
+ARQUIVO_BRUTO = True  # guarda listagens e detalhes recebidos em JSONL comprimido
+ARQUIVO_DIR = "arquivo_bruto"  # pasta raiz; um subdiretório por execução e instituição
+ARQUIVO_REGISTROS_SEGMENTO = 2000  # respostas por segmento .jsonl.gz
+ARQUIVO_NIVEL_GZIP = 6
+
+# LOG E PROGRESSO
+LOG_FORMATO = "texto"  # "texto" (chave=valor) ou "json" (um objeto por linha)
+LOG_INTERVALO_AMOSTRA = 2.0  # segundos entre logs do mesmo evento frequente (por instituição)
+PROGRESSO_INTERVALO = 0.25  # segundos mínimos entre atualizações de progresso
+
+# COLETA DISTRIBUÍDA (coordenador.py)
+FILA_DB = "fila_coleta.db"  # fila de unidades de trabalho compartilhada pelos workers
+FILA_LEASE = 120  # segundos que uma unidade fica reservada sem renovação
+FILA_MAX_TENTATIVAS = 5  # entregas de uma unidade antes de marcá-la como falha
+FILA_LOTE_DETALHES = 25  # professores por unidade de detalhe
+FILA_UNIDADES_POR_WORKER = 8  # unidades processadas ao mesmo tempo por processo
+FILA_INTERVALO_CONSULTA = 1.0  # segundos entre consultas à fila quando não há trabalho
+# Journal do banco de resultados com workers em várias máquinas: o WAL exige memória
+# compartilhada num só host e, num sistema de arquivos de rede, pode perder commits
+DISTRIBUIDO_JOURNAL_MODE = "DELETE"
 
 # HEADERS HTTP
 DEFAULT_HEADERS = {
@@ -32,3 +101,15 @@ def carregar_instituicoes():
         return {}
 
 INSTITUICOES = carregar_instituicoes()
+
+def opcoes_instituicao(valores):
+    """
+    Opções opcionais de uma instituição: um 4º elemento (objeto) na entrada
+    de lista_instituicoes.json, ex.: ["Nome", "https://...", "UF", {"qps": 5}].
+    Chaves aceitas: "qps" (teto de requisições/s) e "max_concurrent".
+    """
+    return valores[3] if len(valores) > 3 and isinstance(valores[3], dict) else {}
+
+def opcoes_por_host():
+    """Mapeia o host (netloc) de cada instituição para suas opções."""
+    return {urlsplit(valores[1]).netloc: opcoes_instituicao(valores) for valores in INSTITUICOES.values()}
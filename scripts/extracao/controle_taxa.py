@@ -0,0 +1,85 @@
+# C:\...\extracao\controle_taxa.py
+
+import asyncio
+import time
+
+import config
+
+class BaldeTokens:
+    """Token bucket: limita a taxa a `qps` requisições/s, com rajadas de até `capacidade`."""
+
+    def __init__(self, qps, capacidade=None):
+        self.qps = qps
+        self.capacidade = capacidade or max(1.0, qps)
+        self.tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def aguardar(self):
+        """Espera até haver um token disponível e o consome."""
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self._ultimo) * self.qps)
+                self._ultimo = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.qps)
+
+class ControladorAIMD:
+    """
+    Controle adaptativo de concorrência de um host (additive-increase /
+    multiplicative-decrease).
+
+    Cada resposta saudável soma `incremento / limite` ao limite (cerca de +1
+    a cada janela completa de requisições). Um erro de sobrecarga (429, 5xx,
+    timeout) multiplica o limite por `fator_reducao`, no máximo uma vez por
+    intervalo de latência, para que uma rajada de erros conte como um único
+    sinal de congestionamento. A latência sozinha não reduz o limite: a dos
+    detalhes cresce com o tamanho do portfólio (e os maiores vêm primeiro),
+    então uma resposta lenta não indica um host sobrecarregado.
+    """
+
+    def __init__(self, inicial=config.AIMD_INICIAL, minimo=config.AIMD_MINIMO, maximo=config.AIMD_MAXIMO,
+                 qps=None, incremento=config.AIMD_INCREMENTO, fator_reducao=config.AIMD_FATOR_REDUCAO):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.limite = float(min(max(inicial, minimo), maximo))
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.balde = BaldeTokens(qps) if qps else None
+        self.em_uso = 0
+        self.latencia_ref = None
+        self.reducoes = 0
+        self._ultima_reducao = 0.0
+        self._cond = asyncio.Condition()
+
+    async def adquirir(self):
+        """Espera um token (se houver teto de QPS) e uma vaga dentro do limite atual."""
+        if self.balde:
+            await self.balde.aguardar()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.em_uso < int(self.limite))
+            self.em_uso += 1
+
+    async def liberar(self, latencia, sobrecarga=False, ajustar=True):
+        """Devolve a vaga e, se `ajustar`, ajusta o limite conforme o resultado da requisição."""
+        async with self._cond:
+            self.em_uso -= 1
+            if ajustar:
+                self._ajustar(latencia, sobrecarga)
+            self._cond.notify_all()
+
+    def _ajustar(self, latencia, sobrecarga):
+        if sobrecarga:
+            agora = time.monotonic()
+            if agora - self._ultima_reducao >= (self.latencia_ref or 0.0):
+                self.limite = max(self.minimo, self.limite * self.fator_reducao)
+                self._ultima_reducao = agora
+                self.reducoes += 1
+            return
+
+        self.limite = min(self.maximo, self.limite + self.incremento / self.limite)
+        # Média móvel das latências saudáveis: o intervalo mínimo entre reduções
+        self.latencia_ref = latencia if self.latencia_ref is None else 0.9 * self.latencia_ref + 0.1 * latencia
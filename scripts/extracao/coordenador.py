@@ -0,0 +1,182 @@
+# C:\...\extracao\coordenador.py
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+
+import config
+from arquivo_bruto import usar_arquivo
+from database import DatabaseManager
+from decodificador import DecodificadorDetalhes
+from fila_trabalho import FilaTrabalho
+from gravador import usar_gravador
+from monitoramento import log, log_evento
+from rede import ClienteIntegra, LimitadorConexoes
+from scraper import fetch_detalhes, fetch_professores
+
+def enfileirar_execucao(instituicoes, siglas, db_manager, fila, refresh=config.REFRESH):
+    """
+    Registra uma execução e coloca na fila uma unidade de listagem por
+    instituição. Os lotes de detalhes são enfileirados pelos próprios
+    workers, à medida que as listagens terminam.
+    """
+    run_id = db_manager.iniciar_execucao(siglas)
+    fila.enfileirar(run_id, [
+        (sigla, "listagem", sigla, {"base_url": instituicoes[sigla][1], "uf": instituicoes[sigla][2],
+                                    "refresh": refresh})
+        for sigla in siglas if sigla in instituicoes
+    ])
+    return run_id
+
+class WorkerColeta:
+    """
+    Worker de um processo: reivindica unidades da fila, processa até
+    `simultaneas` ao mesmo tempo num único event loop e renova os leases
+    enquanto trabalha. Sai quando a fila da execução estiver drenada.
+    """
+
+    def __init__(self, run_id, db_manager, fila, dono, simultaneas=config.FILA_UNIDADES_POR_WORKER):
+        self.run_id = run_id
+        self.db_manager = db_manager
+        self.fila = fila
+        self.dono = dono
+        self.simultaneas = simultaneas
+        self._em_andamento = {}
+        self._meta = {}
+
+    async def executar(self):
+        async with ClienteIntegra(LimitadorConexoes()) as cliente, usar_gravador(self.db_manager) as gravador, \
+                usar_arquivo(run_id=self.run_id, sufixo=self.dono) as arquivo:
+            # O paralelismo vem dos próprios processos worker: a extração roda no loop
+            recursos = {"cliente": cliente, "gravador": gravador, "arquivo": arquivo,
+                        "decodificador": DecodificadorDetalhes(processos=0)}
+            renovador = asyncio.create_task(self._renovar_leases())
+            try:
+                await self._laco(recursos)
+            finally:
+                renovador.cancel()
+
+    async def _laco(self, recursos):
+        while True:
+            vagas = self.simultaneas - len(self._em_andamento)
+            unidades = await asyncio.to_thread(self.fila.reivindicar, self.run_id, self.dono, vagas) if vagas else []
+            for unidade in unidades:
+                self._em_andamento[unidade["id"]] = asyncio.create_task(self._processar(unidade, recursos))
+
+            if not self._em_andamento:
+                if not await asyncio.to_thread(self.fila.restantes, self.run_id):
+                    return
+                # Outros workers ainda listam: novas unidades podem aparecer
+                await asyncio.sleep(config.FILA_INTERVALO_CONSULTA)
+                continue
+            await asyncio.wait(list(self._em_andamento.values()), timeout=config.FILA_INTERVALO_CONSULTA,
+                               return_when=asyncio.FIRST_COMPLETED)
+
+    async def _renovar_leases(self):
+        while True:
+            await asyncio.sleep(config.FILA_LEASE / 3)
+            await asyncio.to_thread(self.fila.renovar, self.dono, list(self._em_andamento))
+
+    async def _processar(self, unidade, recursos):
+        id_, sigla, carga = unidade["id"], unidade["sigla"], unidade["carga"]
+        try:
+            if unidade["tipo"] == "listagem":
+                await self._listar(sigla, carga, recursos)
+                await asyncio.to_thread(self.fila.concluir, self.dono, id_)
+                return
+
+            falhas = []
+            meta_anterior = self._meta_anterior(sigla) if carga["refresh"] else None
+            await fetch_detalhes(sigla, carga["base_url"], carga["uf"], carga["professores"], self.db_manager,
+                                 meta_anterior=meta_anterior, falhas=falhas, **recursos)
+            if falhas:
+                # Só os professores que falharam voltam para a fila
+                await asyncio.to_thread(self.fila.reabrir, self.dono, id_, f"{len(falhas)} detalhes falharam",
+                                        {**carga, "professores": falhas})
+            else:
+                await asyncio.to_thread(self.fila.concluir, self.dono, id_)
+        except Exception as e:
+            log(f"[{sigla}] Falha na unidade {id_}: {e}")
+            await asyncio.to_thread(self.fila.reabrir, self.dono, id_, str(e))
+        finally:
+            del self._em_andamento[id_]
+
+    async def _listar(self, sigla, carga, recursos):
+        # Estrito: uma página perdida levanta e a unidade volta à fila, em vez de concluir incompleta
+        professores = await fetch_professores(sigla, carga["base_url"], self.db_manager, cliente=recursos["cliente"],
+                                              gravador=recursos["gravador"], arquivo=recursos["arquivo"],
+                                              estrito=True)
+        log(f"[{sigla}] Total de professores encontrados: {len(professores)}")
+        tamanho = config.FILA_LOTE_DETALHES
+        await asyncio.to_thread(self.fila.enfileirar, self.run_id, [
+            (sigla, "detalhe", professores[i]["slug"], {**carga, "professores": professores[i:i + tamanho]})
+            for i in range(0, len(professores), tamanho)
+        ])
+
+    def _meta_anterior(self, sigla):
+        if sigla not in self._meta:
+            self._meta[sigla] = self.db_manager.carregar_meta_coleta(sigla)
+        return self._meta[sigla]
+
+def executar_worker(run_id, db_name, fila_db, dono):
+    """Ponto de entrada de um processo worker."""
+    db_manager = DatabaseManager(db_name, journal_mode=config.DISTRIBUIDO_JOURNAL_MODE)
+    asyncio.run(WorkerColeta(run_id, db_manager, FilaTrabalho(fila_db), dono).executar())
+
+def trabalhar(run_id, db_name, fila_db, processos):
+    """Sobe `processos` workers nesta máquina e espera a fila da execução drenar."""
+    prefixo = f"{socket.gethostname()}-{os.getpid()}"
+    workers = [
+        multiprocessing.Process(target=executar_worker, args=(run_id, db_name, fila_db, f"{prefixo}-{n}"))
+        for n in range(processos)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return [w.exitcode for w in workers]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coleta distribuída: fila de trabalho compartilhada e workers")
+    parser.add_argument("--db", default=config.DB_NAME, help="banco SQLite dos resultados")
+    parser.add_argument("--fila", default=config.FILA_DB, help="banco SQLite da fila de trabalho")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_enf = sub.add_parser("enfileirar", help="registra uma execução e enfileira as listagens")
+    p_enf.add_argument("siglas", nargs="*", help="instituições (padrão: todas)")
+    p_enf.add_argument("--refresh", action="store_true", default=config.REFRESH)
+
+    p_trab = sub.add_parser("trabalhar", help="sobe workers que consomem a fila até drená-la")
+    p_trab.add_argument("--run", type=int, help="execução a consumir (padrão: a mais recente da fila)")
+    p_trab.add_argument("--processos", type=int, default=os.cpu_count(), help="processos worker nesta máquina")
+
+    p_status = sub.add_parser("status", help="mostra o andamento da fila")
+    p_status.add_argument("--run", type=int)
+    args = parser.parse_args()
+
+    # Workers podem estar em outras máquinas: o banco de resultados sai do WAL
+    db = DatabaseManager(args.db, journal_mode=config.DISTRIBUIDO_JOURNAL_MODE)
+    db.init_db()
+    fila = FilaTrabalho(args.fila)
+    fila.init_db()
+
+    if args.comando == "enfileirar":
+        siglas = args.siglas or list(config.INSTITUICOES)
+        run_id = enfileirar_execucao(config.INSTITUICOES, siglas, db, fila, args.refresh)
+        log_evento("execucao_enfileirada", run_id=run_id, instituicoes=len(siglas))
+        sys.exit(0)
+
+    run_id = args.run or fila.ultima_execucao()
+    if run_id is None:
+        parser.error("nenhuma execução na fila; use 'enfileirar' antes")
+    if args.comando == "trabalhar":
+        codigos = trabalhar(run_id, args.db, args.fila, args.processos)
+        resumo = fila.resumo(run_id)
+        if not fila.restantes(run_id) and not any("falhou" in r for r in resumo.values()):
+            db.finalizar_execucao(run_id)
+        log_evento("fila", run_id=run_id, resumo=resumo, workers_com_erro=sum(1 for c in codigos if c))
+    else:
+        log_evento("fila", run_id=run_id, resumo=fila.resumo(run_id))
@@ -1,8 +1,389 @@
 # C:\...\extracao\database.py
 
+import json
 import sqlite3
+from datetime import datetime
+
 import config
 
+# Versão do esquema bruto (PRAGMA user_version). 0/1: tabelas professores e
+# tccs com texto livre; 2: tabelas tipadas com dicionários e views de compatibilidade;
+# 3: tcc.ano_texto guarda o ano original que não é um inteiro.
+SCHEMA_VERSAO = 3
+STRICT = " STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+SUFIXO_ORIENTADOR = " (Orientador/a)"
+
+SQL_ESQUEMA_V2 = [
+    f"""
+    CREATE TABLE IF NOT EXISTS instituicao (
+        id INTEGER PRIMARY KEY,
+        sigla TEXT NOT NULL UNIQUE,
+        uf TEXT
+    ){STRICT}
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS dic_campus (
+        id INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL UNIQUE
+    ){STRICT}
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS dic_curso (
+        id INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL UNIQUE
+    ){STRICT}
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS dic_nome_instituicao (
+        id INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL UNIQUE
+    ){STRICT}
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS professor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        instituicao_id INTEGER NOT NULL REFERENCES instituicao(id),
+        nome TEXT,
+        campus_id INTEGER REFERENCES dic_campus(id),
+        cargo TEXT,
+        slug TEXT NOT NULL,
+        url_final TEXT,
+        UNIQUE(slug, instituicao_id)
+    ){STRICT}
+    """,
+    # orientados: só o nomeDoOrientado; o orientador é o professor (professor_id).
+    # ano_texto: o ano como veio, só quando ano (inteiro) não o reproduz (ex.: '20a0')
+    f"""
+    CREATE TABLE IF NOT EXISTS tcc (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        professor_id INTEGER NOT NULL REFERENCES professor(id),
+        nome_instituicao_id INTEGER REFERENCES dic_nome_instituicao(id),
+        ano INTEGER,
+        ano_texto TEXT,
+        curso_id INTEGER REFERENCES dic_curso(id),
+        orientados TEXT,
+        titulo TEXT,
+        resumo TEXT,
+        palavras_chaves TEXT,
+        UNIQUE(professor_id, titulo)
+    ){STRICT}
+    """,
+]
+
+# Views com o layout antigo: quem lê professores/tccs (ex.: star_schema.py) não muda
+SQL_VIEWS_V2 = [
+    """
+    CREATE VIEW IF NOT EXISTS professores AS
+    SELECT p.id, i.sigla, p.nome, c.nome AS campus, p.cargo, p.slug, p.url_final
+    FROM professor p
+    JOIN instituicao i ON i.id = p.instituicao_id
+    LEFT JOIN dic_campus c ON c.id = p.campus_id
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS tccs AS
+    SELECT t.id, p.slug AS slug_professor, NULLIF(NULLIF(p.nome, ''), 'Não disponível') AS nome_professor,
+           i.sigla, n.nome AS instituicao, i.uf AS UF, NULLIF(NULLIF(c.nome, ''), 'Não disponível') AS campus,
+           COALESCE(t.ano_texto, CAST(t.ano AS TEXT)) AS ano, cu.nome AS curso,
+           CASE
+               WHEN NULLIF(NULLIF(p.nome, ''), 'Não disponível') IS NULL THEN t.orientados
+               WHEN t.orientados IS NULL THEN p.nome || '{SUFIXO_ORIENTADOR}'
+               ELSE t.orientados || ', ' || p.nome || '{SUFIXO_ORIENTADOR}'
+           END AS autores,
+           t.titulo, t.resumo, t.palavras_chaves
+    FROM tcc t
+    JOIN professor p ON p.id = t.professor_id
+    JOIN instituicao i ON i.id = p.instituicao_id
+    LEFT JOIN dic_nome_instituicao n ON n.id = t.nome_instituicao_id
+    LEFT JOIN dic_campus c ON c.id = p.campus_id
+    LEFT JOIN dic_curso cu ON cu.id = t.curso_id
+    """,
+]
+
+SQL_UPSERT_INSTITUICAO = """
+INSERT INTO instituicao (sigla, uf) VALUES (?, ?)
+ON CONFLICT(sigla) DO UPDATE SET uf = COALESCE(instituicao.uf, excluded.uf)
+"""
+SQL_INSERT_CAMPUS = "INSERT OR IGNORE INTO dic_campus (nome) VALUES (?)"
+SQL_INSERT_CURSO = "INSERT OR IGNORE INTO dic_curso (nome) VALUES (?)"
+SQL_INSERT_NOME_INSTITUICAO = "INSERT OR IGNORE INTO dic_nome_instituicao (nome) VALUES (?)"
+
+# Parâmetros: (sigla, nome, campus, cargo, slug, url_final). Um professor
+# criado antes pelo detalhe (sem cargo/url) é completado pela listagem.
+SQL_UPSERT_PROFESSOR = """
+INSERT INTO professor (instituicao_id, nome, campus_id, cargo, slug, url_final)
+VALUES ((SELECT id FROM instituicao WHERE sigla = ?), ?, (SELECT id FROM dic_campus WHERE nome = ?), ?, ?, ?)
+ON CONFLICT(slug, instituicao_id) DO UPDATE SET
+    nome = COALESCE(professor.nome, excluded.nome),
+    campus_id = COALESCE(professor.campus_id, excluded.campus_id),
+    cargo = COALESCE(excluded.cargo, professor.cargo),
+    url_final = COALESCE(excluded.url_final, professor.url_final)
+"""
+
+# Parâmetros: (slug, sigla, instituicao, ano, ano_texto, curso, orientados, titulo, resumo, palavras_chaves)
+SQL_INSERT_TCC = """
+INSERT OR IGNORE INTO tcc (professor_id, nome_instituicao_id, ano, ano_texto, curso_id, orientados, titulo, resumo,
+                           palavras_chaves)
+VALUES (
+    (SELECT p.id FROM professor p JOIN instituicao i ON i.id = p.instituicao_id WHERE p.slug = ? AND i.sigla = ?),
+    (SELECT id FROM dic_nome_instituicao WHERE nome = ?), ?, ?, (SELECT id FROM dic_curso WHERE nome = ?),
+    ?, ?, ?, ?
+)
+"""
+
+SQL_UPSERT_META_COLETA = """
+INSERT INTO coleta_meta (sigla, slug, ultima_coleta, hash_corpo, etag, last_modified, duracao, tamanho)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(sigla, slug) DO UPDATE SET
+    ultima_coleta = excluded.ultima_coleta,
+    hash_corpo = excluded.hash_corpo,
+    etag = excluded.etag,
+    last_modified = excluded.last_modified,
+    duracao = excluded.duracao,
+    tamanho = COALESCE(excluded.tamanho, tamanho)
+"""
+
+SQL_UPSERT_ESTADO_INSTITUICAO = """
+INSERT INTO coleta_estado_instituicao (run_id, sigla, offset_listagem, listagem_concluida, status)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(run_id, sigla) DO UPDATE SET
+    offset_listagem = MAX(offset_listagem, excluded.offset_listagem),
+    listagem_concluida = MAX(listagem_concluida, excluded.listagem_concluida),
+    status = excluded.status
+"""
+
+# 'pendente' nunca rebaixa um slug já concluído ou com falha
+SQL_UPSERT_ESTADO_SLUG = """
+INSERT INTO coleta_estado_slug (run_id, sigla, slug, status)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(run_id, sigla, slug) DO UPDATE SET
+    status = CASE WHEN excluded.status = 'pendente' THEN status ELSE excluded.status END
+"""
+
+# Triggers que mantêm resumo_coleta. professor tem UNIQUE(slug, instituicao_id),
+# então cada linha inserida é um professor distinto; linhas ignoradas (ou o
+# UPDATE de um upsert) não disparam o trigger de INSERT. `falhas` conta os
+# slugs com status 'falhou' no checkpoint da execução mais recente da
+# instituição (`falhas_run_id`): zera quando uma execução nova começa e
+# desconta quando uma retentativa recupera o slug; falhas de execuções
+# anteriores não contam mais.
+SQL_TRIGGERS_RESUMO = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_professor_ins AFTER INSERT ON professor BEGIN
+        INSERT INTO resumo_coleta (sigla, professores)
+        SELECT sigla, 1 FROM instituicao WHERE id = NEW.instituicao_id
+        ON CONFLICT(sigla) DO UPDATE SET professores = professores + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_professor_del AFTER DELETE ON professor BEGIN
+        UPDATE resumo_coleta SET professores = professores - 1
+        WHERE sigla = (SELECT sigla FROM instituicao WHERE id = OLD.instituicao_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_tcc_ins AFTER INSERT ON tcc BEGIN
+        INSERT INTO resumo_coleta (sigla, tccs)
+        SELECT i.sigla, 1 FROM professor p JOIN instituicao i ON i.id = p.instituicao_id WHERE p.id = NEW.professor_id
+        ON CONFLICT(sigla) DO UPDATE SET tccs = tccs + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_tcc_del AFTER DELETE ON tcc BEGIN
+        UPDATE resumo_coleta SET tccs = tccs - 1
+        WHERE sigla = (SELECT i.sigla FROM professor p JOIN instituicao i ON i.id = p.instituicao_id
+                       WHERE p.id = OLD.professor_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_falha_run AFTER INSERT ON coleta_estado_instituicao BEGIN
+        INSERT INTO resumo_coleta (sigla, falhas_run_id) VALUES (NEW.sigla, NEW.run_id)
+        ON CONFLICT(sigla) DO UPDATE SET falhas = 0, falhas_run_id = NEW.run_id
+        WHERE NEW.run_id > COALESCE(falhas_run_id, -1);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_falha_ins AFTER INSERT ON coleta_estado_slug
+    WHEN NEW.status = 'falhou' BEGIN
+        INSERT INTO resumo_coleta (sigla, falhas, falhas_run_id) VALUES (NEW.sigla, 1, NEW.run_id)
+        ON CONFLICT(sigla) DO UPDATE SET
+            falhas = CASE WHEN NEW.run_id > COALESCE(falhas_run_id, -1) THEN 1
+                          WHEN NEW.run_id = falhas_run_id THEN falhas + 1 ELSE falhas END,
+            falhas_run_id = MAX(COALESCE(falhas_run_id, -1), NEW.run_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_falha_upd AFTER UPDATE OF status ON coleta_estado_slug
+    WHEN (NEW.status = 'falhou') != (OLD.status = 'falhou') BEGIN
+        INSERT INTO resumo_coleta (sigla, falhas, falhas_run_id)
+        VALUES (NEW.sigla, NEW.status = 'falhou', NEW.run_id)
+        ON CONFLICT(sigla) DO UPDATE SET
+            falhas = CASE WHEN NEW.run_id > COALESCE(falhas_run_id, -1) THEN excluded.falhas
+                          WHEN NEW.run_id = falhas_run_id
+                          THEN falhas + (CASE WHEN NEW.status = 'falhou' THEN 1 ELSE -1 END)
+                          ELSE falhas END,
+            falhas_run_id = MAX(COALESCE(falhas_run_id, -1), NEW.run_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_meta_ins AFTER INSERT ON coleta_meta BEGIN
+        INSERT INTO resumo_coleta (sigla, ultima_coleta) VALUES (NEW.sigla, NEW.ultima_coleta)
+        ON CONFLICT(sigla) DO UPDATE SET ultima_coleta = MAX(COALESCE(ultima_coleta, ''), NEW.ultima_coleta);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_meta_upd AFTER UPDATE OF ultima_coleta ON coleta_meta BEGIN
+        UPDATE resumo_coleta SET ultima_coleta = MAX(COALESCE(ultima_coleta, ''), NEW.ultima_coleta)
+        WHERE sigla = NEW.sigla;
+    END
+    """,
+]
+
+SQL_PREENCHER_RESUMO = """
+INSERT OR REPLACE INTO resumo_coleta (sigla, professores, tccs, falhas, ultima_coleta, falhas_run_id)
+SELECT s.sigla,
+       (SELECT COUNT(*) FROM professores p WHERE p.sigla = s.sigla),
+       (SELECT COUNT(*) FROM tccs t WHERE t.sigla = s.sigla),
+       (SELECT COUNT(*) FROM coleta_estado_slug e
+        WHERE e.sigla = s.sigla AND e.run_id = r.run_id AND e.status = 'falhou'),
+       (SELECT MAX(m.ultima_coleta) FROM coleta_meta m WHERE m.sigla = s.sigla),
+       r.run_id
+FROM (SELECT sigla FROM professores UNION SELECT sigla FROM tccs
+      UNION SELECT sigla FROM coleta_estado_instituicao UNION SELECT sigla FROM coleta_estado_slug) s
+LEFT JOIN (SELECT sigla, MAX(run_id) AS run_id
+           FROM (SELECT sigla, run_id FROM coleta_estado_instituicao
+                 UNION ALL SELECT sigla, run_id FROM coleta_estado_slug)
+           GROUP BY sigla) r ON r.sigla = s.sigla
+WHERE s.sigla IS NOT NULL
+"""
+
+# Migração do layout antigo (tabelas professores/tccs com texto livre) para o v2
+SQL_MIGRAR_V1 = [
+    """
+    INSERT OR IGNORE INTO instituicao (sigla, uf)
+    SELECT sigla, MAX(uf) FROM (SELECT sigla, NULL AS uf FROM professores_v1 UNION ALL SELECT sigla, UF FROM tccs_v1)
+    WHERE sigla IS NOT NULL GROUP BY sigla
+    """,
+    """
+    INSERT OR IGNORE INTO dic_campus (nome)
+    SELECT campus FROM professores_v1 WHERE campus IS NOT NULL UNION SELECT campus FROM tccs_v1 WHERE campus IS NOT NULL
+    """,
+    "INSERT OR IGNORE INTO dic_curso (nome) SELECT DISTINCT curso FROM tccs_v1 WHERE curso IS NOT NULL",
+    """
+    INSERT OR IGNORE INTO dic_nome_instituicao (nome)
+    SELECT DISTINCT instituicao FROM tccs_v1 WHERE instituicao IS NOT NULL
+    """,
+    """
+    INSERT OR IGNORE INTO professor (id, instituicao_id, nome, campus_id, cargo, slug, url_final)
+    SELECT p.id, i.id, p.nome, c.id, p.cargo, p.slug, p.url_final
+    FROM professores_v1 p
+    JOIN instituicao i ON i.sigla = p.sigla
+    LEFT JOIN dic_campus c ON c.nome = p.campus
+    WHERE p.slug IS NOT NULL
+    ORDER BY p.id
+    """,
+    # orientadores que só aparecem nos TCCs: passam a contar na view professores
+    # (e no resumo), como os que a coleta v2 cria a partir do detalhe
+    """
+    INSERT OR IGNORE INTO professor (instituicao_id, nome, campus_id, slug)
+    SELECT i.id, MAX(t.nome_professor), MAX(c.id), t.slug_professor
+    FROM tccs_v1 t
+    JOIN instituicao i ON i.sigla = t.sigla
+    LEFT JOIN dic_campus c ON c.nome = t.campus
+    WHERE t.slug_professor IS NOT NULL
+    GROUP BY i.id, t.slug_professor
+    """,
+    f"""
+    INSERT OR IGNORE INTO tcc (id, professor_id, nome_instituicao_id, ano, ano_texto, curso_id, orientados, titulo,
+                               resumo, palavras_chaves)
+    SELECT t.id, p.id, n.id, t.ano_inteiro,
+           CASE WHEN t.ano IS NOT CAST(t.ano_inteiro AS TEXT) THEN t.ano END,
+           cu.id,
+           CASE
+               WHEN t.nome_professor IS NULL THEN t.autores
+               WHEN t.autores = t.nome_professor || '{SUFIXO_ORIENTADOR}' THEN NULL
+               WHEN substr(t.autores, -length(', ' || t.nome_professor || '{SUFIXO_ORIENTADOR}'))
+                    = ', ' || t.nome_professor || '{SUFIXO_ORIENTADOR}'
+                   THEN substr(t.autores, 1, length(t.autores) - length(', ' || t.nome_professor || '{SUFIXO_ORIENTADOR}'))
+               ELSE t.autores
+           END,
+           t.titulo, t.resumo, t.palavras_chaves
+    FROM (SELECT *, CASE WHEN trim(ano) <> '' AND trim(ano) NOT GLOB '*[^0-9]*'
+                         THEN CAST(trim(ano) AS INTEGER) END AS ano_inteiro
+          FROM tccs_v1) t
+    JOIN instituicao i ON i.sigla = t.sigla
+    JOIN professor p ON p.instituicao_id = i.id AND p.slug = t.slug_professor
+    LEFT JOIN dic_nome_instituicao n ON n.nome = t.instituicao
+    LEFT JOIN dic_curso cu ON cu.nome = t.curso
+    ORDER BY t.id
+    """,
+]
+
+def professores_para_linhas(sigla, professores):
+    """Converte dicionários de professores em tuplas para SQL_UPSERT_PROFESSOR."""
+    return [
+        (sigla, p["nome"], p["campus"], p["cargo"], p["slug"], p["url_final"])
+        for p in professores
+    ]
+
+def comandos_professores(sigla, professores):
+    """Lista de (sql, linhas) que grava professores e os dicionários que eles usam, na ordem certa."""
+    campi = {p["campus"] for p in professores if p["campus"] is not None}
+    return [
+        (SQL_UPSERT_INSTITUICAO, [(sigla, None)]),
+        (SQL_INSERT_CAMPUS, [(c,) for c in campi]),
+        (SQL_UPSERT_PROFESSOR, professores_para_linhas(sigla, professores)),
+    ]
+
+def _ano(valor):
+    """
+    (ano, ano_texto): o ano como inteiro, ou NULL se não for só dígitos, e
+    o texto original quando o inteiro não o reproduz (senão NULL).
+    """
+    if valor is None:
+        return None, None
+    texto = str(valor)
+    ano = int(texto.strip()) if texto.strip().isdigit() else None
+    return ano, None if texto == str(ano) else texto
+
+def _orientados(autores, nome_professor):
+    """Tira de `autores` o orientador acrescentado por extrair_tccs."""
+    if not nome_professor or autores is None:
+        return autores
+    sufixo = f"{nome_professor}{SUFIXO_ORIENTADOR}"
+    if autores == sufixo:
+        return None
+    if autores.endswith(", " + sufixo):
+        return autores[:-len(", " + sufixo)]
+    return autores
+
+def comandos_tccs(tccs_data):
+    """
+    Lista de (sql, linhas) que grava TCCs no formato de extrair_tccs (a
+    tupla de 12 campos do layout antigo): instituição, dicionários, o
+    professor (caso o detalhe chegue antes da listagem) e os TCCs.
+    """
+    instituicoes, campi, cursos, nomes, professores, linhas = {}, set(), set(), set(), {}, []
+    for (slug, nome_prof, sigla, instituicao, uf, campus, ano, curso, autores, titulo, resumo,
+         palavras) in tccs_data:
+        instituicoes[sigla] = instituicoes.get(sigla) or uf
+        if campus is not None:
+            campi.add(campus)
+        if curso is not None:
+            cursos.add(curso)
+        if instituicao is not None:
+            nomes.add(instituicao)
+        professores[(sigla, slug)] = (sigla, nome_prof, campus, None, slug, None)
+        linhas.append((slug, sigla, instituicao, *_ano(ano), curso, _orientados(autores, nome_prof), titulo, resumo,
+                       palavras))
+    return [
+        (SQL_UPSERT_INSTITUICAO, list(instituicoes.items())),
+        (SQL_INSERT_CAMPUS, [(c,) for c in campi]),
+        (SQL_INSERT_CURSO, [(c,) for c in cursos]),
+        (SQL_INSERT_NOME_INSTITUICAO, [(n,) for n in nomes]),
+        (SQL_UPSERT_PROFESSOR, list(professores.values())),
+        (SQL_INSERT_TCC, linhas),
+    ]
+
 def clean_value(val):
     """Retorna None para valores considerados vazios, senão retorna o próprio valor."""
     if val in (None, "", "Não disponível"):
@@ -12,110 +393,300 @@ def clean_value(val):
 class DatabaseManager:
     """Gerencia todas as operações do banco de dados SQLite."""
     
-    def __init__(self, db_name=config.DB_NAME):
+    def __init__(self, db_name=config.DB_NAME, journal_mode=config.DB_JOURNAL_MODE):
         self.db_name = db_name
+        self.journal_mode = journal_mode
 
     def _get_connection(self):
         """Retorna uma conexão com o banco de dados."""
-        return sqlite3.connect(self.db_name)
+        # Timeout longo: sem WAL (coleta distribuída), leitores esperam o gravador
+        return sqlite3.connect(self.db_name, timeout=60)
 
     def init_db(self):
-        """Cria as tabelas e índices necessários se não existirem."""
+        """
+        Cria as tabelas, views e triggers necessários se não existirem.
+
+        Um banco no layout antigo (tabelas professores e tccs) é migrado
+        para o esquema atual (PRAGMA user_version = SCHEMA_VERSAO): anos
+        inteiros (o texto original fica em ano_texto quando não é um
+        inteiro), dicionários para textos repetidos e tabelas STRICT, com
+        views professores/tccs que reproduzem as colunas antigas. A view
+        professores inclui também os orientadores que só apareciam em tccs.
+        """
         with self._get_connection() as conn:
             cur = conn.cursor()
+            # WAL permite leituras durante a escrita do gravador; a coleta distribuída usa DELETE
+            cur.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            # transação explícita: o sqlite3 não abre uma antes de DDL (ALTER/CREATE/DROP),
+            # e a migração interrompida no meio deixaria as tabelas antigas renomeadas;
+            # um erro desfaz tudo no rollback do `with`
+            cur.execute("BEGIN")
+            versao = cur.execute("PRAGMA user_version").fetchone()[0]
+            layout_v1 = cur.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tccs'"
+            ).fetchone()
+            for sql in SQL_ESQUEMA_V2:
+                cur.execute(sql)
+            if layout_v1:
+                print(f"Migrando '{self.db_name}' do esquema v{versao or 1} para o v{SCHEMA_VERSAO}...")
+                # as tabelas antigas dão lugar às views de mesmo nome
+                cur.execute("ALTER TABLE professores RENAME TO professores_v1")
+                cur.execute("ALTER TABLE tccs RENAME TO tccs_v1")
+                for sql in SQL_MIGRAR_V1:
+                    cur.execute(sql)
+                cur.execute("DROP TABLE professores_v1")
+                cur.execute("DROP TABLE tccs_v1")
+            elif "ano_texto" not in {row[1] for row in cur.execute("PRAGMA table_info(tcc)")}:
+                # banco v2: a view tccs passa a devolver o ano original
+                cur.execute("ALTER TABLE tcc ADD COLUMN ano_texto TEXT")
+                cur.execute("DROP VIEW IF EXISTS tccs")
+            for sql in SQL_VIEWS_V2:
+                cur.execute(sql)
+
+            # metadados por slug para a recoleta incremental
             cur.execute("""
-            CREATE TABLE IF NOT EXISTS professores (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+            CREATE TABLE IF NOT EXISTS coleta_meta (
                 sigla TEXT,
-                nome TEXT,
-                campus TEXT,
-                cargo TEXT,
                 slug TEXT,
-                url_final TEXT,
-                UNIQUE(slug, sigla)
+                ultima_coleta TEXT,
+                hash_corpo TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                duracao REAL,
+                tamanho INTEGER,
+                PRIMARY KEY (sigla, slug)
+            )
+            """)
+            # bancos criados antes do histórico de duração/tamanho
+            colunas_meta = {row[1] for row in cur.execute("PRAGMA table_info(coleta_meta)")}
+            for coluna, tipo in (("duracao", "REAL"), ("tamanho", "INTEGER")):
+                if coluna not in colunas_meta:
+                    cur.execute(f"ALTER TABLE coleta_meta ADD COLUMN {coluna} {tipo}")
+
+            # checkpoint de coletas, para retomar execuções interrompidas
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS coleta_execucao (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inicio TEXT,
+                fim TEXT,
+                siglas TEXT,
+                status TEXT
+            )
+            """)
+
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS coleta_estado_instituicao (
+                run_id INTEGER,
+                sigla TEXT,
+                offset_listagem INTEGER DEFAULT 0,
+                listagem_concluida INTEGER DEFAULT 0,
+                status TEXT,
+                PRIMARY KEY (run_id, sigla)
             )
             """)
 
             cur.execute("""
-            CREATE TABLE IF NOT EXISTS tccs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                slug_professor TEXT,
-                nome_professor TEXT,
+            CREATE TABLE IF NOT EXISTS coleta_estado_slug (
+                run_id INTEGER,
                 sigla TEXT,
-                instituicao TEXT,
-                UF TEXT,
-                campus TEXT,
-                ano TEXT,
-                curso TEXT,
-                autores TEXT,
-                titulo TEXT,
-                resumo TEXT,
-                palavras_chaves TEXT,
-                UNIQUE(slug_professor, titulo)
+                slug TEXT,
+                status TEXT CHECK (status IN ('pendente', 'concluido', 'falhou')),
+                PRIMARY KEY (run_id, sigla, slug)
             )
             """)
 
-            # índices para acelerar consultas e joins
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_professores_slug ON professores(slug)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_professores_sigla ON professores(sigla)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_tccs_slugprof ON tccs(slug_professor)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_tccs_sigla ON tccs(sigla)")
+            # resumo por instituição mantido por triggers: a tabela de status não varre professores/tccs
+            resumo_existia = cur.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resumo_coleta'"
+            ).fetchone()
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS resumo_coleta (
+                sigla TEXT PRIMARY KEY,
+                professores INTEGER NOT NULL DEFAULT 0,
+                tccs INTEGER NOT NULL DEFAULT 0,
+                falhas INTEGER NOT NULL DEFAULT 0,
+                ultima_coleta TEXT,
+                falhas_run_id INTEGER
+            )
+            """)
+            # resumos anteriores somavam as falhas de todas as execuções
+            falhas_por_execucao = "falhas_run_id" in {row[1] for row in cur.execute("PRAGMA table_info(resumo_coleta)")}
+            if not falhas_por_execucao:
+                cur.execute("ALTER TABLE resumo_coleta ADD COLUMN falhas_run_id INTEGER")
+                for gatilho in ("trg_resumo_falha_ins", "trg_resumo_falha_upd"):
+                    cur.execute(f"DROP TRIGGER IF EXISTS {gatilho}")
+            for sql in SQL_TRIGGERS_RESUMO:
+                cur.execute(sql)
+            if not resumo_existia or layout_v1 or not falhas_por_execucao:
+                # banco anterior ao resumo (ou recém-migrado): uma única varredura para preenchê-lo
+                cur.execute(SQL_PREENCHER_RESUMO)
+
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSAO}")
             conn.commit()
 
+        if layout_v1:
+            # devolve ao sistema o espaço das tabelas antigas
+            with self._get_connection() as conn:
+                conn.execute("VACUUM")
+
     def save_professores(self, sigla, professores):
         """Salva uma lista de professores no banco de dados."""
         with self._get_connection() as conn:
             cur = conn.cursor()
-            prof_data = [
-                (sigla, p["nome"], p["campus"], p["cargo"], p["slug"], p["url_final"])
-                for p in professores
-            ]
-            cur.executemany("""
-            INSERT OR IGNORE INTO professores (sigla, nome, campus, cargo, slug, url_final)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """, prof_data)
+            for sql, linhas in comandos_professores(sigla, professores):
+                cur.executemany(sql, linhas)
             conn.commit()
 
     def save_tccs(self, tccs_data):
-        """Salva uma lista de TCCs no banco de dados."""
+        """Salva uma lista de TCCs (tuplas de extrair_tccs) no banco de dados."""
         with self._get_connection() as conn:
             cur = conn.cursor()
-            cur.executemany("""
-            INSERT OR IGNORE INTO tccs (
-                slug_professor, nome_professor, sigla, instituicao, UF, campus, ano, curso,
-                autores, titulo, resumo, palavras_chaves
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, tccs_data)
+            for sql, linhas in comandos_tccs(tccs_data):
+                cur.executemany(sql, linhas)
             conn.commit()
             
-    def get_status_summary(self):
-        """Busca um resumo de professores e TCCs por instituição."""
+    def save_meta_coleta(self, meta_data):
+        """Salva (upsert) os metadados de coleta de uma lista de slugs."""
         with self._get_connection() as conn:
-            cur = conn.cursor()
+            conn.executemany(SQL_UPSERT_META_COLETA, meta_data)
+            conn.commit()
+
+    def carregar_meta_coleta(self, sigla):
+        """
+        Retorna {slug: {"hash", "etag", "last_modified", "duracao", "tamanho"}}
+        da última coleta da instituição.
+        """
+        with self._get_connection() as conn:
+            cur = conn.execute(
+                "SELECT slug, hash_corpo, etag, last_modified, duracao, tamanho FROM coleta_meta WHERE sigla = ?",
+                (sigla,),
+            )
+            return {
+                slug: {"hash": hash_corpo, "etag": etag, "last_modified": last_modified,
+                       "duracao": duracao, "tamanho": tamanho}
+                for slug, hash_corpo, etag, last_modified, duracao, tamanho in cur.fetchall()
+            }
 
-            cur.execute("SELECT sigla, COUNT(DISTINCT slug) FROM professores GROUP BY sigla")
-            prof_map = dict(cur.fetchall())
+    def save_estado_instituicao(self, estado_data):
+        """Salva (upsert) o checkpoint de listagem de instituições."""
+        with self._get_connection() as conn:
+            conn.executemany(SQL_UPSERT_ESTADO_INSTITUICAO, estado_data)
+            conn.commit()
 
-            cur.execute("SELECT sigla, COUNT(*) FROM tccs GROUP BY sigla")
-            tcc_map = dict(cur.fetchall())
+    def save_estado_slugs(self, estado_data):
+        """Salva (upsert) o status de coleta de uma lista de slugs."""
+        with self._get_connection() as conn:
+            conn.executemany(SQL_UPSERT_ESTADO_SLUG, estado_data)
+            conn.commit()
+
+    def iniciar_execucao(self, siglas):
+        """Registra uma nova execução de coleta e retorna seu run_id."""
+        with self._get_connection() as conn:
+            cur = conn.execute(
+                "INSERT INTO coleta_execucao (inicio, siglas, status) VALUES (?, ?, 'em_andamento')",
+                (datetime.now().isoformat(timespec="seconds"), json.dumps(list(siglas))),
+            )
+            conn.commit()
+            return cur.lastrowid
+
+    def finalizar_execucao(self, run_id):
+        """Marca a execução como concluída."""
+        with self._get_connection() as conn:
+            conn.execute(
+                "UPDATE coleta_execucao SET fim = ?, status = 'concluida' WHERE run_id = ?",
+                (datetime.now().isoformat(timespec="seconds"), run_id),
+            )
+            conn.commit()
+
+    def ultima_execucao_pendente(self):
+        """Retorna (run_id, siglas) da última execução não concluída, ou None."""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT run_id, siglas FROM coleta_execucao WHERE status != 'concluida' "
+                "ORDER BY run_id DESC LIMIT 1"
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def instituicoes_concluidas(self, run_id):
+        """Retorna o conjunto de siglas já concluídas na execução."""
+        with self._get_connection() as conn:
+            cur = conn.execute(
+                "SELECT sigla FROM coleta_estado_instituicao WHERE run_id = ? AND status = 'concluida'", (run_id,)
+            )
+            return {sigla for (sigla,) in cur.fetchall()}
+
+    def carregar_estado_instituicao(self, run_id, sigla):
+        """
+        Lê o checkpoint de uma instituição na execução `run_id`.
+
+        Retorna um dicionário com offset_listagem, listagem_concluida, status,
+        o conjunto de slugs concluídos e a lista de professores ainda
+        pendentes ou com falha (montada a partir da tabela professores).
+        """
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT offset_listagem, listagem_concluida, status FROM coleta_estado_instituicao "
+                "WHERE run_id = ? AND sigla = ?", (run_id, sigla)
+            ).fetchone()
+            offset, listagem_concluida, status = row or (0, 0, None)
+
+            concluidos = {
+                slug for (slug,) in conn.execute(
+                    "SELECT slug FROM coleta_estado_slug WHERE run_id = ? AND sigla = ? AND status = 'concluido'",
+                    (run_id, sigla),
+                )
+            }
+            pendentes = [
+                {"nome": nome, "campus": campus, "cargo": cargo, "slug": slug, "url_final": url_final}
+                for nome, campus, cargo, slug, url_final in conn.execute("""
+                    SELECT p.nome, p.campus, p.cargo, p.slug, p.url_final
+                    FROM coleta_estado_slug e
+                    JOIN professores p ON p.slug = e.slug AND p.sigla = e.sigla
+                    WHERE e.run_id = ? AND e.sigla = ? AND e.status != 'concluido'
+                """, (run_id, sigla))
+            ]
+
+        return {
+            "offset_listagem": offset,
+            "listagem_concluida": bool(listagem_concluida),
+            "status": status,
+            "concluidos": concluidos,
+            "pendentes": pendentes,
+        }
+
+    def get_status_summary(self):
+        """
+        Busca um resumo de professores, TCCs, falhas e última coleta por
+        instituição, lido da tabela resumo_coleta (uma linha por sigla).
+        """
+        with self._get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT sigla, professores, tccs, falhas, ultima_coleta FROM resumo_coleta "
+                "WHERE professores > 0 ORDER BY sigla"
+            )
 
             total_professores = 0
             total_tccs = 0
+            total_falhas = 0
 
             totalizador_uf = {}
 
             # Insere dados por instituição
-            for sigla, total_prof in prof_map.items():
-                total_tcc = tcc_map.get(sigla, 0)
+            for sigla, total_prof, total_tcc, falhas, ultima_coleta in cur.fetchall():
                 totalizador_uf[sigla] = {
                     "professores": total_prof,
-                    "tccs": total_tcc
+                    "tccs": total_tcc,
+                    "falhas": falhas,
+                    "ultima_coleta": ultima_coleta,
                 }
                 total_professores += total_prof
                 total_tccs += total_tcc
+                total_falhas += falhas
 
             return {
                 "totalizador_uf": totalizador_uf,
                 "total_professores": total_professores,
-                "total_tccs": total_tccs
+                "total_tccs": total_tccs,
+                "total_falhas": total_falhas,
             }
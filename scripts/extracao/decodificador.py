@@ -0,0 +1,56 @@
+# C:\...\extracao\decodificador.py
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import config
+from extracao_tcc import extrair_tccs_do_corpo
+
+class DecodificadorDetalhes:
+    """
+    Extrai os TCCs dos corpos de detalhe fora do event loop, em um pool de
+    processos, para que portfólios grandes não travem as requisições em
+    andamento. Corpos menores que `limite_inline` bytes são extraídos no
+    próprio loop: para eles, o custo de enviar o corpo ao pool supera o da
+    extração. Com `processos=0`, tudo é extraído no loop.
+    """
+
+    def __init__(self, processos=config.PARSE_PROCESSOS, limite_inline=config.PARSE_LIMITE_INLINE):
+        # Padrão: um núcleo fica livre para o event loop
+        self.processos = max(1, (os.cpu_count() or 2) - 1) if processos is None else processos
+        self.limite_inline = limite_inline
+        self._pool = None
+        self.no_pool = 0
+        self.no_loop = 0
+
+    async def extrair(self, slug, prof, corpo, uf):
+        """Linhas da tabela tccs extraídas de `corpo` (bytes)."""
+        if not self.processos or len(corpo) < self.limite_inline:
+            self.no_loop += 1
+            return extrair_tccs_do_corpo(slug, prof, corpo, uf)
+        if self._pool is None:
+            # Criado sob demanda: coletas só com corpos pequenos não sobem processos
+            self._pool = ProcessPoolExecutor(max_workers=self.processos)
+        self.no_pool += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self._pool, extrair_tccs_do_corpo, slug, prof, corpo, uf
+        )
+
+    async def fechar(self):
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.shutdown)
+            self._pool = None
+
+@asynccontextmanager
+async def usar_decodificador(decodificador=None):
+    """Reaproveita `decodificador` se informado; senão abre um DecodificadorDetalhes próprio."""
+    if decodificador is not None:
+        yield decodificador
+        return
+    novo = DecodificadorDetalhes()
+    try:
+        yield novo
+    finally:
+        await novo.fechar()
@@ -0,0 +1,89 @@
+# C:\...\extracao\extracao_tcc.py
+
+import io
+import json
+
+from database import clean_value
+from monitoramento import log_evento
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# O aviso de que falta o ijson sai uma vez por processo, não a cada detalhe
+_avisou_sem_ijson = False
+
+def parse_professores(batch, base_url):
+    """Converte um lote da API de listagem em dicionários de professores."""
+    professores = []
+    for p in batch:
+        if slug := p.get("slug"):
+            professores.append({
+                "nome": p.get("nome"),
+                "campus": p.get("campusNome"),
+                "cargo": p.get("cargo"),
+                "slug": slug,
+                "url_final": f"{base_url}/portfolio/pessoas/{slug}",
+            })
+    return professores
+
+NATUREZA_TCC = "TRABALHO_DE_CONCLUSAO_DE_CURSO_GRADUACAO"
+# Caminho (no formato do ijson) de cada orientação dentro do portfólio
+PREFIXO_ORIENTACOES = "outraProducao.orientacoesConcluidas.item.outrasOrientacoesConcluidas.item"
+
+def _linhas_tcc(slug, prof, uf, trabalhos):
+    """Converte as orientações de TCC em linhas da tabela tccs, ignorando as de outra natureza."""
+    tccs = []
+    nome_professor = clean_value(prof.get("nome"))
+    for trabalho in trabalhos:
+        dados_basicos = trabalho.get("dadosBasicosDeOutrasOrientacoesConcluidas", {})
+        if dados_basicos.get("natureza") != NATUREZA_TCC:
+            continue
+
+        detalhamento = trabalho.get("detalhamentoDeOutrasOrientacoesConcluidas", {})
+        autores = clean_value(detalhamento.get("nomeDoOrientado"))
+        if nome_professor:
+            autores = (autores + ", " if autores else "") + f"{nome_professor} (Orientador/a)"
+
+        palavras = trabalho.get("palavrasChave") or {}
+        info_add = trabalho.get("informacoesAdicionais") or {}
+
+        tccs.append((
+            slug, nome_professor, prof.get("sigla"),
+            clean_value(detalhamento.get("nomeDaInstituicao")), uf, clean_value(prof.get("campus")),
+            clean_value(dados_basicos.get("ano")), clean_value(detalhamento.get("nomeDoCurso")),
+            autores, clean_value(dados_basicos.get("titulo")),
+            clean_value(info_add.get("descricaoInformacoesAdicionais")),
+            clean_value(palavras.get("palavrasChaves"))
+        ))
+    return tccs
+
+def extrair_tccs(slug, prof, data, uf):
+    """Extrai as linhas de TCC (formato da tabela tccs) do detalhe de um professor."""
+    outra_producao = data.get("outraProducao", {})
+    if not (isinstance(outra_producao, dict) and "orientacoesConcluidas" in outra_producao):
+        return []
+    trabalhos = (
+        trabalho
+        for item in outra_producao.get("orientacoesConcluidas", [])
+        for trabalho in item.get("outrasOrientacoesConcluidas", [])
+    )
+    return _linhas_tcc(slug, prof, uf, trabalhos)
+
+def extrair_tccs_do_corpo(slug, prof, corpo, uf):
+    """
+    Extrai os TCCs direto do corpo bruto (bytes) de um detalhe.
+
+    Com o ijson instalado, o corpo é lido em fluxo e só as orientações
+    concluídas viram objetos Python; o resto do portfólio (todas as outras
+    produções) é descartado durante a leitura. Sem ele, decodifica o
+    corpo inteiro com json.
+    """
+    global _avisou_sem_ijson
+    if ijson is None:
+        if not _avisou_sem_ijson:
+            _avisou_sem_ijson = True
+            log_evento("sem_ijson", aviso="ijson não instalado; detalhes decodificados por inteiro com json")
+        return extrair_tccs(slug, prof, json.loads(corpo), uf)
+    return _linhas_tcc(slug, prof, uf, ijson.items(io.BytesIO(corpo), PREFIXO_ORIENTACOES, use_float=True))
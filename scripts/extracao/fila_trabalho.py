@@ -0,0 +1,147 @@
+# C:\...\extracao\fila_trabalho.py
+
+import json
+import sqlite3
+import time
+
+import config
+
+class FilaTrabalho:
+    """
+    Fila de unidades de trabalho da coleta distribuída, guardada em SQLite.
+
+    Uma unidade é a listagem de uma instituição ou um lote de professores
+    cujos detalhes devem ser buscados. Workers (processos, possivelmente em
+    máquinas diferentes que enxergam o mesmo arquivo) reivindicam unidades
+    com um lease: se o worker morrer, o lease expira e a unidade volta a
+    ser entregue a outro. A reivindicação é atômica (BEGIN IMMEDIATE).
+
+    Em várias máquinas, o arquivo precisa estar num sistema de arquivos com
+    travas POSIX funcionais; o modo WAL exige memória compartilhada, por
+    isso a fila usa o journal padrão (DELETE).
+    """
+
+    def __init__(self, db_name=config.FILA_DB):
+        self.db_name = db_name
+
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_name, timeout=60, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=60000")
+        return conn
+
+    def init_db(self):
+        """Cria a tabela da fila se não existir."""
+        with self._get_connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS fila_unidades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id INTEGER NOT NULL,
+                sigla TEXT NOT NULL,
+                tipo TEXT NOT NULL CHECK (tipo IN ('listagem', 'detalhe')),
+                chave TEXT NOT NULL,
+                carga TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pendente'
+                    CHECK (status IN ('pendente', 'em_andamento', 'concluida', 'falhou')),
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                dono TEXT,
+                lease_ate REAL,
+                erro TEXT,
+                UNIQUE(run_id, sigla, tipo, chave)
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fila_status ON fila_unidades (run_id, status, lease_ate)")
+
+    def enfileirar(self, run_id, unidades):
+        """
+        Insere unidades (sigla, tipo, chave, carga) na execução `run_id`;
+        unidades já existentes são ignoradas, então reenfileirar é seguro.
+        """
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO fila_unidades (run_id, sigla, tipo, chave, carga) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, sigla, tipo, chave, json.dumps(carga, ensure_ascii=False))
+                 for sigla, tipo, chave, carga in unidades],
+            )
+            conn.execute("COMMIT")
+
+    def reivindicar(self, run_id, dono, limite, lease=config.FILA_LEASE):
+        """
+        Entrega até `limite` unidades pendentes ou com lease vencido ao
+        `dono`, por `lease` segundos. Listagens saem antes dos detalhes.
+        Retorna uma lista de dicionários (id, sigla, tipo, chave, carga).
+        """
+        agora = time.time()
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            linhas = conn.execute("""
+                SELECT id, sigla, tipo, chave, carga FROM fila_unidades
+                WHERE run_id = ? AND (status = 'pendente' OR (status = 'em_andamento' AND lease_ate < ?))
+                ORDER BY tipo = 'detalhe', id
+                LIMIT ?
+            """, (run_id, agora, limite)).fetchall()
+            conn.executemany(
+                "UPDATE fila_unidades SET status = 'em_andamento', dono = ?, lease_ate = ?, "
+                "tentativas = tentativas + 1 WHERE id = ?",
+                [(dono, agora + lease, id_) for id_, *_ in linhas],
+            )
+            conn.execute("COMMIT")
+        return [
+            {"id": id_, "sigla": sigla, "tipo": tipo, "chave": chave, "carga": json.loads(carga)}
+            for id_, sigla, tipo, chave, carga in linhas
+        ]
+
+    def renovar(self, dono, ids, lease=config.FILA_LEASE):
+        """Estende o lease das unidades que o `dono` ainda está processando."""
+        if not ids:
+            return
+        with self._get_connection() as conn:
+            conn.executemany(
+                "UPDATE fila_unidades SET lease_ate = ? WHERE id = ? AND dono = ? AND status = 'em_andamento'",
+                [(time.time() + lease, id_, dono) for id_ in ids],
+            )
+
+    def concluir(self, dono, id_):
+        with self._get_connection() as conn:
+            conn.execute(
+                "UPDATE fila_unidades SET status = 'concluida', lease_ate = NULL, erro = NULL "
+                "WHERE id = ? AND dono = ?", (id_, dono)
+            )
+
+    def reabrir(self, dono, id_, erro, carga=None, max_tentativas=config.FILA_MAX_TENTATIVAS):
+        """
+        Devolve a unidade à fila (com uma `carga` reduzida, se informada) ou
+        a marca como falha quando já esgotou `max_tentativas`.
+        """
+        with self._get_connection() as conn:
+            conn.execute("""
+                UPDATE fila_unidades
+                SET status = CASE WHEN tentativas >= ? THEN 'falhou' ELSE 'pendente' END,
+                    carga = COALESCE(?, carga), erro = ?, lease_ate = NULL
+                WHERE id = ? AND dono = ?
+            """, (max_tentativas, json.dumps(carga, ensure_ascii=False) if carga is not None else None, erro,
+                  id_, dono))
+
+    def resumo(self, run_id):
+        """Contagem de unidades por tipo e status na execução."""
+        with self._get_connection() as conn:
+            cur = conn.execute(
+                "SELECT tipo, status, COUNT(*) FROM fila_unidades WHERE run_id = ? GROUP BY tipo, status", (run_id,)
+            )
+            resumo = {}
+            for tipo, status, total in cur.fetchall():
+                resumo.setdefault(tipo, {})[status] = total
+            return resumo
+
+    def restantes(self, run_id):
+        """Unidades ainda pendentes ou em andamento (0 = fila drenada)."""
+        with self._get_connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM fila_unidades WHERE run_id = ? AND status IN ('pendente', 'em_andamento')",
+                (run_id,)
+            ).fetchone()[0]
+
+    def ultima_execucao(self):
+        """run_id mais recente com unidades na fila, ou None."""
+        with self._get_connection() as conn:
+            return conn.execute("SELECT MAX(run_id) FROM fila_unidades").fetchone()[0]
@@ -0,0 +1,165 @@
+# C:\...\extracao\gravador.py
+
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import config
+from monitoramento import log_evento
+from database import (
+    SQL_UPSERT_ESTADO_INSTITUICAO, SQL_UPSERT_ESTADO_SLUG, SQL_UPSERT_META_COLETA, comandos_professores,
+    comandos_tccs,
+)
+
+_FIM = object()
+
+class GravadorSQLite:
+    """
+    Gravador dedicado do scraper: uma única conexão SQLite (no `journal_mode`
+    do banco, WAL por padrão) em uma thread própria, alimentada por uma
+    fila limitada.
+
+    As escritas são agrupadas e gravadas numa só transação quando o lote
+    atinge `tamanho_lote` linhas ou após `intervalo` segundos. Quando a fila
+    enche, os métodos assíncronos aguardam, propagando a contrapressão aos
+    fetchers sem bloquear o event loop.
+    """
+
+    def __init__(self, db_name=config.DB_NAME, tamanho_lote=config.WRITER_BATCH_SIZE,
+                 intervalo=config.WRITER_FLUSH_INTERVAL, max_fila=config.WRITER_QUEUE_SIZE,
+                 journal_mode=config.DB_JOURNAL_MODE):
+        self.db_name = db_name
+        self.journal_mode = journal_mode
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._thread = threading.Thread(target=self._run, name="gravador-sqlite", daemon=True)
+        self.erro = None
+        self.linhas_gravadas = 0
+        self.transacoes = 0
+        self.tempo_escrita = 0.0
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    # --- API usada pelo event loop ---
+
+    async def salvar_professores(self, sigla, professores):
+        # A fila preserva a ordem: dicionários chegam antes das linhas que os referenciam
+        for comando in comandos_professores(sigla, professores):
+            await self._enfileirar(comando)
+
+    async def salvar_tccs(self, tccs_data):
+        for comando in comandos_tccs(tccs_data):
+            await self._enfileirar(comando)
+
+    async def salvar_meta_coleta(self, meta_data):
+        await self._enfileirar((SQL_UPSERT_META_COLETA, meta_data))
+
+    async def salvar_estado_instituicao(self, estado_data):
+        await self._enfileirar((SQL_UPSERT_ESTADO_INSTITUICAO, estado_data))
+
+    async def salvar_estado_slugs(self, estado_data):
+        await self._enfileirar((SQL_UPSERT_ESTADO_SLUG, estado_data))
+
+    async def fechar(self):
+        """Grava o que falta, encerra a thread e relança um eventual erro."""
+        await asyncio.to_thread(self._fila.put, _FIM)
+        await asyncio.to_thread(self._thread.join)
+        self._verificar_erro()
+
+    async def _enfileirar(self, item):
+        self._verificar_erro()
+        try:
+            self._fila.put_nowait(item)
+        except queue.Full:
+            # Fila cheia: espera fora do loop até o gravador liberar espaço
+            await asyncio.to_thread(self._fila.put, item)
+
+    def _verificar_erro(self):
+        if self.erro is not None:
+            raise RuntimeError(f"Gravador SQLite falhou: {self.erro}") from self.erro
+
+    # --- Thread do gravador ---
+
+    def _run(self):
+        # Timeout longo: na coleta distribuída, vários processos disputam a escrita
+        conn = sqlite3.connect(self.db_name, timeout=60)
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        if self.journal_mode.upper() == "WAL":
+            # Seguro em WAL; no journal de rollback, NORMAL arriscaria o banco numa queda de energia
+            conn.execute("PRAGMA synchronous=NORMAL")
+        pendentes = []
+        linhas_pendentes = 0
+        ultimo_flush = time.monotonic()
+        recebeu_fim = False
+        try:
+            while True:
+                espera = max(0.0, self.intervalo - (time.monotonic() - ultimo_flush))
+                try:
+                    item = self._fila.get(timeout=espera if pendentes else None)
+                except queue.Empty:
+                    item = None
+
+                if item is _FIM:
+                    recebeu_fim = True
+                    break
+                if item is not None:
+                    pendentes.append(item)
+                    linhas_pendentes += len(item[1])
+
+                vencido = time.monotonic() - ultimo_flush >= self.intervalo
+                if pendentes and (linhas_pendentes >= self.tamanho_lote or vencido):
+                    self._flush(conn, pendentes)
+                    pendentes, linhas_pendentes = [], 0
+                    ultimo_flush = time.monotonic()
+                elif not pendentes:
+                    ultimo_flush = time.monotonic()
+
+            if pendentes:
+                self._flush(conn, pendentes)
+        except Exception as e:
+            self.erro = e
+            # Continua drenando para não travar produtores bloqueados na fila
+            while not recebeu_fim:
+                recebeu_fim = self._fila.get() is _FIM
+        finally:
+            conn.close()
+
+    def _flush(self, conn, pendentes):
+        """Grava todos os itens pendentes em uma única transação."""
+        inicio = time.perf_counter()
+        with conn:
+            for sql, linhas in pendentes:
+                conn.executemany(sql, linhas)
+        self.tempo_escrita += time.perf_counter() - inicio
+        self.linhas_gravadas += sum(len(linhas) for _, linhas in pendentes)
+        self.transacoes += 1
+
+async def salvar(db_manager, gravador, tipo, *args):
+    """
+    Envia dados ao gravador em lote (gravador.salvar_<tipo>), ou grava direto
+    pelo db_manager (db_manager.save_<tipo>) se não houver gravador.
+    """
+    if gravador is not None:
+        await getattr(gravador, f"salvar_{tipo}")(*args)
+    else:
+        getattr(db_manager, f"save_{tipo}")(*args)
+
+@asynccontextmanager
+async def usar_gravador(db_manager, gravador=None):
+    """Reaproveita `gravador` se informado; senão abre um para o banco do db_manager."""
+    if gravador is not None:
+        yield gravador
+        return
+    novo = GravadorSQLite(db_manager.db_name, journal_mode=db_manager.journal_mode).iniciar()
+    try:
+        yield novo
+    finally:
+        await novo.fechar()
+        log_evento("gravador", linhas=novo.linhas_gravadas, transacoes=novo.transacoes,
+                   escrita=f"{novo.tempo_escrita:.2f}s")
@@ -7,26 +7,29 @@ from tkinter import ttk, messagebox
 from tkinter import font
 import threading
 import asyncio
+import argparse
 
 # Importa dos outros módulos na mesma pasta
-from config import INSTITUICOES
+from config import INSTITUICOES, REFRESH
 from database import DatabaseManager
-from scraper import run_for_institution
+from agendador import executar_coleta
 
 class ScraperApp(tk.Tk):
     """Classe principal da aplicação com a interface gráfica."""
 
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, resume=False):
         super().__init__()
         self.db_manager = db_manager
         
         self.title("Integra Scraper")
-        self.geometry("800x600")
+        self.geometry("800x680")
         self.resizable(False, False)
         self._center_window()
         
         self.create_widgets()
         self.after(100, self.atualizar_tabela_status)
+        if resume:
+            self.after(200, self.start_scraping_thread, True)
 
     def _center_window(self):
         """Centraliza a janela na tela."""
@@ -48,23 +51,34 @@ class ScraperApp(tk.Tk):
         self.combo.pack(pady=(0, 10))
         self.combo.current(0)
 
+        self.refresh_var = tk.BooleanVar(value=REFRESH)
+        ttk.Checkbutton(frame, text="Somente portfólios alterados (recoleta incremental)", variable=self.refresh_var).pack()
+
         self.btn = tk.Button(frame, text="Iniciar Coleta", bg="#1567BE", fg="white",disabledforeground="white", font=("Arial", 12, "bold"), width=20, height=1, command=self.start_scraping_thread)
         self.btn.pack(pady=(15, 0))
 
+        self.btn_resume = tk.Button(frame, text="Retomar Última Coleta", font=("Arial", 10), width=20, command=lambda: self.start_scraping_thread(True))
+        self.btn_resume.pack(pady=(5, 0))
+
         # --- Barras de Progresso ---
         self._create_progress_bar(frame, "Busca dos professores", "progress_prof", "progress_label_prof_var")
         self._create_progress_bar(frame, "Busca dos detalhes de TCCs", "progress_det", "progress_label_det_var")
+        self._create_progress_bar(frame, "Instituições concluídas", "progress_inst", "progress_label_inst_var")
 
         # --- Tabela de Status ---
         ttk.Label(frame, text="Status Geral", font=("Arial", 12, "bold")).pack(pady=(20, 5))
-        colunas = ("sigla", "professores", "tccs")
+        colunas = ("sigla", "professores", "tccs", "falhas", "ultima_coleta")
         self.tabela_status = ttk.Treeview(frame, columns=colunas, show="headings", height=8)
         self.tabela_status.heading("sigla", text="Instituição")
         self.tabela_status.heading("professores", text="Total Professores")
         self.tabela_status.heading("tccs", text="Total TCCs")
+        self.tabela_status.heading("falhas", text="Falhas")
+        self.tabela_status.heading("ultima_coleta", text="Última Coleta")
         self.tabela_status.column("sigla", width=100, anchor="center")
-        self.tabela_status.column("professores", width=150, anchor="center")
-        self.tabela_status.column("tccs", width=150, anchor="center")
+        self.tabela_status.column("professores", width=120, anchor="center")
+        self.tabela_status.column("tccs", width=100, anchor="center")
+        self.tabela_status.column("falhas", width=70, anchor="center")
+        self.tabela_status.column("ultima_coleta", width=150, anchor="center")
         self.tabela_status.pack(pady=(5, 0), fill="x")
 
     def _create_progress_bar(self, parent, label_text, progress_attr, label_var_attr):
@@ -85,8 +99,13 @@ class ScraperApp(tk.Tk):
         self.progress_det["maximum"] = total
         self.progress_det["value"] = current
         self.progress_label_det_var.set(f"{current} / {total}")
+
+    def _update_progress_inst(self, current, total):
+        self.progress_inst["maximum"] = total
+        self.progress_inst["value"] = current
+        self.progress_label_inst_var.set(f"{current} / {total}")
         
-    def start_scraping_thread(self):
+    def start_scraping_thread(self, resume=False):
         """Inicia a coleta em uma nova thread para não bloquear a UI."""
         sigla = self.combo.get()
         if not sigla:
@@ -94,40 +113,50 @@ class ScraperApp(tk.Tk):
             return
 
         self.btn.config(state="disabled", text="Coletando...")
+        self.btn_resume.config(state="disabled")
         
         # Passa os métodos de atualização da UI como callbacks
         callbacks = {
             'prof_progress': lambda c, t: self.after(0, self._update_progress_prof, c, t),
             'det_progress': lambda c, t: self.after(0, self._update_progress_det, c, t),
+            'inst_progress': lambda c, t: self.after(0, self._update_progress_inst, c, t),
+            'inst_done': lambda s: self.after(0, self.atualizar_tabela_status),
         }
 
-        thread = threading.Thread(target=self.run_asyncio_loop, args=(sigla, callbacks), daemon=True)
+        opcoes = {'refresh': self.refresh_var.get(), 'resume': resume}
+
+        thread = threading.Thread(target=self.run_asyncio_loop, args=(sigla, callbacks, opcoes), daemon=True)
         thread.start()
 
-    def run_asyncio_loop(self, sigla, callbacks):
+    def run_asyncio_loop(self, sigla, callbacks, opcoes):
         """Executa o loop de eventos asyncio para o scraper."""
+        falhas = {}
         try:
-            asyncio.run(self._runner(sigla, callbacks))
+            falhas = asyncio.run(self._runner(sigla, callbacks, opcoes))
         except Exception as e:
             self.after(0, lambda: messagebox.showerror("Erro Inesperado", str(e)))
         finally:
-            self.after(0, self.scraping_finished, sigla)
+            self.after(0, self.scraping_finished, sigla, falhas)
 
-    async def _runner(self, sigla, callbacks):
+    async def _runner(self, sigla, callbacks, opcoes):
         """Corrotina principal que chama a lógica de scraping."""
-        if sigla == "TODAS":
-            for s, (_, url, uf) in INSTITUICOES.items():
-                await run_for_institution(s, url, uf, self.db_manager, callbacks)
-                self.after(0, self.atualizar_tabela_status)
-        else:
-            _, url, uf = INSTITUICOES[sigla]
-            await run_for_institution(sigla, url, uf, self.db_manager, callbacks)
+        # Instituições em paralelo; as barras mostram o progresso agregado.
+        # Ao retomar, as instituições vêm da execução interrompida.
+        siglas = list(INSTITUICOES) if sigla == "TODAS" else [sigla]
+        # {sigla: erro} das instituições que falharam (as demais seguem até o fim)
+        return await executar_coleta(INSTITUICOES, siglas, self.db_manager, callbacks, **opcoes)
         
-    def scraping_finished(self, sigla):
+    def scraping_finished(self, sigla, falhas=None):
         """Chamado quando a coleta termina para reativar o botão e mostrar mensagem."""
         self.btn.config(state="normal", text="Iniciar Coleta")
+        self.btn_resume.config(state="normal")
         self.atualizar_tabela_status()
-        messagebox.showinfo("Concluído", f"Coleta finalizada para {sigla}!")
+        if falhas:
+            detalhes = "\n".join(f"- {s}: {erro}" for s, erro in falhas.items())
+            messagebox.showwarning("Concluído com falhas",
+                                   f"Coleta finalizada para {sigla}, mas {len(falhas)} instituição(ões) falharam:\n\n{detalhes}")
+        else:
+            messagebox.showinfo("Concluído", f"Coleta finalizada para {sigla}!")
 
     def atualizar_tabela_status(self):
         """Busca os dados do DB e atualiza a tabela na UI."""
@@ -135,12 +164,12 @@ class ScraperApp(tk.Tk):
             self.tabela_status.delete(i)
         
         dados = self.db_manager.get_status_summary()
-        print(dados)
         for sigla, valores in dados["totalizador_uf"].items():
             self.tabela_status.insert(
                 "",
                 "end",
-                values=(sigla, valores["professores"], valores["tccs"])
+                values=(sigla, valores["professores"], valores["tccs"], valores["falhas"],
+                        (valores["ultima_coleta"] or "-").replace("T", " "))
             )
 
         # insere linha totalizadora
@@ -148,13 +177,17 @@ class ScraperApp(tk.Tk):
         bold_font = font.Font(self, family=default_font.actual("family"),
                         size=default_font.actual("size"),
                         weight="bold")
-        self.tabela_status.insert("", "end", values=("TOTAL", dados["total_professores"], dados["total_tccs"]), tags=("bold",))
+        self.tabela_status.insert("", "end", values=("TOTAL", dados["total_professores"], dados["total_tccs"], dados["total_falhas"], ""), tags=("bold",))
         self.tabela_status.tag_configure("bold", font=bold_font)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Integra Scraper")
+    parser.add_argument("--resume", action="store_true", help="retoma a última coleta interrompida ao abrir")
+    args = parser.parse_args()
+
     # Ponto de entrada da aplicação
     db = DatabaseManager()
     db.init_db()  # Garante que o banco e as tabelas existam
     
-    app = ScraperApp(db)
+    app = ScraperApp(db, resume=args.resume)
     app.mainloop()
@@ -0,0 +1,63 @@
+# C:\...\extracao\monitoramento.py
+
+import json
+import time
+from datetime import datetime
+
+import config
+
+class LimitadorFrequencia:
+    """
+    Deixa passar no máximo um evento por `intervalo` segundos para cada
+    chave. Eventos marcados como finais sempre passam.
+    """
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._ultimo = {}
+        self.suprimidos = {}
+
+    def liberar(self, chave=None, final=False):
+        agora = time.monotonic()
+        ultimo = self._ultimo.get(chave)
+        if final or ultimo is None or agora - ultimo >= self.intervalo:
+            self._ultimo[chave] = agora
+            return True
+        self.suprimidos[chave] = self.suprimidos.get(chave, 0) + 1
+        return False
+
+    def zerar_suprimidos(self, chave=None):
+        """Quantos eventos da chave foram suprimidos desde a última liberação."""
+        return self.suprimidos.pop(chave, 0)
+
+def _escrever(evento, campos):
+    if config.LOG_FORMATO == "json":
+        linha = json.dumps({"ts": datetime.now().isoformat(timespec="milliseconds"), "evento": evento, **campos},
+                           ensure_ascii=False, default=str)
+    else:
+        texto = campos.pop("msg", None)
+        partes = [texto if texto is not None else evento] + [f"{k}={v}" for k, v in campos.items()]
+        linha = f"[{datetime.now().strftime('%H:%M:%S')}] " + " ".join(partes)
+    print(linha, flush=True)
+
+def log(msg, **campos):
+    """Mensagem livre com timestamp; em JSON vira o evento "mensagem"."""
+    _escrever("mensagem", {"msg": msg, **campos})
+
+def log_evento(evento, **campos):
+    """Evento estruturado: `evento` mais pares chave=valor (ou um objeto JSON por linha)."""
+    _escrever(evento, campos)
+
+_amostragem = LimitadorFrequencia(config.LOG_INTERVALO_AMOSTRA)
+
+def log_amostrado(evento, sigla=None, **campos):
+    """
+    Evento de alta frequência (um por professor, página ou falha): no máximo
+    um por config.LOG_INTERVALO_AMOSTRA segundos por (evento, sigla), com a
+    contagem dos suprimidos. O custo do log fica constante, seja qual for o
+    tamanho da coleta.
+    """
+    chave = (evento, sigla)
+    if _amostragem.liberar(chave):
+        suprimidos = _amostragem.zerar_suprimidos(chave)
+        log_evento(evento, sigla=sigla, **campos, **({"suprimidos": suprimidos} if suprimidos else {}))
@@ -0,0 +1,389 @@
+# C:\...\extracao\rede.py
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import config
+from controle_taxa import ControladorAIMD
+from monitoramento import log_evento
+
+try:
+    import brotli  # noqa: F401  (habilita "br" no aiohttp)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+class LimitadorConexoes:
+    """
+    Limita requisições simultâneas em dois níveis: um teto global para toda
+    a coleta e um controlador AIMD por host, que ajusta a concorrência de
+    cada servidor à latência e aos erros observados. Hosts podem declarar
+    "qps" e "max_concurrent" em lista_instituicoes.json.
+    """
+
+    def __init__(self, limite_global=config.GLOBAL_CONN_LIMIT, opcoes_hosts=None):
+        self._global = asyncio.Semaphore(limite_global)
+        self._opcoes_hosts = config.opcoes_por_host() if opcoes_hosts is None else opcoes_hosts
+        self.controladores = {}
+
+    def _controlador(self, host):
+        if host not in self.controladores:
+            opcoes = self._opcoes_hosts.get(host, {})
+            self.controladores[host] = ControladorAIMD(
+                maximo=opcoes.get("max_concurrent", config.AIMD_MAXIMO), qps=opcoes.get("qps")
+            )
+        return self.controladores[host]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Reserva uma vaga no host da URL e uma vaga global; informa o resultado ao AIMD."""
+        # Espera primeiro pelo host para não ocupar vaga global à toa
+        controlador = self._controlador(urlsplit(url).netloc)
+        await controlador.adquirir()
+        inicio = None
+        sobrecarga = False
+        ajustar = True
+        try:
+            async with self._global:
+                inicio = time.perf_counter()
+                yield
+        except asyncio.CancelledError:
+            # Requisição cancelada (ex.: perdeu um hedge) não diz nada sobre o host
+            ajustar = False
+            raise
+        except Exception as e:
+            sobrecarga = classificar_erro(e) == "transitorio"
+            raise
+        finally:
+            latencia = time.perf_counter() - inicio if inicio is not None else 0.0
+            await controlador.liberar(latencia, sobrecarga, ajustar)
+
+    def resumo_hosts(self):
+        """Limite atual e reduções de cada host, para log."""
+        return {
+            host: {"limite": round(c.limite, 1), "reducoes": c.reducoes}
+            for host, c in self.controladores.items()
+        }
+
+class RespostaBruta(NamedTuple):
+    """Corpo bruto de uma resposta e seus validadores de cache."""
+    status: int
+    corpo: bytes
+    etag: str | None
+    last_modified: str | None
+
+# Status HTTP que indicam sobrecarga ou falha temporária do servidor
+STATUS_TRANSITORIOS = {408, 425, 429, 500, 502, 503, 504}
+
+def classificar_erro(erro):
+    """
+    Classifica uma exceção de requisição como "transitorio" (vale tentar de
+    novo: timeout, conexão, 429, 5xx) ou "permanente" (4xx, JSON inválido).
+    """
+    if isinstance(erro, aiohttp.ClientResponseError):
+        return "transitorio" if erro.status in STATUS_TRANSITORIOS or erro.status >= 500 else "permanente"
+    if isinstance(erro, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return "transitorio"
+    return "permanente"
+
+class PoliticaRetry:
+    """
+    Repete requisições com erro transitório usando backoff exponencial com
+    jitter completo: espera aleatória entre 0 e min(teto, base * 2**tentativa).
+    Um Retry-After enviado pelo servidor (ex.: 429) tem precedência.
+    """
+
+    def __init__(self, tentativas=config.RETRY_TENTATIVAS, base=config.RETRY_BASE, teto=config.RETRY_TETO):
+        self.tentativas = tentativas
+        self.base = base
+        self.teto = teto
+        self.retentativas = 0
+
+    def espera(self, tentativa, erro=None):
+        retry_after = getattr(erro, "headers", None) and erro.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(self.teto, float(retry_after))
+        return random.uniform(0, min(self.teto, self.base * 2 ** tentativa))
+
+    async def executar(self, requisicao):
+        """Executa `requisicao()` (corrotina) até dar certo ou esgotar as tentativas."""
+        for tentativa in range(self.tentativas):
+            try:
+                return await requisicao()
+            except Exception as e:
+                if classificar_erro(e) != "transitorio" or tentativa == self.tentativas - 1:
+                    raise
+                self.retentativas += 1
+                await asyncio.sleep(self.espera(tentativa, e))
+
+class HistoricoLatencia:
+    """Janela das latências recentes de cada host, para percentis e hedge."""
+
+    def __init__(self, janela=config.HEDGE_JANELA):
+        self.janela = janela
+        self._por_host = {}
+
+    def registrar(self, host, latencia):
+        self._por_host.setdefault(host, deque(maxlen=self.janela)).append(latencia)
+
+    def percentil(self, host, p):
+        """Percentil `p` (0-1) das latências do host, ou None sem amostras suficientes."""
+        amostras = self._por_host.get(host)
+        if not amostras or len(amostras) < config.HEDGE_MIN_AMOSTRAS:
+            return None
+        ordenadas = sorted(amostras)
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+    def amostras(self, host):
+        """Latências guardadas do host, da mais antiga para a mais recente."""
+        return list(self._por_host.get(host, ()))
+
+class EstatisticasPool:
+    """Contadores do pool de conexões alimentados pelos trace hooks do aiohttp."""
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.conexoes_novas = 0
+        self.conexoes_reusadas = 0
+        self.aquisicoes_enfileiradas = 0
+        self.tempo_em_fila = 0.0
+        self._inicio_fila = {}
+
+    def trace_config(self):
+        """Cria o aiohttp.TraceConfig que atualiza estes contadores."""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requisicoes += 1
+
+        async def on_create_end(session, ctx, params):
+            self.conexoes_novas += 1
+
+        async def on_reuse(session, ctx, params):
+            self.conexoes_reusadas += 1
+
+        async def on_queued_start(session, ctx, params):
+            self.aquisicoes_enfileiradas += 1
+            self._inicio_fila[id(ctx)] = time.perf_counter()
+
+        async def on_queued_end(session, ctx, params):
+            inicio = self._inicio_fila.pop(id(ctx), None)
+            if inicio is not None:
+                self.tempo_em_fila += time.perf_counter() - inicio
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_create_end)
+        trace.on_connection_reuseconn.append(on_reuse)
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        return trace
+
+class ClienteIntegra:
+    """
+    Sessão HTTP única e de longa duração para toda a coleta.
+
+    Um só TCPConnector (keep-alive, cache de DNS, limites global e por host,
+    compressão negociada) é reaproveitado por todas as instituições, evitando
+    repetir handshakes TLS e resoluções DNS. Use como `async with`.
+    """
+
+    def __init__(self, limitador=None, retry=None, hedge=config.HEDGE):
+        self.limitador = limitador
+        self.retry = retry or PoliticaRetry()
+        self.hedge = hedge
+        self.latencias = HistoricoLatencia()
+        # Duração de cada GET condicional inteiro (espera por vaga e retentativas incluídas)
+        self.duracoes = HistoricoLatencia()
+        self.hedges_disparados = 0
+        self.hedges_vencedores = 0
+        self.stats = EstatisticasPool()
+        self.session = None
+        self._connector = None
+
+    async def __aenter__(self):
+        self._connector = aiohttp.TCPConnector(
+            limit=config.GLOBAL_CONN_LIMIT,
+            limit_per_host=config.PER_HOST_CONN_LIMIT,
+            ttl_dns_cache=config.DNS_CACHE_TTL,
+            keepalive_timeout=config.KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
+            ssl=False,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self._connector,
+            headers={**config.DEFAULT_HEADERS, "Accept-Encoding": ACCEPT_ENCODING},
+            timeout=aiohttp.ClientTimeout(total=config.REQUEST_TIMEOUT, sock_connect=config.CONNECT_TIMEOUT),
+            trace_configs=[self.stats.trace_config()],
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        log_pool(self)
+        await self.session.close()
+
+    async def get_json(self, url, params=None, timeout=None):
+        """
+        GET que respeita o limitador e retorna o corpo decodificado como JSON.
+        `timeout` (segundos) é o prazo de cada tentativa; padrão REQUEST_TIMEOUT.
+        """
+        async def requisicao():
+            async with slot(self.limitador, url):
+                async with self.session.get(url, params=params, timeout=_prazo(timeout)) as resp:
+                    resp.raise_for_status()
+                    return await resp.json()
+
+        # O backoff acontece fora do slot, sem segurar vagas de conexão
+        return await self.retry.executar(requisicao)
+
+    async def get_condicional(self, url, etag=None, last_modified=None, timeout=None, hedge=False):
+        """
+        GET condicional (If-None-Match / If-Modified-Since) que retorna uma
+        RespostaBruta. Status 304 indica que o recurso não mudou.
+
+        Com `hedge` (e o hedge do cliente ligado), se a resposta demorar mais
+        que o percentil HEDGE_PERCENTIL das latências do host, uma segunda
+        requisição idêntica é disparada e vale a que terminar primeiro.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        host = urlsplit(url).netloc
+
+        async def requisicao(iniciada=None):
+            async with slot(self.limitador, url):
+                if iniciada is not None:
+                    iniciada.set()
+                # Medida dentro da vaga: a espera pelo limitador e o backoff das
+                # retentativas não entram no limiar do hedge, só o servidor
+                inicio = time.perf_counter()
+                async with self.session.get(url, headers=headers, timeout=_prazo(timeout)) as resp:
+                    if resp.status == 304:
+                        resposta = RespostaBruta(304, b"", etag, last_modified)
+                    else:
+                        resp.raise_for_status()
+                        resposta = RespostaBruta(
+                            resp.status, await resp.read(),
+                            resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                        )
+                self.latencias.registrar(host, time.perf_counter() - inicio)
+                return resposta
+
+        async def com_retry(iniciada=None):
+            inicio = time.perf_counter()
+            resposta = await self.retry.executar(lambda: requisicao(iniciada))
+            self.duracoes.registrar(host, time.perf_counter() - inicio)
+            return resposta
+
+        if hedge and self.hedge:
+            return await self._com_hedge(host, com_retry)
+        return await com_retry()
+
+    async def _com_hedge(self, host, fazer):
+        """
+        Executa `fazer(iniciada)` e, se passar do limiar do host, dispara uma
+        cópia. `fazer` sinaliza o asyncio.Event `iniciada` ao obter a vaga
+        no limitador: o limiar conta dali, como as latências do histórico.
+        """
+        limiar = self.latencias.percentil(host, config.HEDGE_PERCENTIL)
+        if limiar is None:
+            return await fazer()
+
+        iniciada = asyncio.Event()
+        primeira = asyncio.ensure_future(fazer(iniciada))
+        pendentes = {primeira}
+        try:
+            # Cancelado durante a espera, quem chamou não deixa a original ocupando a vaga (ver finally)
+            na_vaga = asyncio.ensure_future(iniciada.wait())
+            try:
+                await asyncio.wait({primeira, na_vaga}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                na_vaga.cancel()
+            done, pendentes = await asyncio.wait(pendentes, timeout=max(limiar, config.HEDGE_ATRASO_MIN))
+            if done:
+                return primeira.result()
+
+            self.hedges_disparados += 1
+            segunda = asyncio.ensure_future(fazer())
+            pendentes = {primeira, segunda}
+            while pendentes:
+                done, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in done:
+                    if tarefa.exception() is None:
+                        self.hedges_vencedores += tarefa is segunda
+                        return tarefa.result()
+            # As duas falharam: propaga o erro da original
+            raise primeira.exception()
+        finally:
+            for tarefa in pendentes:
+                tarefa.cancel()
+
+    def sockets_abertos(self):
+        """Conexões abertas no pool (ociosas + em uso)."""
+        connector = self._connector
+        if connector is None or connector.closed:
+            return 0
+        # Atributos internos do aiohttp; tolera mudanças entre versões
+        ociosas = sum(len(v) for v in getattr(connector, "_conns", {}).values())
+        return ociosas + len(getattr(connector, "_acquired", ()))
+
+    def estatisticas(self):
+        """Resumo do pool: taxa de reuso, aquisições em fila e sockets abertos."""
+        s = self.stats
+        conexoes = s.conexoes_novas + s.conexoes_reusadas
+        return {
+            "requisicoes": s.requisicoes,
+            "retentativas": self.retry.retentativas,
+            "hedges_disparados": self.hedges_disparados,
+            "hedges_vencedores": self.hedges_vencedores,
+            "conexoes_novas": s.conexoes_novas,
+            "conexoes_reusadas": s.conexoes_reusadas,
+            "taxa_reuso": s.conexoes_reusadas / conexoes if conexoes else 0.0,
+            "aquisicoes_enfileiradas": s.aquisicoes_enfileiradas,
+            "tempo_em_fila": s.tempo_em_fila,
+            "sockets_abertos": self.sockets_abertos(),
+        }
+
+def log_pool(cliente):
+    """Registra as estatísticas do pool de conexões."""
+    e = cliente.estatisticas()
+    log_evento("pool", requisicoes=e["requisicoes"], retentativas=e["retentativas"], reuso=f"{e['taxa_reuso']:.1%}",
+               novas=e["conexoes_novas"], em_fila=e["aquisicoes_enfileiradas"],
+               tempo_em_fila=f"{e['tempo_em_fila']:.2f}s", sockets_abertos=e["sockets_abertos"])
+    if e["hedges_disparados"]:
+        log_evento("hedge", disparados=e["hedges_disparados"], venceram=e["hedges_vencedores"])
+    if cliente.limitador is not None:
+        for host, r in cliente.limitador.resumo_hosts().items():
+            log_evento("aimd", host=host, limite=r["limite"], reducoes=r["reducoes"])
+
+@asynccontextmanager
+async def usar_cliente(cliente=None):
+    """Reaproveita `cliente` se informado; senão abre um ClienteIntegra próprio."""
+    if cliente is not None:
+        yield cliente
+        return
+    async with ClienteIntegra(LimitadorConexoes()) as novo:
+        yield novo
+
+def _prazo(timeout):
+    """ClientTimeout para um prazo em segundos, ou None para usar o padrão da sessão."""
+    return aiohttp.ClientTimeout(total=timeout, sock_connect=config.CONNECT_TIMEOUT) if timeout else None
+
+def slot(limitador, url):
+    """Retorna o slot do limitador, ou um contexto vazio se não houver limitador."""
+    if limitador is None:
+        return _sem_limite()
+    return limitador.slot(url)
+
+@asynccontextmanager
+async def _sem_limite():
+    yield
@@ -0,0 +1,102 @@
+# C:\...\extracao\replay.py
+
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import config
+from arquivo_bruto import ler_segmento
+from database import SQL_UPSERT_META_COLETA, DatabaseManager, comandos_professores, comandos_tccs
+from extracao_tcc import extrair_tccs_do_corpo, parse_professores
+
+def _ordem_execucao(pasta):
+    """Execuções com checkpoint (run-<id>) em ordem numérica; as demais pela data no nome."""
+    tag = pasta.name.removeprefix("run-")
+    return (0, int(tag), "") if tag.isdigit() else (1, 0, tag)
+
+def listar_segmentos(raiz, siglas=None):
+    """Segmentos do arquivo em ordem de execução, instituição e número."""
+    segmentos = []
+    for execucao in sorted(Path(raiz).glob("run-*"), key=_ordem_execucao):
+        for pasta in sorted(p for p in execucao.iterdir() if p.is_dir()):
+            if siglas and pasta.name not in siglas:
+                continue
+            segmentos += sorted(pasta.glob("*.jsonl.gz"))
+    return segmentos
+
+def interpretar_segmento(caminho):
+    """
+    Reinterpreta um segmento (roda em um processo do pool): devolve as
+    comandos de gravação (ver database.comandos_*), os totais de professores
+    e TCCs e os metadados de coleta.
+    """
+    comandos, professores, tccs, meta = [], 0, [], []
+    for registro in ler_segmento(caminho):
+        sigla = registro["sigla"]
+        if "lote" in registro:
+            lote = parse_professores(registro["lote"], registro["base_url"])
+            comandos += comandos_professores(sigla, lote)
+            professores += len(lote)
+            continue
+        prof = {"slug": registro["slug"], "nome": registro["nome"], "campus": registro["campus"], "sigla": sigla}
+        corpo = registro["corpo"]
+        tccs += extrair_tccs_do_corpo(registro["slug"], prof, corpo.encode("utf-8"), registro["uf"])
+        meta.append((sigla, registro["slug"], registro["coletado_em"], registro["hash"], None, None, None,
+                     len(corpo.encode("utf-8"))))
+    comandos += comandos_tccs(tccs)
+    return comandos, professores, len(tccs), meta
+
+def reconstruir(raiz=config.ARQUIVO_DIR, db_name=config.DB_NAME, processos=None, siglas=None):
+    """
+    Reconstrói o banco bruto a partir do arquivo de respostas, sem rede.
+
+    Os segmentos são interpretados em paralelo (um processo por núcleo) e
+    gravados pelo processo principal, um segmento por transação, na ordem
+    das execuções: o metadado de coleta mais recente de cada slug prevalece.
+    """
+    segmentos = listar_segmentos(raiz, siglas)
+    if not segmentos:
+        print(f"Nenhum segmento encontrado em '{raiz}'.")
+        return {"segmentos": 0, "professores": 0, "tccs": 0}
+
+    DatabaseManager(db_name).init_db()
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    totais = {"segmentos": 0, "professores": 0, "tccs": 0}
+    inicio = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=processos or os.cpu_count()) as pool:
+            for caminho, (comandos, professores, tccs, meta) in zip(segmentos,
+                                                                    pool.map(interpretar_segmento, segmentos)):
+                with conn:
+                    for sql, linhas in comandos:
+                        conn.executemany(sql, linhas)
+                    conn.executemany(SQL_UPSERT_META_COLETA, meta)
+                totais["segmentos"] += 1
+                totais["professores"] += professores
+                totais["tccs"] += tccs
+                print(f"[replay] {caminho.parent.parent.name}/{caminho.parent.name}/{caminho.name}: "
+                      f"{professores} professores, {tccs} TCCs")
+    finally:
+        conn.close()
+
+    print(f"[replay] {totais['segmentos']} segmentos, {totais['professores']} professores e "
+          f"{totais['tccs']} TCCs lidos em {time.perf_counter() - inicio:.2f}s")
+    return totais
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói o banco bruto a partir do arquivo de respostas")
+    parser.add_argument("--arquivo", default=config.ARQUIVO_DIR, help="pasta raiz do arquivo de respostas brutas")
+    parser.add_argument("--db", default=config.DB_NAME, help="banco SQLite de destino")
+    parser.add_argument("--processos", type=int, default=None, help="processos de interpretação (padrão: núcleos)")
+    parser.add_argument("--siglas", nargs="*", help="restringe o replay a estas instituições")
+    parser.add_argument("--substituir", action="store_true", help="apaga o banco de destino antes do replay")
+    args = parser.parse_args()
+
+    if args.substituir:
+        for sufixo in ("", "-wal", "-shm"):
+            Path(args.db + sufixo).unlink(missing_ok=True)
+    reconstruir(args.arquivo, args.db, args.processos, args.siglas)
@@ -1,93 +1,281 @@
 # C:\...\extracao\scraper.py
 
 import asyncio
-import aiohttp
+import hashlib
+import itertools
+import statistics
 import time
 from datetime import datetime
 
 import config  # Importação direta
-from database import DatabaseManager, clean_value # Importação direta
+import rede
+from rede import classificar_erro
+from gravador import salvar, usar_gravador
+from arquivo_bruto import usar_arquivo
+from checkpoint import CheckpointColeta
+from decodificador import usar_decodificador
+from extracao_tcc import extrair_tccs_do_corpo, parse_professores
+from monitoramento import log, log_amostrado
 
-def log(msg):
-    """Função simples de log com timestamp."""
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
 
-# O restante do código deste arquivo permanece exatamente o mesmo da resposta anterior...
-# (fetch_professores, _fetch_detail, fetch_detalhes, run_for_institution)
-async def fetch_professores(sigla, base_url, db_manager, progress_callback=None):
-    """Busca a lista de todos os professores de uma instituição."""
+async def _fetch_pagina(cliente, list_url, start):
+    """Busca uma página da listagem e retorna (meta, lote)."""
+    params = {"start": start, "length": config.PAGE_SIZE}
+    data = await cliente.get_json(list_url, params=params, timeout=config.LIST_TIMEOUT)
+
+    if not isinstance(data, list) or len(data) < 2 or not data[1]:
+        return {}, []
+    return data[0] or {}, data[1] or []
+
+async def fetch_professores(sigla, base_url, db_manager, progress_callback=None, fila=None, cliente=None,
+                           gravador=None, checkpoint=None, arquivo=None, estrito=False):
+    """
+    Busca a lista de todos os professores de uma instituição.
+
+    A primeira página informa o total (meta["total"]); os demais offsets
+    são buscados em paralelo, limitados por config.LIST_CONCURRENT, e
+    remontados na ordem original sem slugs duplicados. Cada página é
+    gravada assim que chega.
+
+    Se `fila` (asyncio.Queue) for informada, cada professor inédito é
+    enfileirado assim que sua página chega, para consumo imediato.
+    `cliente` (rede.ClienteIntegra) é a sessão compartilhada da coleta e
+    `gravador` (gravador.GravadorSQLite), o gravador em lote do banco.
+    Com `checkpoint` (checkpoint.CheckpointColeta), a listagem começa no
+    offset salvo, registra o avanço e não reenfileira slugs já concluídos.
+    Com `arquivo` (arquivo_bruto.ArquivoBruto), cada lote recebido é
+    guardado no arquivo de respostas brutas.
+
+    Uma página que falha mesmo após as retentativas só é registrada no
+    log. Com `estrito` (fila de trabalho), levanta RuntimeError: a listagem
+    incompleta não pode ser dada como concluída.
+    """
     list_url = f"{base_url}/api/portfolio/pessoa/data"
-    professores = []
-    start = 0
-    total = 1
+    inicio = checkpoint.offset_listagem if checkpoint else 0
+    paginas = {}
+    enfileirados = set()
+    proximo_offset = inicio
+
+    async def receber(start, batch, step, total):
+        nonlocal proximo_offset
+        paginas[start] = parse_professores(batch, base_url)
+        if arquivo:
+            await arquivo.registrar_listagem(sigla, base_url, start, batch)
+        if paginas[start]:
+            await salvar(db_manager, gravador, "professores", sigla, paginas[start])
+
+        if checkpoint:
+            await checkpoint.registrar_listados(paginas[start])
+            # O checkpoint guarda o maior offset até o qual todas as páginas chegaram
+            while proximo_offset in paginas:
+                proximo_offset += step
+            await checkpoint.registrar_offset(proximo_offset, proximo_offset >= total)
+
+        if fila is not None:
+            for p in paginas[start]:
+                if p["slug"] not in enfileirados and not (checkpoint and checkpoint.ja_processado(p["slug"])):
+                    enfileirados.add(p["slug"])
+                    await fila.put(p)
+        return len(paginas[start])
 
     if progress_callback:
-        progress_callback(0, "?")
+        progress_callback(inicio, "?")
 
-    async with aiohttp.ClientSession() as session:
-        while True:
-            params = {"start": start, "length": config.PAGE_SIZE}
-            try:
-                async with session.get(list_url, params=params, headers=config.DEFAULT_HEADERS, ssl=False) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-            except Exception as e:
-                log(f"[{sigla}] Erro ao buscar lista de professores (start={start}): {e}")
-                break
+    async with rede.usar_cliente(cliente) as cliente:
+        try:
+            meta, batch = await _fetch_pagina(cliente, list_url, inicio)
+        except Exception as e:
+            log(f"[{sigla}] Erro ao buscar lista de professores (start={inicio}): {e}")
+            if estrito:
+                raise RuntimeError(f"primeira página da listagem (start={inicio}) falhou: {e}") from e
+            return []
 
-            if not isinstance(data, list) or len(data) < 2 or not data[1]:
-                break
+        if not batch:
+            if checkpoint and inicio:
+                await checkpoint.registrar_offset(inicio, True)
+            return []
 
-            meta, batch = data[0] or {}, data[1] or []
-            total = meta.get("total", total)
-            length_returned = meta.get("length", len(batch)) or len(batch)
-
-            for p in batch:
-                if slug := p.get("slug"):
-                    professores.append({
-                        "nome": p.get("nome"),
-                        "campus": p.get("campusNome"),
-                        "cargo": p.get("cargo"),
-                        "slug": slug,
-                        "url_final": f"{base_url}/portfolio/pessoas/{slug}",
-                    })
-            
-            log(f"[{sigla}] [{len(professores)}/{total}] - professores coletados")
-            if progress_callback:
-                progress_callback(len(professores), total)
+        total = meta.get("total", len(batch)) or len(batch)
+        length_returned = meta.get("length", len(batch)) or len(batch)
+        coletados = inicio + await receber(inicio, batch, length_returned, total)
+
+        log_amostrado("listagem", sigla, coletados=coletados, total=total)
+        if progress_callback:
+            progress_callback(coletados, total)
+
+        semaforo = asyncio.Semaphore(config.LIST_CONCURRENT)
+
+        async def buscar(start):
+            async with semaforo:
+                try:
+                    return start, (await _fetch_pagina(cliente, list_url, start))[1]
+                except Exception as e:
+                    log(f"[{sigla}] Erro ao buscar lista de professores (start={start}): {e}")
+                    return start, None
+
+        pendentes = list(range(inicio + length_returned, total, length_returned))
+        # Segunda rodada: páginas que falharam mesmo após as retentativas voltam ao fim da fila
+        for rodada in range(2 if config.RETRY_FINAL else 1):
+            falhas = []
+            for coro in asyncio.as_completed([buscar(start) for start in pendentes]):
+                start, batch = await coro
+                if batch is None:
+                    falhas.append(start)
+                    continue
+                coletados += await receber(start, batch, length_returned, total)
 
-            if len(professores) >= total:
+                log_amostrado("listagem", sigla, coletados=coletados, total=total)
+                if progress_callback:
+                    progress_callback(coletados, total)
+            pendentes = sorted(falhas)
+            if not pendentes:
                 break
-            
-            start += length_returned
-            await asyncio.sleep(0.05)
+            if rodada == 0 and config.RETRY_FINAL:
+                log(f"[{sigla}] Repetindo {len(pendentes)} páginas da listagem que falharam")
+
+        if pendentes:
+            log(f"[{sigla}] {len(pendentes)} páginas da listagem não puderam ser obtidas: {pendentes}")
+            if estrito:
+                raise RuntimeError(f"{len(pendentes)} páginas da listagem falharam: {pendentes}")
 
-    if professores:
-        db_manager.save_professores(sigla, professores)
+    # Remonta na ordem dos offsets, descartando slugs repetidos entre páginas
+    professores = []
+    vistos = set()
+    for start in sorted(paginas):
+        for p in paginas[start]:
+            if p["slug"] not in vistos:
+                vistos.add(p["slug"])
+                professores.append(p)
     return professores
 
-async def _fetch_detail(session, detail_url, p):
-    """Função auxiliar para buscar o detalhe de um único professor."""
+async def _fetch_detail(cliente, detail_url, p, anterior=None):
+    """
+    Função auxiliar para buscar o detalhe de um único professor.
+
+    Com `anterior` (metadados da última coleta), envia uma requisição
+    condicional e marca `info["inalterado"]` quando o servidor responde 304
+    ou o hash do corpo coincide. O corpo de um portfólio novo ou alterado
+    segue em `info["corpo"]`, ainda não decodificado: a extração dos TCCs
+    fica com _processar_detalhe, fora do caminho da requisição.
+    """
     slug = p["slug"]
+    anterior = anterior or {}
     start_time = time.perf_counter()
     try:
-        async with session.get(f"{detail_url}/{slug}", headers=config.DEFAULT_HEADERS, ssl=False) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            elapsed = time.perf_counter() - start_time
-            return slug, p, data, elapsed
+        resp = await cliente.get_condicional(
+            f"{detail_url}/{slug}", anterior.get("etag"), anterior.get("last_modified"),
+            timeout=config.DETAIL_TIMEOUT, hedge=True,
+        )
+        info = {"etag": resp.etag, "last_modified": resp.last_modified, "inalterado": True,
+                "tamanho": len(resp.corpo) if resp.status != 304 else None}
+        if resp.status == 304:
+            info["hash"] = anterior.get("hash")
+        else:
+            info["hash"] = hashlib.sha256(resp.corpo).hexdigest()
+            info["inalterado"] = info["hash"] == anterior.get("hash")
+        info["corpo"] = None if info["inalterado"] else resp.corpo
+        elapsed = time.perf_counter() - start_time
+        return slug, p, {}, elapsed, info
     except Exception as e:
         elapsed = time.perf_counter() - start_time
-        return slug, p, {"erro": str(e)}, elapsed
+        return slug, p, {"erro": str(e), "tipo": classificar_erro(e)}, elapsed, None
+
+def _chave_lentidao(historico):
+    """
+    Função de prioridade para agendar primeiro os slugs mais lentos/pesados
+    em coletas anteriores; slugs sem histórico recebem a duração mediana.
+    """
+    duracoes = [m["duracao"] for m in historico.values() if m.get("duracao")]
+    mediana = statistics.median(duracoes) if duracoes else 0.0
+    return lambda slug: (historico.get(slug) or {}).get("duracao") or mediana
+
+class FilaPorLentidao(asyncio.PriorityQueue):
+    """
+    Fila do modo streaming que entrega primeiro os professores historicamente
+    mais lentos. Aceita os itens puros (professor ou None); o sentinela None
+    sempre sai depois de todos os professores.
+    """
+
+    def __init__(self, historico, maxsize=0):
+        super().__init__(maxsize)
+        self._lentidao = _chave_lentidao(historico or {})
+        self._seq = itertools.count()
+
+    def _put(self, item):
+        prioridade = float("inf") if item is None else -self._lentidao(item["slug"])
+        super()._put((prioridade, next(self._seq), item))
 
-async def fetch_detalhes(sigla, base_url, uf, professores, db_manager, progress_callback=None):
-    """Busca os detalhes (TCCs) para uma lista de professores."""
+    def _get(self):
+        return super()._get()[2]
+
+async def _processar_detalhe(sigla, uf, resultado, db_manager, gravador, checkpoint=None, falhas=None,
+                             arquivo=None, decodificador=None):
+    """
+    Extrai e grava os TCCs de um detalhe e registra seus metadados de coleta.
+    Detalhes que falharam com erro transitório vão para a lista `falhas`.
+    Corpos novos ou alterados vão para o `arquivo` de respostas brutas; os
+    inalterados já estão no arquivo de uma execução anterior. Com
+    `decodificador` (decodificador.DecodificadorDetalhes), a extração roda
+    no pool de processos; sem ele, no próprio loop.
+    """
+    slug, prof, data, elapsed, info = resultado
+    tccs_para_salvar = []
+    texto = None
+    if info is not None and not info["inalterado"]:
+        try:
+            if arquivo:
+                # O arquivo guarda o corpo como texto; um corpo fora de UTF-8 cai na falha abaixo
+                texto = info["corpo"].decode("utf-8")
+            if decodificador is not None:
+                tccs_para_salvar = await decodificador.extrair(slug, prof, info["corpo"], uf)
+            else:
+                tccs_para_salvar = extrair_tccs_do_corpo(slug, prof, info["corpo"], uf)
+        except Exception as e:
+            # Corpo que não é JSON válido: falha permanente, como um 4xx
+            data, info = {"erro": f"corpo inválido: {e}", "tipo": "permanente"}, None
+
+    if info is None:
+        if checkpoint:
+            await checkpoint.registrar_slug(slug, False)
+        log_amostrado("falha_detalhe", sigla, slug=slug, tipo=data["tipo"], erro=data["erro"])
+        if falhas is not None and data["tipo"] == "transitorio":
+            falhas.append(prof)
+        return
+
+    if not info["inalterado"]:
+        if arquivo:
+            await arquivo.registrar_detalhe(sigla, uf, prof, texto, info["hash"])
+        if tccs_para_salvar:
+            await salvar(db_manager, gravador, "tccs", tccs_para_salvar)
+
+    agora = datetime.now().isoformat(timespec="seconds")
+    await salvar(db_manager, gravador, "meta_coleta",
+                  [(sigla, slug, agora, info["hash"], info["etag"], info["last_modified"], elapsed, info["tamanho"])])
+    if checkpoint:
+        # Só depois dos TCCs e metadados: o gravador grava a fila em ordem, então
+        # nenhuma transação confirma o slug como concluído sem os dados dele
+        await checkpoint.registrar_slug(slug, True)
+
+async def fetch_detalhes(sigla, base_url, uf, professores, db_manager, progress_callback=None, cliente=None,
+                         gravador=None, meta_anterior=None, checkpoint=None, falhas=None, historico=None,
+                         arquivo=None, decodificador=None):
+    """
+    Busca os detalhes (TCCs) para uma lista de professores.
+
+    `meta_anterior` ({slug: metadados}) ativa a recoleta incremental: só os
+    professores cujo portfólio mudou são decodificados e regravados.
+    `checkpoint` recebe o status (concluído/falhou) de cada slug e `falhas`
+    (lista), os professores cujo detalhe falhou com erro transitório.
+    Com `historico` (metadados de coletas anteriores), os slugs mais lentos
+    são disparados primeiro para não ficarem para o fim. `arquivo` recebe
+    os corpos brutos e `decodificador` extrai os TCCs deles (ver
+    _processar_detalhe).
+    """
     if not professores:
         log(f"[{sigla}] Nenhum professor para buscar detalhes.")
         return
 
     detail_url = f"{base_url}/api/portfolio/pessoa/s"
-    connector = aiohttp.TCPConnector(limit=config.MAX_CONCURRENT)
     completed = 0
     total = len(professores)
 
@@ -95,56 +283,213 @@ async def fetch_detalhes(sigla, base_url, uf, professores, db_manager, progress_
     if progress_callback:
         progress_callback(0, total)
 
-    async with aiohttp.ClientSession(connector=connector) as session:
-        tasks = [_fetch_detail(session, detail_url, {**p, "sigla": sigla}) for p in professores]
+    meta_anterior = meta_anterior or {}
+    inalterados = 0
+
+    async with rede.usar_cliente(cliente) as cliente:
+        semaforo = asyncio.Semaphore(config.MAX_CONCURRENT)
+
+        async def buscar(p):
+            async with semaforo:
+                return await _fetch_detail(cliente, detail_url, {**p, "sigla": sigla}, meta_anterior.get(p["slug"]))
+
+        if historico:
+            lentidao = _chave_lentidao(historico)
+            professores = sorted(professores, key=lambda p: lentidao(p["slug"]), reverse=True)
+        tasks = [buscar(p) for p in professores]
         
         for coro in asyncio.as_completed(tasks):
-            slug, prof, data, elapsed = await coro
+            resultado = await coro
+            slug, _, _, elapsed, info = resultado
             completed += 1
+            inalterados += bool(info and info["inalterado"])
             
-            log(f"[{sigla}] [{completed}/{total}] - {slug} -> {elapsed:.2f}s")
+            log_amostrado("detalhe", sigla, concluidos=completed, total=total, slug=slug, duracao=f"{elapsed:.2f}s")
             if progress_callback:
                 progress_callback(completed, total)
 
-            tccs_para_salvar = []
-            outra_producao = data.get("outraProducao", {})
-            if isinstance(outra_producao, dict) and "orientacoesConcluidas" in outra_producao:
-                for item in outra_producao.get("orientacoesConcluidas", []):
-                    for trabalho in item.get("outrasOrientacoesConcluidas", []):
-                        dados_basicos = trabalho.get("dadosBasicosDeOutrasOrientacoesConcluidas", {})
-                        if dados_basicos.get("natureza") != "TRABALHO_DE_CONCLUSAO_DE_CURSO_GRADUACAO":
-                            continue
-
-                        detalhamento = trabalho.get("detalhamentoDeOutrasOrientacoesConcluidas", {})
-                        nome_professor = clean_value(prof.get("nome"))
-                        autores = clean_value(detalhamento.get("nomeDoOrientado"))
-                        if nome_professor:
-                            autores = (autores + ", " if autores else "") + f"{nome_professor} (Orientador/a)"
-
-                        palavras = trabalho.get("palavrasChave") or {}
-                        info_add = trabalho.get("informacoesAdicionais") or {}
-
-                        tccs_para_salvar.append((
-                            slug, nome_professor, prof.get("sigla"),
-                            clean_value(detalhamento.get("nomeDaInstituicao")), uf, clean_value(prof.get("campus")),
-                            clean_value(dados_basicos.get("ano")), clean_value(detalhamento.get("nomeDoCurso")),
-                            autores, clean_value(dados_basicos.get("titulo")),
-                            clean_value(info_add.get("descricaoInformacoesAdicionais")),
-                            clean_value(palavras.get("palavrasChaves"))
-                        ))
-            
-            if tccs_para_salvar:
-                db_manager.save_tccs(tccs_para_salvar)
-    
+            await _processar_detalhe(sigla, uf, resultado, db_manager, gravador, checkpoint, falhas, arquivo,
+                                     decodificador)
+
+    if meta_anterior:
+        log(f"[{sigla}] {inalterados} de {total} portfólios sem alteração desde a última coleta.")
+
+    log(f"[{sigla}] Todos os TCCs salvos.")
+
+async def fetch_detalhes_stream(sigla, base_url, uf, fila, db_manager, progress_callback=None, total_listado=None,
+                                cliente=None, gravador=None, meta_anterior=None, checkpoint=None, falhas=None,
+                                arquivo=None, decodificador=None):
+    """
+    Consome professores de `fila` à medida que são listados e busca seus TCCs.
+
+    Um pool de config.MAX_CONCURRENT workers drena a fila até receber um
+    `None` por worker. `total_listado` é uma função que retorna quantos
+    professores já foram listados, usada como total do progresso.
+    `meta_anterior`, `checkpoint`, `falhas`, `arquivo` e `decodificador`
+    funcionam como em fetch_detalhes.
+    """
+    detail_url = f"{base_url}/api/portfolio/pessoa/s"
+    completed = 0
+    meta_anterior = meta_anterior or {}
+
+    if progress_callback:
+        progress_callback(0, "?")
+
+    async def worker(cliente):
+        nonlocal completed
+        while (p := await fila.get()) is not None:
+            resultado = await _fetch_detail(cliente, detail_url, {**p, "sigla": sigla}, meta_anterior.get(p["slug"]))
+            slug, _, _, elapsed, _ = resultado
+            completed += 1
+            total = total_listado() if total_listado else "?"
+
+            log_amostrado("detalhe", sigla, concluidos=completed, total=total, slug=slug, duracao=f"{elapsed:.2f}s")
+            if progress_callback:
+                progress_callback(completed, total)
+
+            await _processar_detalhe(sigla, uf, resultado, db_manager, gravador, checkpoint, falhas, arquivo,
+                                     decodificador)
+
+    async with rede.usar_cliente(cliente) as cliente:
+        workers = [asyncio.create_task(worker(cliente)) for _ in range(config.MAX_CONCURRENT)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # Se um worker falhou, os demais não ficam esperando a fila para sempre
+            for w in workers:
+                w.cancel()
+
     log(f"[{sigla}] Todos os TCCs salvos.")
 
-async def run_for_institution(sigla, base_url, uf, db_manager, callbacks):
-    """Executa o pipeline completo para uma instituição."""
+async def run_for_institution(sigla, base_url, uf, db_manager, callbacks, streaming=config.STREAMING, cliente=None,
+                              gravador=None, refresh=config.REFRESH, run_id=None, arquivo=None,
+                              decodificador=None):
+    """
+    Executa o pipeline completo para uma instituição.
+
+    No modo `streaming`, listagem e busca de detalhes rodam sobrepostas:
+    cada página listada alimenta uma asyncio.Queue drenada pelos workers.
+    `cliente` e `gravador` são compartilhados quando várias instituições
+    rodam juntas; sem eles, a instituição abre os próprios. Com `refresh`,
+    só os portfólios alterados desde a última coleta são reprocessados.
+
+    Com `run_id`, o progresso é registrado no checkpoint da execução e uma
+    execução retomada continua do offset de listagem e dos slugs pendentes.
+    As respostas recebidas vão para `arquivo` (arquivo_bruto.ArquivoBruto),
+    compartilhado entre instituições ou aberto aqui para a execução. O
+    mesmo vale para `decodificador` (pool de extração dos TCCs).
+
+    Detalhes que falharam com erro transitório são reprocessados ao final
+    (config.RETRY_FINAL). Retorna {"falhas", "recuperados", "descartados"}.
+    """
     log(f"=== {sigla}: Iniciando coleta ===")
-    
-    professores = await fetch_professores(sigla, base_url, db_manager, callbacks.get('prof_progress'))
-    log(f"[{sigla}] Total de professores encontrados: {len(professores)}")
-    
-    await fetch_detalhes(sigla, base_url, uf, professores, db_manager, callbacks.get('det_progress'))
-    
+    # Histórico da última coleta: ordena os slugs lentos primeiro e, no refresh, valida o cache
+    historico = db_manager.carregar_meta_coleta(sigla)
+    meta_anterior = historico if refresh else None
+    falhas = []
+    resumo = {"falhas": 0, "recuperados": 0, "descartados": 0}
+
+    async with rede.usar_cliente(cliente) as cliente, usar_gravador(db_manager, gravador) as gravador, \
+            usar_arquivo(arquivo, run_id) as arquivo, usar_decodificador(decodificador) as decodificador:
+        checkpoint = CheckpointColeta(db_manager, gravador, run_id, sigla) if run_id is not None else None
+        if checkpoint and checkpoint.concluida:
+            log(f"=== {sigla}: Já concluída na execução {run_id}, pulando ===")
+            return resumo
+        if checkpoint and (checkpoint.offset_listagem or checkpoint.pendentes):
+            log(f"[{sigla}] Retomando execução {run_id}: listagem a partir de {checkpoint.offset_listagem}, "
+                f"{len(checkpoint.pendentes)} professores pendentes")
+
+        if streaming:
+            await _run_streaming(sigla, base_url, uf, db_manager, callbacks, cliente, gravador, meta_anterior,
+                                 checkpoint, falhas, historico, arquivo, decodificador)
+        else:
+            professores = list(checkpoint.pendentes) if checkpoint else []
+            if not (checkpoint and checkpoint.listagem_concluida):
+                listados = await fetch_professores(sigla, base_url, db_manager, callbacks.get('prof_progress'),
+                                                   cliente=cliente, gravador=gravador, checkpoint=checkpoint,
+                                                   arquivo=arquivo)
+                log(f"[{sigla}] Total de professores encontrados: {len(listados)}")
+                professores += [p for p in listados if not (checkpoint and checkpoint.ja_processado(p["slug"]))]
+
+            await fetch_detalhes(sigla, base_url, uf, professores, db_manager, callbacks.get('det_progress'),
+                                 cliente=cliente, gravador=gravador, meta_anterior=meta_anterior,
+                                 checkpoint=checkpoint, falhas=falhas, historico=historico, arquivo=arquivo,
+                                 decodificador=decodificador)
+
+        resumo["falhas"] = len(falhas)
+        if falhas and config.RETRY_FINAL:
+            # Fila de falhas: uma nova rodada, já com o servidor menos carregado
+            log(f"[{sigla}] Reprocessando {len(falhas)} professores que falharam...")
+            restantes = []
+            await fetch_detalhes(sigla, base_url, uf, falhas, db_manager, cliente=cliente, gravador=gravador,
+                                 meta_anterior=meta_anterior, checkpoint=checkpoint, falhas=restantes,
+                                 arquivo=arquivo, decodificador=decodificador)
+            falhas = restantes
+            resumo["recuperados"] = resumo["falhas"] - len(falhas)
+        resumo["descartados"] = len(falhas)
+        if resumo["falhas"]:
+            log(f"[{sigla}] Falhas de detalhe: {resumo['falhas']} | recuperados: {resumo['recuperados']} "
+                f"| descartados: {resumo['descartados']}")
+
+        if checkpoint and checkpoint.listagem_concluida and not checkpoint.falhas:
+            await checkpoint.concluir()
+
     log(f"=== {sigla}: Coleta concluída ===")
+    return resumo
+
+async def _colocar_enquanto(fila, item, consumidor):
+    """Coloca `item` na fila, desistindo se `consumidor` terminar antes de abrir espaço."""
+    if consumidor.done():
+        return
+    colocar = asyncio.ensure_future(fila.put(item))
+    await asyncio.wait({colocar, consumidor}, return_when=asyncio.FIRST_COMPLETED)
+    if not colocar.done():
+        colocar.cancel()
+
+async def _run_streaming(sigla, base_url, uf, db_manager, callbacks, cliente, gravador, meta_anterior, checkpoint,
+                         falhas, historico, arquivo=None, decodificador=None):
+    """Listagem (produtora) e detalhes (consumidores) ligados por uma fila."""
+    # Professores já enfileirados saem dos mais lentos para os mais rápidos
+    fila = FilaPorLentidao(historico, maxsize=config.MAX_CONCURRENT * 4)
+    retomados = checkpoint.pendentes if checkpoint else []
+    listados = len(retomados)
+    prof_progress = callbacks.get('prof_progress')
+
+    def on_prof_progress(current, total):
+        nonlocal listados
+        if current != "?":
+            listados = current + len(retomados)
+        if prof_progress:
+            prof_progress(current, total)
+
+    async def produzir():
+        # Professores pendentes de uma execução interrompida entram primeiro
+        for p in retomados:
+            await fila.put(p)
+        if not (checkpoint and checkpoint.listagem_concluida):
+            professores = await fetch_professores(sigla, base_url, db_manager, on_prof_progress, fila=fila,
+                                                 cliente=cliente, gravador=gravador, checkpoint=checkpoint,
+                                                 arquivo=arquivo)
+            log(f"[{sigla}] Total de professores encontrados: {len(professores)}")
+
+    consumidor = asyncio.create_task(fetch_detalhes_stream(
+        sigla, base_url, uf, fila, db_manager, callbacks.get('det_progress'), lambda: listados,
+        cliente, gravador, meta_anterior, checkpoint, falhas, arquivo, decodificador
+    ))
+    produtor = asyncio.create_task(produzir())
+    try:
+        await asyncio.wait({produtor, consumidor}, return_when=asyncio.FIRST_COMPLETED)
+        if not produtor.done():
+            # O consumo parou antes do fim da listagem (ex.: o gravador falhou): ninguém
+            # mais lê a fila, então a listagem bloquearia para sempre no put
+            produtor.cancel()
+            consumidor.result()
+            raise RuntimeError(f"[{sigla}] Consumo de detalhes encerrado antes do fim da listagem")
+        produtor.result()
+        # Um sentinela por worker encerra o consumo após o último professor
+        for _ in range(config.MAX_CONCURRENT):
+            await _colocar_enquanto(fila, None, consumidor)
+        await consumidor
+    finally:
+        produtor.cancel()
+        consumidor.cancel()
@@ -0,0 +1,127 @@
+# C:\...\extracao\servidor_mock.py
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+from aiohttp import web
+
+from arquivo_bruto import ler_segmento
+from replay import listar_segmentos
+
+CURSOS = ["Engenharia Elétrica", "Licenciatura em Química", "Sistemas de Informação", "Agronomia", "Administração"]
+
+def _detalhe_sintetico(i, tccs_por_professor):
+    """Portfólio no formato da API com `tccs_por_professor` orientações de TCC (e uma de outra natureza)."""
+    orientacoes = [{
+        "dadosBasicosDeOutrasOrientacoesConcluidas": {
+            "natureza": "TRABALHO_DE_CONCLUSAO_DE_CURSO_GRADUACAO",
+            "ano": str(2010 + (i + k) % 15),
+            "titulo": f"Trabalho {k} do professor {i}",
+        },
+        "detalhamentoDeOutrasOrientacoesConcluidas": {
+            "nomeDoOrientado": f"Aluno {i}-{k}",
+            "nomeDaInstituicao": "Instituto Federal de Educação, Ciência e Tecnologia",
+            "nomeDoCurso": CURSOS[(i + k) % len(CURSOS)],
+        },
+        "palavrasChave": {"palavrasChaves": "ensino; tecnologia"},
+        "informacoesAdicionais": {"descricaoInformacoesAdicionais": "Gerado pelo servidor mock"},
+    } for k in range(tccs_por_professor)]
+    orientacoes.append({"dadosBasicosDeOutrasOrientacoesConcluidas": {"natureza": "INICIACAO_CIENTIFICA"}})
+    return {"outraProducao": {"orientacoesConcluidas": [{"outrasOrientacoesConcluidas": orientacoes}]}}
+
+def dados_sinteticos(professores, tccs_por_professor):
+    """Listagem e corpos de detalhe sintéticos para `professores` professores."""
+    listagem = [{"slug": f"prof-{i:06d}", "nome": f"Professor {i}", "campusNome": f"Campus {i % 7}",
+                 "cargo": "Professor EBTT"} for i in range(professores)]
+    detalhes = {p["slug"]: json.dumps(_detalhe_sintetico(i, tccs_por_professor)).encode()
+                for i, p in enumerate(listagem)}
+    return listagem, detalhes
+
+def dados_arquivados(raiz, sigla):
+    """Listagem e corpos de detalhe de uma instituição guardados pelo arquivo de respostas brutas."""
+    listagem, detalhes, vistos = [], {}, set()
+    for caminho in listar_segmentos(raiz, [sigla]):
+        for registro in ler_segmento(caminho):
+            if "lote" in registro:
+                for p in registro["lote"]:
+                    if p.get("slug") not in vistos:
+                        vistos.add(p.get("slug"))
+                        listagem.append(p)
+            else:
+                detalhes[registro["slug"]] = registro["corpo"].encode("utf-8")
+    return listagem, detalhes
+
+def criar_app(listagem, detalhes, latencia=0.02, jitter=0.02, taxa_erro=0.0, tamanho_pagina=50, seed=None):
+    """
+    Servidor que imita os endpoints do Integra usados pelo scraper:
+    /api/portfolio/pessoa/data (listagem paginada) e
+    /api/portfolio/pessoa/s/{slug} (detalhe, com ETag e 304).
+
+    Cada resposta espera `latencia` + U(0, `jitter`) segundos; uma fração
+    `taxa_erro` das requisições responde 503. A página nunca passa de
+    `tamanho_pagina`, mesmo que o cliente peça mais.
+    """
+    sorteio = random.Random(seed)
+    etags = {slug: f'"{hashlib.sha256(corpo).hexdigest()[:16]}"' for slug, corpo in detalhes.items()}
+    contadores = {"listagem": 0, "detalhe": 0, "erros": 0, "nao_modificados": 0}
+
+    async def simular():
+        await asyncio.sleep(latencia + sorteio.random() * jitter)
+        if sorteio.random() < taxa_erro:
+            contadores["erros"] += 1
+            raise web.HTTPServiceUnavailable()
+
+    async def listar(request):
+        contadores["listagem"] += 1
+        await simular()
+        start = int(request.query.get("start", 0))
+        length = min(int(request.query.get("length", tamanho_pagina)), tamanho_pagina)
+        lote = listagem[start:start + length]
+        return web.json_response([{"total": len(listagem), "length": len(lote)}, lote])
+
+    async def detalhe(request):
+        contadores["detalhe"] += 1
+        await simular()
+        slug = request.match_info["slug"]
+        if slug not in detalhes:
+            raise web.HTTPNotFound()
+        if request.headers.get("If-None-Match") == etags[slug]:
+            contadores["nao_modificados"] += 1
+            return web.Response(status=304, headers={"ETag": etags[slug]})
+        return web.Response(body=detalhes[slug], content_type="application/json", headers={"ETag": etags[slug]})
+
+    app = web.Application()
+    app["contadores"] = contadores
+    app.router.add_get("/api/portfolio/pessoa/data", listar)
+    app.router.add_get("/api/portfolio/pessoa/s/{slug}", detalhe)
+    return app
+
+def servir(porta=8765, professores=500, tccs_por_professor=3, arquivo=None, sigla=None, **opcoes):
+    """Sobe o servidor (bloqueante) com dados sintéticos ou, com `arquivo` e `sigla`, reproduzidos do arquivo."""
+    if arquivo:
+        listagem, detalhes = dados_arquivados(arquivo, sigla)
+    else:
+        listagem, detalhes = dados_sinteticos(professores, tccs_por_professor)
+    web.run_app(criar_app(listagem, detalhes, **opcoes), host="127.0.0.1", port=porta, print=None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API do Integra")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--professores", type=int, default=500, help="professores sintéticos")
+    parser.add_argument("--tccs", type=int, default=3, help="TCCs por professor sintético")
+    parser.add_argument("--latencia", type=float, default=0.02, help="latência base por resposta (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="latência extra aleatória máxima (s)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--tamanho-pagina", type=int, default=50, help="máximo de professores por página")
+    parser.add_argument("--arquivo", help="reproduz as respostas guardadas nesta pasta do arquivo bruto")
+    parser.add_argument("--sigla", help="instituição a reproduzir do arquivo")
+    args = parser.parse_args()
+
+    if args.arquivo and not args.sigla:
+        parser.error("--arquivo exige --sigla")
+    print(f"Servidor mock em http://127.0.0.1:{args.porta}")
+    servir(args.porta, args.professores, args.tccs, args.arquivo, args.sigla, latencia=args.latencia,
+           jitter=args.jitter, taxa_erro=args.taxa_erro, tamanho_pagina=args.tamanho_pagina)
@@ -103,29 +103,38 @@ def get_topic_name(topic_idx, top_words):
     return f"Tópico {topic_idx}: {', '.join(capitalized_words)}"
 
 def load_data_from_datamart(db_name):
-    """Carrega e junta dados do Star Schema para criar uma visão plana."""
+    """
+    Carrega a visão plana dos TCCs. Lê a tabela larga 'tcc_plano',
+    materializada pelo star_schema.py; em um Data Mart anterior a ela,
+    junta as tabelas do Star Schema.
+    """
     print(f"1. Carregando dados do Data Mart '{db_name}'...")
     try:
         with sqlite3.connect(db_name) as conn:
-            query = """
-                SELECT
-                    t.tcc_id,
-                    t.titulo,
-                    t.resumo,
-                    t.ano,
-                    i.sigla as instituicao,
-                    c.nome_curso as curso,
-                    GROUP_CONCAT(p_aluno.nome_pessoa) as autores,
-                    p_orientador.nome_pessoa as orientador
-                FROM fato_tcc t
-                LEFT JOIN dim_instituicao i ON t.instituicao_id = i.instituicao_id
-                LEFT JOIN dim_curso c ON t.curso_id = c.curso_id
-                LEFT JOIN ponte_tcc_aluno pta ON t.tcc_id = pta.tcc_id
-                LEFT JOIN dim_pessoa p_aluno ON pta.aluno_id = p_aluno.pessoa_id
-                LEFT JOIN ponte_tcc_orientador pto ON t.tcc_id = pto.tcc_id
-                LEFT JOIN dim_pessoa p_orientador ON pto.orientador_id = p_orientador.pessoa_id
-                GROUP BY t.tcc_id
-            """
+            tem_plano = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tcc_plano'").fetchone()
+            if tem_plano:
+                query = "SELECT tcc_id, titulo, resumo, ano, instituicao, curso, autores, orientador FROM tcc_plano"
+            else:
+                print("   - Tabela 'tcc_plano' não encontrada; juntando as tabelas do Star Schema.")
+                query = """
+                    SELECT
+                        t.tcc_id,
+                        t.titulo,
+                        t.resumo,
+                        t.ano,
+                        i.sigla as instituicao,
+                        c.nome_curso as curso,
+                        GROUP_CONCAT(p_aluno.nome_pessoa) as autores,
+                        p_orientador.nome_pessoa as orientador
+                    FROM fato_tcc t
+                    LEFT JOIN dim_instituicao i ON t.instituicao_id = i.instituicao_id
+                    LEFT JOIN dim_curso c ON t.curso_id = c.curso_id
+                    LEFT JOIN ponte_tcc_aluno pta ON t.tcc_id = pta.tcc_id
+                    LEFT JOIN dim_pessoa p_aluno ON pta.aluno_id = p_aluno.pessoa_id
+                    LEFT JOIN ponte_tcc_orientador pto ON t.tcc_id = pto.tcc_id
+                    LEFT JOIN dim_pessoa p_orientador ON pto.orientador_id = p_orientador.pessoa_id
+                    GROUP BY t.tcc_id
+                """
             df = pd.read_sql_query(query, conn)
         print(f"   - {len(df)} registros carregados.")
         return df
@@ -0,0 +1,275 @@
+# C:\...\transformacoes\resolucao_pessoas.py
+"""
+Resolução de entidades da dimensão pessoa: variantes de grafia do mesmo
+nome (acentos, partículas, erros de digitação) passam a apontar para um
+único nome canônico.
+"""
+
+import os
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+import pandas as pd
+
+try:
+    from rapidfuzz.distance import Indel
+    from rapidfuzz.process import extract
+except ImportError:
+    Indel = extract = None
+
+# Sem o rapidfuzz (requirements.txt), o difflib é mais lento e dá notas diferentes: outras uniões
+RAPIDFUZZ_DISPONIVEL = Indel is not None
+
+# Cache das resoluções (nome -> nome canônico), mantido entre execuções
+CACHE_PESSOAS_FILE = "cache_resolucao_pessoas.csv"
+
+# Similaridade mínima (0-100, sobre o nome normalizado) para unir dois nomes do mesmo bloco
+LIMIAR_SIMILARIDADE = 92
+
+# Formas normalizadas guardadas por bloco: limita as comparações de cada nome novo
+LIMITE_BLOCO = 100
+
+# Partículas ignoradas na comparação ("José da Silva" = "José Silva")
+PARTICULAS = {"de", "da", "do", "das", "dos", "e", "di", "du", "del", "van", "von"}
+
+# Palavras mais curtas que isso (ou com dígitos) só correspondem com o mesmo
+# código fonético, sem aproximação: "Ifs" e "Ifes" são palavras diferentes
+TAMANHO_MINIMO_APROXIMADO = 5
+
+# Sufixos que não são sobrenome (mas continuam no nome comparado: "Filho" distingue pessoas)
+SUFIXOS = {"filho", "filha", "junior", "jr", "neto", "neta", "sobrinho", "segundo"}
+
+# Simplificação fonética do português, aplicada em ordem a cada palavra
+REGRAS_FONETICAS = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"th"), "t"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"sch|sh|ch"), "x"),
+    (re.compile(r"lh"), "l"),
+    (re.compile(r"nh"), "n"),
+    (re.compile(r"qu|q"), "k"),
+    (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"([a-z])\1+"), r"\1"),
+    (re.compile(r"n$"), "m"),
+]
+
+def normalizar_nome(nome):
+    """Palavras do nome sem acentos, em minúsculas e sem partículas."""
+    texto = unicodedata.normalize("NFD", nome.lower().replace("ç", "s"))
+    texto = texto.encode("ascii", "ignore").decode("ascii")
+    return [p for p in re.findall(r"[a-z0-9]+", texto) if p not in PARTICULAS]
+
+@lru_cache(maxsize=65536)
+def fonetizar(palavra):
+    """
+    Código fonético de uma palavra: a grafia com as regras de
+    REGRAS_FONETICAS aplicadas. As vogais ficam: Silva e Silvia, ou Mario e
+    Maria, têm códigos diferentes.
+    """
+    for padrao, troca in REGRAS_FONETICAS:
+        palavra = padrao.sub(troca, palavra)
+    return palavra
+
+def chaves_bloqueio(palavras):
+    """
+    Blocos de um nome normalizado: só nomes que dividem um bloco são
+    comparados. Todo bloco inclui as iniciais de todas as palavras, para
+    que sobrenomes do meio diferentes (Ferreira/Pereira) não se unam; e,
+    além delas, o código fonético de prenome e sobrenome ou cada um deles
+    por extenso com o prefixo do outro, para pegar também erros que mudam
+    o som de uma das duas palavras. Nomes de uma palavra só não têm bloco
+    (só a igualdade exata os une).
+    """
+    if len(palavras) < 2:
+        return []
+    iniciais = "".join(p[0] for p in palavras)
+    prenome = palavras[0]
+    sobrenomes = [p for p in palavras[1:] if p not in SUFIXOS]
+    sobrenome = sobrenomes[-1] if sobrenomes else palavras[-1]
+    return [
+        ("f", iniciais, fonetizar(prenome), fonetizar(sobrenome)),
+        ("p", iniciais, prenome, sobrenome[:3]),
+        ("s", iniciais, sobrenome, prenome[:3]),
+    ]
+
+def _similaridade(a, b):
+    """Similaridade de 0 a 1 entre dois textos (rapidfuzz, ou difflib se não estiver instalado)."""
+    if Indel is not None:
+        return Indel.normalized_similarity(a, b)
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+def palavras_compativeis(a, b, limiar):
+    """
+    Cada palavra de `a` corresponde à de mesma posição em `b`: igual, com
+    o mesmo código fonético ou, se as duas tiverem ao menos
+    TAMANHO_MINIMO_APROXIMADO letras, com similaridade acima de `limiar`
+    (0-100). Evita unir nomes parecidos no todo que diferem numa palavra
+    curta, numa sigla ou num número.
+    """
+    palavras_a, palavras_b = a.split(), b.split()
+    return len(palavras_a) == len(palavras_b) and all(
+        x == y or fonetizar(x) == fonetizar(y) or (
+            min(len(x), len(y)) >= TAMANHO_MINIMO_APROXIMADO and (x + y).isalpha()
+            and _similaridade(x, y) >= limiar / 100)
+        for x, y in zip(palavras_a, palavras_b)
+    )
+
+def _parecidos(chave, candidatos, limiar):
+    """Candidatos com similaridade a `chave` acima de `limiar` (0-100), do mais ao menos parecido."""
+    if extract is not None:
+        return [c for c, _, _ in extract(chave, candidatos, scorer=Indel.normalized_similarity,
+                                         score_cutoff=limiar / 100, limit=None)]
+    achados = []
+    comparador = SequenceMatcher(b=chave, autojunk=False)
+    for posicao, candidato in enumerate(candidatos):
+        comparador.set_seq1(candidato)
+        # limites superiores baratos antes do cálculo completo
+        if comparador.real_quick_ratio() < limiar / 100 or comparador.quick_ratio() < limiar / 100:
+            continue
+        if (nota := comparador.ratio()) >= limiar / 100:
+            achados.append((-nota, posicao, candidato))
+    return [c for _, _, c in sorted(achados)]
+
+class ResolvedorPessoas:
+    """
+    Resolve nomes de pessoas para um nome canônico, em tempo quase linear.
+
+    Cada nome novo é normalizado (sem acentos, caixa e partículas). Se a
+    forma normalizada já pertence a uma pessoa, o nome é unido a ela.
+    Senão, é comparado só às formas já vistas nos seus blocos (ver
+    chaves_bloqueio), no máximo LIMITE_BLOCO por bloco, com rapidfuzz
+    (ou difflib, se não estiver instalado), e unido à pessoa da mais
+    parecida acima de `limiar` cujas palavras também correspondam uma a
+    uma (ver palavras_compativeis). Sem nenhuma, o nome vira uma pessoa
+    nova.
+
+    Durante a carga, cada pessoa é representada pelo primeiro nome visto.
+    Ao final, eleger_canonicos escolhe o canônico de cada pessoa pelas
+    ocorrências acumuladas (o nome mais frequente e, no empate, o primeiro
+    em ordem alfabética), então ele não depende da ordem dos registros.
+    Como as comparações usam as formas e não o canônico, a troca não muda
+    como os nomes seguintes são agrupados.
+
+    `arquivo_cache` guarda nome, canônico e ocorrências de cada nome já
+    visto, na ordem em que foram vistos; salvar_cache o regrava e só deve
+    ser chamado depois que a carga foi confirmada. Um nome do cache não é
+    comparado de novo, e a carga incremental agrupa os nomes novos como a
+    completa agruparia. Com `acumular` (carga incremental), as ocorrências
+    do cache somam às novas; sem, a contagem recomeça.
+    """
+
+    def __init__(self, arquivo_cache=CACHE_PESSOAS_FILE, limiar=LIMIAR_SIMILARIDADE, limite_bloco=LIMITE_BLOCO,
+                 acumular=True):
+        self.arquivo_cache = arquivo_cache
+        self.limiar = limiar
+        self.limite_bloco = limite_bloco
+        self._canonico = {}
+        self._ocorrencias = {}
+        self._membros = {}
+        self._tocados = set()
+        self._por_chave = {}
+        self._blocos = {}
+        self.unidos = 0
+        if arquivo_cache and os.path.exists(arquivo_cache):
+            cache = pd.read_csv(arquivo_cache, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+            ocorrencias = cache["ocorrencias"].astype(int) if acumular and "ocorrencias" in cache else [0] * len(cache)
+            for nome, canonico, n in zip(cache["nome_pessoa"], cache["nome_canonico"], ocorrencias):
+                self._canonico[nome] = canonico
+                self._ocorrencias[nome] = n
+                self._membros.setdefault(canonico, []).append(nome)
+                self._registrar(" ".join(normalizar_nome(nome)), canonico)
+
+    def semear(self, nomes):
+        """Registra como canônicos nomes que já têm chave (ex.: dim_pessoa de uma carga anterior)."""
+        for nome in nomes:
+            if nome not in self._canonico:
+                self._canonico[nome] = nome
+                self._membros[nome] = [nome]
+                self._registrar(" ".join(normalizar_nome(nome)), nome)
+
+    def resolver(self, nomes, ocorrencias=None):
+        """
+        Nome que representa a pessoa de cada nome de `nomes` (já em
+        init_cap), somando `ocorrencias` (uma contagem por nome; 1 se
+        omitidas) às ocorrências dele.
+        """
+        for nome, n in zip(nomes, ocorrencias if ocorrencias is not None else [1] * len(nomes)):
+            if nome not in self._canonico:
+                self._canonico[nome] = canonico = self._resolver_novo(nome)
+                self._membros.setdefault(canonico, []).append(nome)
+            self._ocorrencias[nome] = self._ocorrencias.get(nome, 0) + n
+            self._tocados.add(self._canonico[nome])
+        return [self._canonico[nome] for nome in nomes]
+
+    def eleger_canonicos(self):
+        """
+        Escolhe o canônico de cada pessoa com ocorrências novas: o nome mais
+        frequente entre os unidos a ela e, no empate, o menor em ordem
+        alfabética. Retorna {nome anterior: canônico eleito} das pessoas
+        cujo canônico mudou.
+        """
+        trocas = {}
+        for anterior in self._tocados:
+            membros = self._membros[anterior]
+            eleito = min(membros, key=lambda nome: (-self._ocorrencias.get(nome, 0), nome))
+            if eleito == anterior:
+                continue
+            trocas[anterior] = eleito
+            self._membros[eleito] = self._membros.pop(anterior)
+            for nome in membros:
+                self._canonico[nome] = eleito
+                chave = " ".join(normalizar_nome(nome))
+                if self._por_chave.get(chave) == anterior:
+                    self._por_chave[chave] = eleito
+        self._tocados.clear()
+        return trocas
+
+    def salvar_cache(self):
+        """Regrava `arquivo_cache` com todos os nomes vistos, na ordem em que foram vistos."""
+        if not self.arquivo_cache:
+            return
+        cache = pd.DataFrame({"nome_pessoa": list(self._canonico), "nome_canonico": list(self._canonico.values())})
+        cache["ocorrencias"] = cache["nome_pessoa"].map(self._ocorrencias).fillna(0).astype(int)
+        temporario = self.arquivo_cache + ".tmp"
+        cache.to_csv(temporario, index=False, encoding="utf-8-sig")
+        os.replace(temporario, self.arquivo_cache)
+
+    def _resolver_novo(self, nome):
+        palavras = normalizar_nome(nome)
+        if not palavras:
+            # sem letras nem dígitos, não há o que comparar
+            return nome
+        chave = " ".join(palavras)
+        if chave in self._por_chave:
+            self.unidos += 1
+            return self._por_chave[chave]
+
+        blocos = chaves_bloqueio(palavras)
+        candidatos = list(dict.fromkeys(c for bloco in blocos for c in self._blocos.get(bloco, ())))
+        parecido = next((c for c in _parecidos(chave, candidatos, self.limiar)
+                         if palavras_compativeis(chave, c, self.limiar)), None)
+        if parecido is not None:
+            self.unidos += 1
+            canonico = self._por_chave[parecido]
+        else:
+            canonico = nome
+        # a forma normalizada nova passa a levar direto ao canônico e entra nos blocos
+        self._registrar(chave, canonico, blocos)
+        return canonico
+
+    def _registrar(self, chave, canonico, blocos=None):
+        if not chave or chave in self._por_chave:
+            return
+        self._por_chave[chave] = canonico
+        for bloco in chaves_bloqueio(chave.split()) if blocos is None else blocos:
+            membros = self._blocos.setdefault(bloco, [])
+            if len(membros) < self.limite_bloco:
+                membros.append(chave)
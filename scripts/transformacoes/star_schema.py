@@ -4,93 +4,236 @@ Script ETL para Extrair, Transformar e Carregar dados de TCCs
 (Versão com Validação de Instituição baseada em Query SQL)
 """
 
+import argparse
 import sqlite3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 import re
 import time
-from sqlalchemy import create_engine
-import unicodedata
 from config import carregar_instituicoes
+from resolucao_pessoas import RAPIDFUZZ_DISPONIVEL, ResolvedorPessoas
 import os
 
 # Configuração
 RAW_DB_NAME = "integra.db"
 PROCESSED_DB_NAME = "datamart.db"
-PROCESSED_DB_ENGINE = f"sqlite:///{PROCESSED_DB_NAME}"
 
 # Arquivo para logar TCCs que foram descartados por falhas no mapeamento
 LOG_REJEITADOS_FILE = "log_tccs_rejeitados.csv"
 
+# Cache dos vereditos de validação por par (sigla, nome bruto da instituição), mantido entre execuções
+CACHE_VALIDACAO_FILE = "cache_validacao_instituicoes.csv"
+
+# Registros brutos lidos, validados e carregados por vez: limita a memória do ETL
+TAMANHO_LOTE = 20_000
+
+# Tabelas do Data Mart gravadas lote a lote (ver chavear_lote)
+TABELAS_LOTE = ('dim_campus', 'dim_curso', 'dim_pessoa', 'fato_tcc', 'ponte_tcc_aluno', 'ponte_tcc_orientador')
+
+# PRAGMAs da carga: o Data Mart é derivado do banco bruto e pode ser refeito,
+# então a durabilidade de cada escrita é trocada por velocidade. O journal
+# continua ativo: a carga é uma transação só e pode ser desfeita.
+PRAGMAS_CARGA = [
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256 MB
+    "PRAGMA locking_mode = EXCLUSIVE",
+]
+
+# Índices criados depois da carga, para os joins do preprocess.py
+INDICES_DATAMART = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_instituicao_id ON dim_instituicao (instituicao_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_campus_id ON dim_campus (campus_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_curso_id ON dim_curso (curso_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_pessoa_id ON dim_pessoa (pessoa_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_fato_tcc_id ON fato_tcc (tcc_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ponte_aluno_tcc ON ponte_tcc_aluno (tcc_id, aluno_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ponte_orientador_tcc ON ponte_tcc_orientador (tcc_id, orientador_id)",
+]
+
+# Tabela larga, já com os joins resolvidos, lida pelo preprocess.py: uma
+# linha por TCC com instituição, curso, alunos e orientador por extenso.
+# É atualizada junto com os fatos (só os tcc_id acima da marca d'água anterior).
+SQL_CRIAR_TCC_PLANO = """
+CREATE TABLE IF NOT EXISTS tcc_plano (
+    tcc_id INTEGER PRIMARY KEY,
+    titulo TEXT,
+    resumo TEXT,
+    ano TEXT,
+    instituicao TEXT,
+    curso TEXT,
+    autores TEXT,
+    orientador TEXT
+)
+"""
+_SQL_TCC_PLANO = """
+INSERT OR REPLACE INTO tcc_plano (tcc_id, titulo, resumo, ano, instituicao, curso, autores, orientador)
+SELECT
+    t.tcc_id,
+    t.titulo,
+    t.resumo,
+    t.ano,
+    i.sigla,
+    c.nome_curso,
+    (SELECT GROUP_CONCAT(p.nome_pessoa) FROM ponte_tcc_aluno pta
+     JOIN dim_pessoa p ON p.pessoa_id = pta.aluno_id WHERE pta.tcc_id = t.tcc_id),
+    (SELECT p.nome_pessoa FROM ponte_tcc_orientador pto
+     JOIN dim_pessoa p ON p.pessoa_id = pto.orientador_id WHERE pto.tcc_id = t.tcc_id)
+FROM fato_tcc t
+LEFT JOIN dim_instituicao i ON t.instituicao_id = i.instituicao_id
+LEFT JOIN dim_curso c ON t.curso_id = c.curso_id
+WHERE {filtro}
+ORDER BY t.tcc_id
+"""
+SQL_PREENCHER_TCC_PLANO = _SQL_TCC_PLANO.format(filtro="t.tcc_id > ?")
+# TCCs já na tabela cujos alunos ou orientador tiveram o nome canônico trocado (tabela temporária pessoas_renomeadas)
+SQL_RENOMEAR_TCC_PLANO = _SQL_TCC_PLANO.format(filtro="""t.tcc_id IN (
+    SELECT tcc_id FROM ponte_tcc_aluno WHERE aluno_id IN (SELECT pessoa_id FROM pessoas_renomeadas)
+    UNION SELECT tcc_id FROM ponte_tcc_orientador WHERE orientador_id IN (SELECT pessoa_id FROM pessoas_renomeadas))""")
+
+# Consulta de extração do banco bruto (id acima da marca d'água)
+SQL_EXTRAIR_TCCS = "SELECT *, instituicao as nome_tcc_bruto, sigla as sigla_alvo_coleta FROM tccs WHERE id > ?"
+# Só uma instituição: os ids são achados pelas tabelas do banco bruto (instituição -> professores -> TCCs),
+# usando o índice de tcc por professor, em vez de percorrer a view inteira a cada partição
+SQL_EXTRAIR_TCCS_INSTITUICAO = """
+    SELECT *, instituicao as nome_tcc_bruto, sigla as sigla_alvo_coleta FROM tccs WHERE id IN (
+        SELECT t.id FROM instituicao i CROSS JOIN professor p CROSS JOIN tcc t
+        WHERE p.instituicao_id = i.id AND t.professor_id = p.id AND t.id > ? AND i.sigla IS ?
+    ) ORDER BY id
+"""
+
+# Tabela do Data Mart com a marca d'água da carga incremental (último id bruto processado)
+TABELA_CONTROLE = "etl_controle"
+
 # Carregar instituições
 print("Carregando dicionário de instituições...")
 INSTITUICOES = carregar_instituicoes()
 
 #Funções Auxiliares
-def normalize_string(text):
+def normalizar_serie(series):
     """
-    Remove acentos, converte para minúsculas, remove caracteres não-ASCII
-    e corrige erros de digitação comuns de 'instituto'.
+    Versão vetorizada da normalização: remove acentos, converte para
+    minúsculas, remove caracteres não-ASCII e corrige erros de digitação
+    comuns de 'instituto'. Valores ausentes viram "".
     """
-    if not isinstance(text, str): return ""
-    text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('utf-8')
-    text = text.lower()
-    
-    # Corrige erros de digitação comuns para "instituto"
-    text = text.replace("instituicao", "instituto") # Handle 'instituição'
-    text = text.replace("institituto", "instituto") # Handle 'institituto'
-    text = text.replace("instituo", "instituto")    # Handle 'instituo'
-    
-    return text
+    return (series.fillna('').astype(str)
+            .str.normalize('NFD').str.encode('ascii', 'ignore').str.decode('utf-8')
+            .str.lower()
+            # Corrige erros de digitação comuns para "instituto"
+            .str.replace("instituicao", "instituto", regex=False)   # Handle 'instituição'
+            .str.replace("institituto", "instituto", regex=False)   # Handle 'institituto'
+            .str.replace("instituo", "instituto", regex=False))     # Handle 'instituo'
 
 def init_cap(series): 
     """Converte uma Série pandas para Title Case (primeira letra maiúscula)."""
     return series.astype(str).str.title().str.strip()
 
-def extrair_autores_orientador(autores_str):
-    """Separa a string de autores em uma lista de alunos e um orientador."""
-    if not isinstance(autores_str, str): return [], None
-    alunos, orientador = [], None
-    partes = [p.strip() for p in autores_str.split(',')]
-    for parte in partes:
-        if "(Orientador/a)" in parte: 
-            orientador = parte.replace("(Orientador/a)", "").strip()
-        else: 
-            alunos.append(parte)
+def separar_autores(autores):
+    """
+    Separa a coluna de autores em alunos e orientador numa única passada
+    vetorizada (split + explode). Retorna (alunos, orientador): `alunos` tem
+    um aluno por linha, com o índice da linha de origem; `orientador` é
+    alinhado a `autores` (o último nome marcado com "(Orientador/a)").
+    """
+    partes = autores.str.split(',').explode().str.strip()
+    e_orientador = partes.str.contains("(Orientador/a)", regex=False, na=False)
+    orientador = (partes[e_orientador].str.replace("(Orientador/a)", "", regex=False).str.strip()
+                  .groupby(level=0).last().reindex(autores.index))
+    alunos = partes[~e_orientador].dropna()
     return alunos, orientador
 
-def validar_tcc_rede_federal(row):
+def mapear_chaves(valores, existentes, coluna, coluna_id):
     """
-    Valida se o TCC pertence à rede federal, com base na lógica das queries SQL.
-    
+    Chave da dimensão para cada valor de `valores`, com uma única
+    fatoração: init_cap, a criação de membros e a busca das chaves rodam
+    uma vez por valor distinto. Retorna (chaves alinhadas a `valores`,
+    novos membros da dimensão); valores ausentes ficam sem chave (NaN).
+    """
+    codigos, unicos = pd.factorize(valores)
+    nomes = init_cap(pd.Series(unicos, dtype=object))
+    novos = novos_membros(nomes, existentes, coluna, coluna_id)
+    membros = pd.concat([existentes, novos])
+    mapa = pd.Series(membros[coluna_id].to_numpy(), index=membros[coluna].to_numpy())
+    # posição extra com NaN para o código -1 (valor ausente)
+    chaves_unicas = np.append(nomes.map(mapa).to_numpy(dtype=float), np.nan)
+    return pd.Series(chaves_unicas[codigos], index=valores.index), novos
+
+def resolver_pessoas(valores, resolvedor):
+    """
+    Troca cada nome de `valores` pelo nome que representa a pessoa (ver
+    ResolvedorPessoas), resolvendo uma vez por valor distinto e contando
+    as ocorrências de cada um. Valores ausentes continuam ausentes.
+    """
+    codigos, unicos = pd.factorize(valores)
+    ocorrencias = np.bincount(codigos[codigos >= 0], minlength=len(unicos)).tolist()
+    canonicos = resolvedor.resolver(init_cap(pd.Series(unicos, dtype=object)).tolist(), ocorrencias)
+    # posição extra com ausente para o código -1
+    return pd.Series(np.array(canonicos + [None], dtype=object)[codigos], index=valores.index)
+
+def validar_pares_rede_federal(pares):
+    """
+    Valida pares distintos (sigla_alvo_coleta, nome_tcc_bruto) da rede federal.
+
     Um TCC encontrado no site 'sigla_alvo_coleta' (ex: "IFB") é válido se
     o seu nome 'nome_tcc_bruto' (ex: "Institituto Federal de Brasília")
     contiver "instituto federal" (corrigido) OU a 'sigla_alvo' (normalizada).
-    
-    Retorna a sigla-alvo se for válido, ou None se for de outra instituição.
+    Pares sem sigla ou sem nome bruto não podem ser validados.
+
+    Retorna uma Série booleana alinhada a `pares`.
     """
-    sigla_alvo = row['sigla_alvo_coleta']
-    nome_bruto_tcc = row['nome_tcc_bruto']
-    
-    # Se não temos a sigla-alvo ou o nome bruto, não podemos validar
-    if pd.isna(sigla_alvo) or pd.isna(nome_bruto_tcc):
-        return None
-        
-    norm_text = normalize_string(nome_bruto_tcc)
-    norm_sigla = normalize_string(sigla_alvo)
+    norm_text = normalizar_serie(pares['nome_tcc_bruto'])
+    norm_sigla = normalizar_serie(pares['sigla_alvo_coleta'])
 
     # Check 1: (like '%INSTITUTO FEDERAL%') com typos corrigidos
-    is_general_federal = "instituto federal" in norm_text
-    
-    # Check 2: (like '%IFB%')
-    # Usamos f" {norm_sigla} " para evitar falsos positivos (ex: "PROJETO IF" não bateria "IF")
-    # Mas como o usuário usou LIKE '%IFB%', vamos manter a lógica de 'contém'
-    is_specific_sigla = norm_sigla in norm_text
-    
-    if is_general_federal or is_specific_sigla:
-        return sigla_alvo # SUCESSO! (Ex: "IFB" ou "Instituto Federal...")
-    
-    # FALHA: (ex: "Universidade de Brasilia" não contém "instituto federal" nem "ifb")
-    return None
+    is_general_federal = norm_text.str.contains("instituto federal", regex=False)
+
+    # Check 2: (like '%IFB%'), com a sigla de cada par
+    is_specific_sigla = pd.Series([s in t for s, t in zip(norm_sigla, norm_text)], index=pares.index)
+
+    completos = pares['sigla_alvo_coleta'].notna() & pares['nome_tcc_bruto'].notna()
+    return completos & (is_general_federal | is_specific_sigla)
+
+def carregar_cache_validacao(arquivo_cache=CACHE_VALIDACAO_FILE):
+    """Vereditos (sigla_alvo_coleta, nome_tcc_bruto, valido) gravados por execuções anteriores."""
+    if arquivo_cache and os.path.exists(arquivo_cache):
+        return pd.read_csv(arquivo_cache, dtype={'sigla_alvo_coleta': object, 'nome_tcc_bruto': object, 'valido': bool},
+                           keep_default_na=False, encoding='utf-8-sig')
+    return pd.DataFrame({'sigla_alvo_coleta': pd.Series(dtype=object), 'nome_tcc_bruto': pd.Series(dtype=object),
+                         'valido': pd.Series(dtype=bool)})
+
+def validar_tccs_rede_federal(df, cache):
+    """
+    Sigla-alvo de cada TCC validado, ou None se for de outra instituição.
+
+    A validação roda uma vez por par distinto (sigla, nome bruto), que são
+    poucos milhares mesmo com centenas de milhares de TCCs, e o veredito é
+    distribuído às linhas. Só os pares ausentes de `cache` (ver
+    carregar_cache_validacao) são validados.
+
+    Retorna (siglas validadas, vereditos dos pares inéditos).
+    """
+    chaves = ['sigla_alvo_coleta', 'nome_tcc_bruto']
+    pares = df[chaves].drop_duplicates()
+
+    # Pares com valor ausente não vão para o cache (o CSV não distingue ausente de vazio)
+    completos = pares[pares[chaves].notna().all(axis=1)]
+    novos = completos.merge(cache[chaves], on=chaves, how='left', indicator=True)
+    novos = novos.loc[novos['_merge'] == 'left_only', chaves].reset_index(drop=True)
+    novos['valido'] = validar_pares_rede_federal(novos)
+
+    vereditos = pd.concat([cache, novos], ignore_index=True).set_index(chaves)['valido']
+    valido = vereditos.reindex(pd.MultiIndex.from_frame(df[chaves])).fillna(False).to_numpy(dtype=bool)
+    return df['sigla_alvo_coleta'].where(valido, None), novos
+
+def registrar_vereditos(registro, novos, arquivo_cache=CACHE_VALIDACAO_FILE):
+    """Acrescenta vereditos inéditos ao registro da execução e ao cache em disco."""
+    if len(novos) == 0:
+        return
+    if arquivo_cache:
+        novos.to_csv(arquivo_cache, mode='a', index=False, header=not os.path.exists(arquivo_cache), encoding='utf-8-sig')
+    registro['validacao'] = pd.concat([registro['validacao'], novos], ignore_index=True)
 
 def logar_rejeitados(df_rejeitados, motivo_rejeicao, arquivo_log, modo='w'):
     """Salva os TCCs rejeitados em um CSV para análise posterior."""
@@ -108,132 +251,393 @@ def logar_rejeitados(df_rejeitados, motivo_rejeicao, arquivo_log, modo='w'):
     
     df_log.to_csv(arquivo_log, mode=modo, index=False, header=escrever_cabecalho, encoding='utf-8-sig')
 
-# --- Função Principal do ETL ---
+def tabela_existe(conn, tabela):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone() is not None
 
-def main():
-    start_time = time.time()
-    print("Iniciando processo ETL para o Star Schema (Validação por Query)")
-    
-    # Limpa o arquivo de log antigo, se existir
-    if os.path.exists(LOG_REJEITADOS_FILE):
-        os.remove(LOG_REJEITADOS_FILE)
+def ler_marca_dagua(conn):
+    """Último id da tabela bruta 'tccs' já processado (0 se o Data Mart ainda não existe)."""
+    if not tabela_existe(conn, TABELA_CONTROLE):
+        return 0
+    linha = conn.execute(f"SELECT ultimo_id FROM {TABELA_CONTROLE} WHERE tabela = 'tccs'").fetchone()
+    return int(linha[0]) if linha else 0
 
-    # 0. Preparar Mapa de Nomes (para a Dimensão)
-    map_nomes_completos = {sigla: valores[0] for sigla, valores in INSTITUICOES.items()}
+def ler_dimensao(conn, tabela, colunas):
+    """Membros já carregados de uma dimensão (vazio se a tabela não existe)."""
+    if not tabela_existe(conn, tabela):
+        return pd.DataFrame(columns=colunas)
+    return pd.read_sql(f"SELECT {', '.join(colunas)} FROM {tabela}", conn)
 
-    # 1. Extrair dados
-    print(f"\n1. Extraindo dados de '{RAW_DB_NAME}'...")
-    try:
-        with sqlite3.connect(RAW_DB_NAME) as conn:
-            # Assume que a coluna de sigla no BD bruto se chama 'sigla'
-            # e a coluna de nome bruto se chama 'instituicao'
-            query = "SELECT *, instituicao as nome_tcc_bruto, sigla as sigla_alvo_coleta FROM tccs"
-            df_raw = pd.read_sql_query(query, conn)
-        print(f"   - Total de registros brutos extraídos: {len(df_raw)}")
-    except Exception as e:
-        print(f"   - ERRO: Falha ao ler o banco de dados bruto '{RAW_DB_NAME}'.")
-        print(f"   - Detalhe: {e}")
-        print("   - Verifique se a coluna 'sigla' existe na tabela 'tccs'.")
-        return
+def _tipo_sqlite(series):
+    """Tipo da coluna no Data Mart, como o to_sql do pandas escolheria."""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    return "TEXT"
 
-    # 2. Transformar os dados
-    print("\n2. Transformando dados...")
+def _valores_sqlite(series):
+    """Valores Python da coluna (tolist converte os escalares numpy), com None no lugar de NaN."""
+    if series.hasnans:
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
 
-    df = df_raw.copy()
-    print(f"   - Registros para processar (sem filtro de nível): {len(df)}")
-    
-    # --- Criação da Dimensão Instituição ---
-    print("\n   - Criando Dimensão Instituição...")
-    df_instituicao = pd.DataFrame.from_dict(INSTITUICOES, orient='index', columns=['nome_completo', 'url', 'uf'])
-    df_instituicao['sigla'] = df_instituicao.index
-    df_instituicao['nome_completo'] = df_instituicao['sigla'].map(map_nomes_completos)
-    df_instituicao.reset_index(drop=True, inplace=True)
-    df_instituicao['instituicao_id'] = df_instituicao.index + 1
-    dim_instituicao = df_instituicao[['instituicao_id', 'sigla', 'nome_completo', 'uf', 'url']]
-    
+def carregar_tabela(conn, tabela, df, substituir=False):
+    """
+    Grava `df` em `tabela` com um único executemany, dentro da transação
+    aberta em `conn`. Com `substituir`, a tabela é recriada (como o
+    if_exists='replace' do to_sql); senão, é criada se faltar e recebe as
+    linhas ao final.
+    """
+    if substituir:
+        conn.execute(f'DROP TABLE IF EXISTS "{tabela}"')
+    colunas = ", ".join(f'"{c}" {_tipo_sqlite(df[c])}' for c in df.columns)
+    conn.execute(f'CREATE TABLE IF NOT EXISTS "{tabela}" ({colunas})')
+    nomes = ", ".join(f'"{c}"' for c in df.columns)
+    marcadores = ", ".join("?" * len(df.columns))
+    conn.executemany(f'INSERT INTO "{tabela}" ({nomes}) VALUES ({marcadores})',
+                     zip(*(_valores_sqlite(df[c]) for c in df.columns)))
+
+def novos_membros(valores, existentes, coluna, coluna_id):
+    """
+    Membros de `valores` que ainda não estão na dimensão `existentes`, em
+    ordem alfabética e com ids que continuam a partir do maior já usado:
+    as chaves de quem já foi carregado nunca mudam.
+    """
+    novos = pd.DataFrame({coluna: pd.Series(valores, dtype=object).drop_duplicates()})
+    novos = novos[~novos[coluna].isin(existentes[coluna])].sort_values(coluna)
+    inicio = int(existentes[coluna_id].max()) + 1 if len(existentes) else 1
+    novos[coluna_id] = range(inicio, inicio + len(novos))
+    return novos
+
+def salvar_marca_dagua(conn, ultimo_id):
+    carregar_tabela(conn, TABELA_CONTROLE, pd.DataFrame({'tabela': ['tccs'], 'ultimo_id': [ultimo_id],
+                                                         'atualizado_em': [time.strftime('%Y-%m-%dT%H:%M:%S')]}), substituir=True)
+
+def preparar_lote(df, cache_validacao):
+    """
+    Parte da transformação que não depende das chaves das dimensões:
+    validação da instituição e separação de alunos e orientador. Não
+    escreve nada, então pode rodar em outro processo (ver
+    preparar_instituicao). Retorna um dicionário com os registros
+    validados, os alunos, os rejeitados e os vereditos inéditos.
+    """
     # --- Validação da Instituição (Lógica Central) ---
-    print("   - Validando TCCs da Rede Federal (lógica SQL)...")
-    df['sigla_mapeada'] = df.apply(validar_tcc_rede_federal, axis=1)
-    
-    # Log de Rejeitados 1: Instituição Inválida
-    mapeados_com_sucesso = df['sigla_mapeada'].notna().sum()
-    df_rejeitados_inst = df[df['sigla_mapeada'].isna()]
-    logar_rejeitados(df_rejeitados_inst, "Instituição do TCC não parece ser da Rede Federal (ex: Universidade)", LOG_REJEITADOS_FILE, modo='w')
-    print(f"     - {mapeados_com_sucesso} de {len(df)} registros foram VALIDADOS como pertencentes à Rede Federal.")
-    
-    df.dropna(subset=['sigla_mapeada'], inplace=True)
-    if len(df) == 0: 
-        print("   - Nenhum registro validado. Encerrando.")
-        return
+    df['sigla_mapeada'], vereditos = validar_tccs_rede_federal(df, cache_validacao)
+    rejeitados = df[df['sigla_mapeada'].isna()]
+    df = df.dropna(subset=['sigla_mapeada'])
 
     # --- Continuação da Transformação ---
-    df['lista_alunos'] = df['autores'].apply(extrair_autores_orientador).apply(lambda x: x[0])
-    df['orientador'] = df['autores'].apply(extrair_autores_orientador).apply(lambda x: x[1])
-    
-    # --- Criação das outras Dimensões ---
-    print("   - Criando Dimensões Campus, Curso e Pessoa...")
-    dim_campus = pd.DataFrame(df['campus'].dropna().unique(), columns=['nome_campus']); dim_campus['nome_campus'] = init_cap(dim_campus['nome_campus']); dim_campus.sort_values('nome_campus', inplace=True); dim_campus['campus_id'] = range(1, len(dim_campus) + 1)
-    dim_curso = pd.DataFrame(df['curso'].dropna().unique(), columns=['nome_curso']); dim_curso['nome_curso'] = init_cap(dim_curso['nome_curso']); dim_curso['nivel'] = 'N/A'; dim_curso.sort_values('nome_curso', inplace=True); dim_curso['curso_id'] = range(1, len(dim_curso) + 1)
-    pessoas_unicas = pd.concat([df['lista_alunos'].explode(), df['orientador']]).dropna().unique(); dim_pessoa = pd.DataFrame(pessoas_unicas, columns=['nome_pessoa']); dim_pessoa['nome_pessoa'] = init_cap(dim_pessoa['nome_pessoa']); dim_pessoa.sort_values('nome_pessoa', inplace=True); dim_pessoa['pessoa_id'] = range(1, len(dim_pessoa) + 1)
-    
-    print("\n   - Criando Tabela Fato e Pontes...")
-    df['tcc_id'] = range(1, len(df) + 1)
-    
-    # Criar mapas de chaves (FKs)
-    map_instituicao = pd.Series(dim_instituicao.instituicao_id.values, index=dim_instituicao.sigla).to_dict()
-    map_campus = pd.Series(dim_campus.campus_id.values, index=dim_campus.nome_campus).to_dict()
-    map_curso = pd.Series(dim_curso.curso_id.values, index=dim_curso.nome_curso).to_dict()
-    map_pessoa = pd.Series(dim_pessoa.pessoa_id.values, index=dim_pessoa.nome_pessoa).to_dict()
-
-    # Mapear chaves estrangeiras
-    df['instituicao_id'] = df['sigla_mapeada'].map(map_instituicao)
-    df['campus_id'] = init_cap(df['campus']).map(map_campus)
-    df['curso_id'] = init_cap(df['curso']).map(map_curso)
-    
+    alunos = None
+    if len(df):
+        alunos, orientador = separar_autores(df['autores'])
+        df = df.assign(orientador=orientador)
+    return {'df': df, 'alunos': alunos, 'rejeitados': rejeitados, 'vereditos': vereditos}
+
+def preparar_instituicao(raw_db, sigla, marca_dagua, cache_validacao):
+    """
+    Lê do banco bruto os registros novos de uma instituição e os prepara
+    (preparar_lote). Roda nos processos do pool da execução paralela.
+    Retorna (registros lidos, maior id lido, lote preparado).
+    """
+    conn = sqlite3.connect(raw_db)
+    try:
+        df = pd.read_sql_query(SQL_EXTRAIR_TCCS_INSTITUICAO, conn, params=(marca_dagua, sigla))
+    finally:
+        conn.close()
+    return len(df), int(df['id'].max()) if len(df) else marca_dagua, preparar_lote(df, cache_validacao)
+
+def _em_ordem(pool, funcao, argumentos, janela):
+    """
+    Resultados de `funcao` para cada tupla de `argumentos`, na ordem de
+    entrada, com no máximo `janela` tarefas submetidas ao pool por vez
+    (limita os resultados prontos à espera do processo principal).
+    """
+    pendentes = deque()
+    for args in argumentos:
+        pendentes.append(pool.submit(funcao, *args))
+        if len(pendentes) >= janela:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+def chavear_lote(preparado, registro):
+    """
+    Conclui a transformação de um lote preparado por preparar_lote.
+
+    `registro` guarda o estado que atravessa os lotes: o cache de
+    validação e as chaves já atribuídas em cada dimensão. Os membros novos
+    do lote recebem chaves a partir das existentes e são acrescentados ao
+    registro. Retorna as tabelas do lote (dimensões só com os membros
+    novos, fato e pontes), ou None se nenhum registro foi validado.
+    """
+    registrar_vereditos(registro, preparado['vereditos'])
+
+    # Log de Rejeitados 1: Instituição Inválida
+    logar_rejeitados(preparado['rejeitados'], "Instituição do TCC não parece ser da Rede Federal (ex: Universidade)", LOG_REJEITADOS_FILE, modo='a')
+
+    df, alunos = preparado['df'], preparado['alunos']
+    if len(df) == 0:
+        return None
+
+    # --- Criação das outras Dimensões (só os membros ainda não registrados) ---
+    ids_campus, dim_campus = mapear_chaves(df['campus'], registro['campus'], 'nome_campus', 'campus_id')
+    ids_curso, dim_curso = mapear_chaves(df['curso'], registro['curso'], 'nome_curso', 'curso_id')
+    # alunos e orientadores compartilham a dimensão: uma fatoração para os dois
+    pessoas = pd.concat([alunos, df['orientador']], ignore_index=True)
+    if registro['resolvedor'] is not None:
+        # variantes de grafia da mesma pessoa recebem a chave do nome canônico
+        pessoas = resolver_pessoas(pessoas, registro['resolvedor'])
+    ids_pessoa, dim_pessoa = mapear_chaves(pessoas, registro['pessoa'], 'nome_pessoa', 'pessoa_id')
+    alunos_ids = pd.Series(ids_pessoa.to_numpy()[:len(alunos)], index=alunos.index)
+    orientador_ids = pd.Series(ids_pessoa.to_numpy()[len(alunos):], index=df.index)
+    registro['campus'] = pd.concat([registro['campus'], dim_campus], ignore_index=True)
+    registro['curso'] = pd.concat([registro['curso'], dim_curso], ignore_index=True)
+    registro['pessoa'] = pd.concat([registro['pessoa'], dim_pessoa], ignore_index=True)
+    dim_curso.insert(1, 'nivel', 'N/A')
+
+    # O id bruto é a chave do fato: estável entre cargas completas e incrementais
+    df['tcc_id'] = df['id']
+
+    # Mapear chaves estrangeiras (campus e curso já vieram da fatoração)
+    df['instituicao_id'] = df['sigla_mapeada'].map(registro['instituicao'])
+    df['campus_id'] = ids_campus
+    df['curso_id'] = ids_curso
+
     # --- Filtro 2: Garantia de Integridade das Dimensões ---
-    print("\n   - ETAPA DE FILTRO 2: Garantia de Integridade das Dimensões (Campus/Curso)")
     colunas_fk = ['instituicao_id', 'campus_id', 'curso_id']
-    
+
     # Log de Rejeitados 2: Campus/Curso Nulos (ex: nome de campus não mapeado)
-    df_rejeitados_fk = df[df[colunas_fk].isna().any(axis=1)]
+    df_rejeitados_fk = df[df[colunas_fk].isna().any(axis=1)].copy()
+    # lista de alunos só para o log, montada apenas para as linhas rejeitadas
+    lista_alunos = alunos[alunos.index.isin(df_rejeitados_fk.index)].groupby(level=0).agg(list)
+    df_rejeitados_fk.insert(df.columns.get_loc('orientador'), 'lista_alunos', [lista_alunos.get(i, []) for i in df_rejeitados_fk.index])
     logar_rejeitados(df_rejeitados_fk, "Falha ao mapear FK (Campus ou Curso nulo/inválido)", LOG_REJEITADOS_FILE, modo='a')
 
     df.dropna(subset=colunas_fk, inplace=True)
-    print(f"     - Registros restantes após garantir mapeamento FK: {len(df)}")
-    
+    df[colunas_fk] = df[colunas_fk].astype('int64')
+
     # --- Montagem Final das Tabelas ---
-    fato_tcc = df[['tcc_id', 'titulo', 'resumo', 'palavras_chaves', 'ano', 'curso_id', 'instituicao_id', 'campus_id']]
-    
-    ponte_tcc_aluno = df[['tcc_id', 'lista_alunos']].explode('lista_alunos').rename(columns={'lista_alunos': 'nome_pessoa'})
-    ponte_tcc_aluno['aluno_id'] = init_cap(ponte_tcc_aluno['nome_pessoa']).map(map_pessoa)
-    ponte_tcc_aluno = ponte_tcc_aluno[['tcc_id', 'aluno_id']].dropna()
-    
-    ponte_tcc_orientador = df[['tcc_id', 'orientador']].rename(columns={'orientador': 'nome_pessoa'})
-    ponte_tcc_orientador['orientador_id'] = init_cap(ponte_tcc_orientador['nome_pessoa']).map(map_pessoa)
-    ponte_tcc_orientador = ponte_tcc_orientador[['tcc_id', 'orientador_id']].dropna()
+    return {
+        'dim_campus': dim_campus,
+        'dim_curso': dim_curso,
+        'dim_pessoa': dim_pessoa,
+        'fato_tcc': df[['tcc_id', 'titulo', 'resumo', 'palavras_chaves', 'ano', 'curso_id', 'instituicao_id', 'campus_id']],
+        # Pontes: as chaves de pessoa já estão alinhadas às linhas de origem
+        'ponte_tcc_aluno': pd.DataFrame({'tcc_id': df['tcc_id'].reindex(alunos.index), 'aluno_id': alunos_ids}).dropna().astype('int64'),
+        'ponte_tcc_orientador': pd.DataFrame({'tcc_id': df['tcc_id'], 'orientador_id': orientador_ids.reindex(df.index)}).dropna().astype('int64'),
+    }
+
+# --- Função Principal do ETL ---
+
+def main(incremental=False, tamanho_lote=TAMANHO_LOTE, processos=0, resolver_nomes=True):
+    """
+    Executa o ETL. Na carga completa, o Data Mart é recriado. Na
+    incremental, só os registros brutos com id acima da marca d'água são
+    processados: novos membros de dimensão recebem ids a partir do maior
+    existente e fatos e pontes são acrescentados. Os TCCs brutos só são
+    inseridos (nunca atualizados), então id acima da marca = registro novo.
+    O tcc_id do Data Mart é o id bruto, estável entre as cargas.
 
-    # 3. Carregar dados no Data Mart
-    print(f"\n3. Carregando {len(fato_tcc)} registros no Data Mart '{PROCESSED_DB_NAME}'...")
-    engine = create_engine(PROCESSED_DB_ENGINE)
+    O banco bruto é lido em lotes de `tamanho_lote` registros, cada um
+    validado, transformado e gravado antes do próximo: a memória fica
+    limitada pelo lote e pelas dimensões, não pelo tamanho do banco.
+
+    Com `processos` >= 1, os registros são particionados por instituição
+    (sigla_alvo_coleta) e as partições são validadas e separadas em
+    alunos/orientador num pool de `processos` processos. As chaves das
+    dimensões continuam sendo atribuídas só no processo principal, que
+    consome as partições na ordem das siglas: para qualquer `processos`
+    >= 1, os ids não dependem do número de processos nem da ordem em que
+    as partições terminam. A execução sequencial (processos=0) atribui as
+    chaves na ordem dos ids brutos, então as chaves substitutas diferem
+    das do pool; o conteúdo das linhas é o mesmo.
+
+    Com `resolver_nomes`, variantes de grafia de uma mesma pessoa viram um
+    só membro de dim_pessoa (ver resolucao_pessoas.py), com o nome mais
+    frequente entre elas; sem, a dimensão une só nomes idênticos após
+    init_cap.
+    """
+    start_time = time.time()
+    # autocommit: a transação da carga é aberta e fechada explicitamente
+    conn = sqlite3.connect(PROCESSED_DB_NAME, isolation_level=None)
+    if incremental and not tabela_existe(conn, TABELA_CONTROLE):
+        # Data Mart inexistente ou de uma versão sem marca d'água: acrescentar duplicaria os fatos
+        print("Data Mart sem marca d'água; executando a carga completa.")
+        incremental = False
+    modo_carga = 'append' if incremental else 'replace'
+    print(f"Iniciando processo ETL para o Star Schema (Validação por Query, carga {'incremental' if incremental else 'completa'})")
     
+    # Limpa o arquivo de log antigo, se existir (a carga incremental acrescenta a ele)
+    if not incremental and os.path.exists(LOG_REJEITADOS_FILE):
+        os.remove(LOG_REJEITADOS_FILE)
+
+    marca_dagua = ler_marca_dagua(conn) if incremental else 0
+
+    # 0. Preparar Mapa de Nomes (para a Dimensão)
+    map_nomes_completos = {sigla: valores[0] for sigla, valores in INSTITUICOES.items()}
+
+    # --- Criação da Dimensão Instituição ---
+    print("\n0. Criando Dimensão Instituição...")
+    # Só os três primeiros campos; um 4º (opções de coleta) é ignorado aqui
+    df_instituicao = pd.DataFrame.from_dict({s: v[:3] for s, v in INSTITUICOES.items()}, orient='index', columns=['nome_completo', 'url', 'uf'])
+    df_instituicao['sigla'] = df_instituicao.index
+    df_instituicao['nome_completo'] = df_instituicao['sigla'].map(map_nomes_completos)
+    df_instituicao.reset_index(drop=True, inplace=True)
+    existentes_instituicao = ler_dimensao(conn, 'dim_instituicao', ['instituicao_id', 'sigla']) if incremental else pd.DataFrame(columns=['instituicao_id', 'sigla'])
+    if incremental:
+        # instituições novas na lista entram no fim, sem renumerar as antigas
+        df_instituicao = df_instituicao[~df_instituicao['sigla'].isin(existentes_instituicao['sigla'])].reset_index(drop=True)
+    inicio = int(existentes_instituicao['instituicao_id'].max()) + 1 if len(existentes_instituicao) else 1
+    df_instituicao['instituicao_id'] = df_instituicao.index + inicio
+    dim_instituicao = df_instituicao[['instituicao_id', 'sigla', 'nome_completo', 'uf', 'url']]
+
+    # Registro de chaves que atravessa os lotes; na carga completa, as dimensões começam vazias
+    # (quadros vazios ficam fora do concat: o pandas descontinuou concatená-los)
+    partes = [d[['sigla', 'instituicao_id']] for d in (existentes_instituicao, dim_instituicao) if not d.empty]
+    instituicoes = pd.concat(partes) if partes else existentes_instituicao
+    registro = {
+        'validacao': carregar_cache_validacao(),
+        'instituicao': dict(zip(instituicoes.sigla, instituicoes.instituicao_id)),
+        'campus': ler_dimensao(conn, 'dim_campus', ['nome_campus', 'campus_id']) if incremental else pd.DataFrame(columns=['nome_campus', 'campus_id']),
+        'curso': ler_dimensao(conn, 'dim_curso', ['nome_curso', 'curso_id']) if incremental else pd.DataFrame(columns=['nome_curso', 'curso_id']),
+        'pessoa': ler_dimensao(conn, 'dim_pessoa', ['nome_pessoa', 'pessoa_id']) if incremental else pd.DataFrame(columns=['nome_pessoa', 'pessoa_id']),
+        # a carga completa recomeça a contagem de ocorrências de cada nome
+        'resolvedor': ResolvedorPessoas(acumular=incremental) if resolver_nomes else None,
+    }
+    if resolver_nomes:
+        if not RAPIDFUZZ_DISPONIVEL:
+            print("   - AVISO: rapidfuzz não instalado; a resolução de pessoas usa o difflib (mais lenta, e pode unir outros nomes).")
+        # pessoas já carregadas mantêm a chave: entram como canônicas
+        registro['resolvedor'].semear(registro['pessoa']['nome_pessoa'])
+
+    # 1. Extrair dados
+    conn_bruto = sqlite3.connect(RAW_DB_NAME)
+    pool = None
     try:
-        dim_instituicao.to_sql('dim_instituicao', engine, if_exists='replace', index=False)
-        dim_campus.to_sql('dim_campus', engine, if_exists='replace', index=False)
-        dim_curso.to_sql('dim_curso', engine, if_exists='replace', index=False)
-        dim_pessoa.to_sql('dim_pessoa', engine, if_exists='replace', index=False)
-        fato_tcc.to_sql('fato_tcc', engine, if_exists='replace', index=False)
-        ponte_tcc_aluno.to_sql('ponte_tcc_aluno', engine, if_exists='replace', index=False)
-        ponte_tcc_orientador.to_sql('ponte_tcc_orientador', engine, if_exists='replace', index=False)
-        
-        print("   - Carga de dados concluída.")
-    
+        # Assume que a coluna de sigla no BD bruto se chama 'sigla'
+        # e a coluna de nome bruto se chama 'instituicao'
+        if processos:
+            siglas = [s for (s,) in conn_bruto.execute("SELECT DISTINCT sigla FROM tccs WHERE id > ?", (marca_dagua,))]
+            # Ordem fixa das partições (sem sigla por último): é ela que define as chaves
+            siglas.sort(key=lambda s: (s is None, s or ''))
+            print(f"\n1. Extraindo dados de '{RAW_DB_NAME}' em {len(siglas)} partições por instituição, com {processos} processo(s) (id > {marca_dagua})...")
+            argumentos = ((RAW_DB_NAME, sigla, marca_dagua, registro['validacao'][registro['validacao']['sigla_alvo_coleta'] == sigla])
+                          for sigla in siglas)
+            if processos == 1:
+                resultados = (preparar_instituicao(*args) for args in argumentos)
+            else:
+                pool = ProcessPoolExecutor(max_workers=processos)
+                resultados = _em_ordem(pool, preparar_instituicao, argumentos, janela=2 * processos)
+            particoes = ((sigla or 'sem sigla', *resultado) for sigla, resultado in zip(siglas, resultados))
+        else:
+            print(f"\n1. Extraindo dados de '{RAW_DB_NAME}' em lotes de {tamanho_lote} registros (id > {marca_dagua})...")
+            lotes = pd.read_sql_query(SQL_EXTRAIR_TCCS + " ORDER BY id", conn_bruto, params=(marca_dagua,), chunksize=tamanho_lote)
+            # sem registros novos, o pandas ainda entrega um lote vazio
+            particoes = ((f"Lote {numero}", len(df), int(df['id'].max()), preparar_lote(df, registro['validacao']))
+                         for numero, df in enumerate(lotes, start=1) if not df.empty)
     except Exception as e:
+        conn_bruto.close()
+        conn.close()
+        print(f"   - ERRO: Falha ao ler o banco de dados bruto '{RAW_DB_NAME}'.")
+        print(f"   - Detalhe: {e}")
+        print("   - Verifique se a coluna 'sigla' existe na tabela 'tccs'.")
+        return
+
+    # 2. Transformar e 3. carregar, lote a lote
+    print(f"\n2. Transformando e carregando no Data Mart '{PROCESSED_DB_NAME}'...")
+    totais = {'brutos': 0, 'carregados': 0, 'dim_campus': 0, 'dim_curso': 0, 'dim_pessoa': 0}
+    nova_marca_dagua = marca_dagua
+    tempo_escrita = 0.0
+    try:
+        for pragma in PRAGMAS_CARGA:
+            conn.execute(pragma)
+        # Uma única transação: a marca d'água só avança junto com os dados
+        conn.execute("BEGIN")
+        carregar_tabela(conn, 'dim_instituicao', dim_instituicao, substituir=not incremental)
+        if not incremental:
+            # Recriadas pelos lotes: sem nenhum lote válido, não sobra tabela da carga anterior
+            for nome in (*TABELAS_LOTE, 'tcc_plano'):
+                conn.execute(f'DROP TABLE IF EXISTS "{nome}"')
+        for rotulo, brutos, max_id, preparado in particoes:
+            nova_marca_dagua = max(nova_marca_dagua, max_id)
+            totais['brutos'] += brutos
+            tabelas = chavear_lote(preparado, registro)
+            if tabelas is None:
+                print(f"   - {rotulo}: {brutos} registros brutos, nenhum validado.")
+                continue
+            inicio_escrita = time.perf_counter()
+            for nome, tabela in tabelas.items():
+                carregar_tabela(conn, nome, tabela)
+            tempo_escrita += time.perf_counter() - inicio_escrita
+            for nome in ('dim_campus', 'dim_curso', 'dim_pessoa'):
+                totais[nome] += len(tabelas[nome])
+            totais['carregados'] += len(tabelas['fato_tcc'])
+            print(f"   - {rotulo}: {brutos} registros brutos, {len(tabelas['fato_tcc'])} carregados "
+                  f"(novos: {len(tabelas['dim_campus'])} campi, {len(tabelas['dim_curso'])} cursos, {len(tabelas['dim_pessoa'])} pessoas).")
+        salvar_marca_dagua(conn, nova_marca_dagua)
+
+        # Índices só depois das linhas: construí-los de uma vez custa menos que mantê-los a cada INSERT
+        inicio_indices = time.perf_counter()
+        if all(tabela_existe(conn, t) for t in ('dim_instituicao', *TABELAS_LOTE)):
+            for indice in INDICES_DATAMART:
+                conn.execute(indice)
+            # Com todas as ocorrências contadas, cada pessoa fica com o nome mais frequente (mesma chave)
+            trocas = registro['resolvedor'].eleger_canonicos() if resolver_nomes else {}
+            if trocas:
+                ids_pessoa = registro['pessoa'].set_index('nome_pessoa')['pessoa_id']
+                renomeadas = [(novo, int(ids_pessoa[anterior])) for anterior, novo in trocas.items()]
+                conn.executemany("UPDATE dim_pessoa SET nome_pessoa = ? WHERE pessoa_id = ?", renomeadas)
+                print(f"   - Resolução de pessoas: {len(renomeadas)} pessoas com o nome canônico trocado.")
+            # Tabela larga: recriada na carga completa, acrescida dos TCCs novos na incremental
+            inicio_plano = time.perf_counter()
+            conn.execute(SQL_CRIAR_TCC_PLANO)
+            # Sem a tabela (Data Mart anterior a ela), a incremental a preenche por inteiro
+            desde = marca_dagua if incremental and conn.execute("SELECT 1 FROM tcc_plano LIMIT 1").fetchone() else 0
+            linhas_plano = conn.execute(SQL_PREENCHER_TCC_PLANO, (desde,)).rowcount
+            if desde and trocas:
+                conn.execute("CREATE TEMP TABLE pessoas_renomeadas (pessoa_id INTEGER PRIMARY KEY)")
+                conn.executemany("INSERT INTO pessoas_renomeadas VALUES (?)", ((pessoa_id,) for _, pessoa_id in renomeadas))
+                linhas_plano += conn.execute(SQL_RENOMEAR_TCC_PLANO).rowcount
+            print(f"   - Tabela tcc_plano: {linhas_plano} linhas em {time.perf_counter() - inicio_plano:.2f}s.")
+        conn.execute("COMMIT")
+        if resolver_nomes:
+            # só depois do COMMIT: uma carga desfeita não deixa resoluções no cache
+            registro['resolvedor'].salvar_cache()
+        # Estatísticas para o planejador: completas após a recriação, incrementais (optimize) após acréscimos
+        conn.execute("PRAGMA optimize" if incremental else "ANALYZE")
+        print(f"   - Escrita: {tempo_escrita:.2f}s; índices, tabela larga e estatísticas: {time.perf_counter() - inicio_indices:.2f}s.")
+    except Exception as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
         print(f"   - ERRO: Falha ao carregar dados no Data Mart.")
         print(f"   - Detalhe: {e}")
         return
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        conn_bruto.close()
+        conn.close()
+
+    if totais['brutos'] == 0:
+        print("   - Nenhum registro novo desde a última carga." if incremental else "   - Nenhum registro no banco bruto.")
+    else:
+        print(f"   - Carga de dados concluída: {totais['carregados']} de {totais['brutos']} registros brutos; novos membros: "
+              f"{totais['dim_campus']} campi, {totais['dim_curso']} cursos, {totais['dim_pessoa']} pessoas (marca d'água: id {nova_marca_dagua}).")
+        if resolver_nomes:
+            print(f"   - Resolução de pessoas: {registro['resolvedor'].unidos} variantes de nome unidas a um nome já registrado.")
 
     end_time = time.time()
     print(f"\n--- Processo ETL finalizado em {end_time - start_time:.2f} segundos. ---")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="ETL do banco bruto para o Star Schema do Data Mart")
+    parser.add_argument("--incremental", action="store_true",
+                        help="processa só os TCCs brutos novos desde a última carga")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE,
+                        help="registros brutos lidos e transformados por vez")
+    parser.add_argument("--processos", type=int, default=0,
+                        help="transforma as instituições em paralelo nesse número de processos (padrão: 0, lotes sequenciais)")
+    parser.add_argument("--sem-resolucao", action="store_true",
+                        help="não une variantes de grafia dos nomes de pessoas (só nomes idênticos)")
+    args = parser.parse_args()
+    main(incremental=args.incremental, tamanho_lote=args.lote, processos=args.processos, resolver_nomes=not args.sem_resolucao)
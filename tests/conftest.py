@@ -0,0 +1,28 @@
+# tests/conftest.py
+
+import importlib
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+
+# scripts/extracao e scripts/transformacoes usam imports diretos e cada uma
+# tem o seu config.py: o módulo "config" certo é posto em sys.modules
+# enquanto os módulos de cada pasta são importados.
+_configs = {}
+
+def importar(pasta, *nomes):
+    """Importa os módulos `nomes` de scripts/<pasta>, com o config.py da pasta."""
+    caminho = str(SCRIPTS / pasta)
+    anterior = sys.modules.pop("config", None)
+    if _configs.get(pasta) is not None:
+        sys.modules["config"] = _configs[pasta]
+    sys.path.insert(0, caminho)
+    try:
+        modulos = tuple(importlib.import_module(nome) for nome in nomes)
+    finally:
+        sys.path.remove(caminho)
+        _configs[pasta] = sys.modules.pop("config", None)
+        if anterior is not None:
+            sys.modules["config"] = anterior
+    return modulos[0] if len(modulos) == 1 else modulos
@@ -0,0 +1,65 @@
+# tests/test_fila_trabalho.py
+
+from contextlib import closing
+
+import pytest
+
+from conftest import importar
+
+fila_trabalho = importar("extracao", "fila_trabalho")
+
+RUN = 1
+
+@pytest.fixture
+def fila(tmp_path):
+    f = fila_trabalho.FilaTrabalho(str(tmp_path / "fila.db"))
+    f.init_db()
+    f.enfileirar(RUN, [
+        ("IFB", "detalhe", "0", {"slugs": ["ana", "bia"]}),
+        ("IFB", "listagem", "IFB", {}),
+    ])
+    return f
+
+def _status(fila):
+    with closing(fila._get_connection()) as conn:
+        return dict(conn.execute("SELECT tipo, status FROM fila_unidades"))
+
+def test_reenfileirar_e_idempotente(fila):
+    fila.enfileirar(RUN, [("IFB", "listagem", "IFB", {"outra": "carga"})])
+    assert fila.restantes(RUN) == 2
+    assert fila.reivindicar(RUN, "w1", 10)[0]["carga"] == {}
+
+def test_listagem_sai_antes_dos_detalhes(fila):
+    assert [u["tipo"] for u in fila.reivindicar(RUN, "w1", 10)] == ["listagem", "detalhe"]
+    assert fila.reivindicar(RUN, "w2", 10) == []
+
+def test_lease_vencido_volta_para_outro_worker(fila):
+    primeira = fila.reivindicar(RUN, "w1", 1, lease=-1)
+    segunda = fila.reivindicar(RUN, "w2", 1)
+    assert [u["id"] for u in segunda] == [u["id"] for u in primeira]
+
+    # O dono anterior não renova nem conclui uma unidade que já foi reentregue
+    fila.renovar("w1", [primeira[0]["id"]])
+    fila.concluir("w1", primeira[0]["id"])
+    assert _status(fila)["listagem"] == "em_andamento"
+    assert fila.reivindicar(RUN, "w3", 1)[0]["tipo"] == "detalhe"
+
+    fila.concluir("w2", primeira[0]["id"])
+    assert fila.resumo(RUN) == {"listagem": {"concluida": 1}, "detalhe": {"em_andamento": 1}}
+
+def test_lease_renovado_nao_e_reentregue(fila):
+    unidades = fila.reivindicar(RUN, "w1", 10, lease=-1)
+    fila.renovar("w1", [u["id"] for u in unidades], lease=60)
+    assert fila.reivindicar(RUN, "w2", 10) == []
+
+def test_reabrir_devolve_com_carga_reduzida_ate_esgotar_tentativas(fila):
+    fila.reivindicar(RUN, "w1", 1)  # listagem
+    for tentativa in range(1, 4):
+        detalhe, = fila.reivindicar(RUN, "w1", 1)
+        assert detalhe["tipo"] == "detalhe"
+        fila.reabrir("w1", detalhe["id"], "timeout", carga={"slugs": ["bia"]}, max_tentativas=3)
+        esperado = "falhou" if tentativa == 3 else "pendente"
+        assert _status(fila)["detalhe"] == esperado
+    assert detalhe["carga"] == {"slugs": ["bia"]}
+    assert fila.reivindicar(RUN, "w1", 1) == []
+    assert fila.restantes(RUN) == 1  # só a listagem, ainda em andamento
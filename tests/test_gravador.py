@@ -0,0 +1,113 @@
+# tests/test_gravador.py
+
+import asyncio
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+
+from conftest import importar
+
+database, gravador = importar("extracao", "database", "gravador")
+
+META = "SELECT hash_corpo FROM coleta_meta WHERE sigla = ? AND slug = ?"
+
+def _meta(slug, hash_corpo):
+    return ("IFB", slug, "2025-01-01T00:00:00", hash_corpo, None, None, 0.1, 100)
+
+def _tcc(slug, titulo):
+    return (slug, "Ana Lima", "IFB", "Instituto Federal de Brasília", "DF", "Campus Gama", "2021",
+            "Engenharia", "Bia Souza, Ana Lima (Orientador/a)", titulo, "resumo", "a; b")
+
+def _consultar(db, sql, params=()):
+    with closing(sqlite3.connect(db)) as conn:
+        return conn.execute(sql, params).fetchall()
+
+def _esperar(condicao, limite=5.0):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, "condição não atingida a tempo"
+        time.sleep(0.01)
+
+@pytest.fixture
+def db(tmp_path):
+    caminho = str(tmp_path / "integra.db")
+    database.DatabaseManager(caminho).init_db()
+    return caminho
+
+def test_escritas_gravadas_na_ordem_de_envio(db):
+    async def cenario():
+        g = gravador.GravadorSQLite(db, tamanho_lote=3, intervalo=60).iniciar()
+        for i in range(20):
+            await g.salvar_meta_coleta([_meta("ana-lima", f"h{i}")])
+        await g.fechar()
+        return g
+
+    g = asyncio.run(cenario())
+    # Vários lotes, e o último upsert enviado é o que fica
+    assert _consultar(db, META, ("IFB", "ana-lima")) == [("h19",)]
+    assert g.linhas_gravadas == 20
+    assert g.transacoes == 7
+
+def test_detalhe_antes_da_listagem(db):
+    professor = {"nome": "Ana Lima", "campus": "Campus Gama", "cargo": "Professora", "slug": "ana-lima",
+                 "url_final": "https://exemplo/ana-lima"}
+
+    async def cenario():
+        g = gravador.GravadorSQLite(db, tamanho_lote=1, intervalo=60).iniciar()
+        await g.salvar_tccs([_tcc("ana-lima", "Primeiro")])
+        await g.salvar_professores("IFB", [professor])
+        await g.fechar()
+
+    asyncio.run(cenario())
+    assert _consultar(db, "SELECT slug, cargo FROM professores") == [("ana-lima", "Professora")]
+    assert _consultar(db, "SELECT slug_professor, titulo, ano FROM tccs") == [("ana-lima", "Primeiro", "2021")]
+
+def test_lote_gravado_apos_o_intervalo(db):
+    async def cenario():
+        g = gravador.GravadorSQLite(db, tamanho_lote=1000, intervalo=0.05).iniciar()
+        await g.salvar_meta_coleta([_meta("ana-lima", "h1")])
+        # Lote bem abaixo de tamanho_lote: só o intervalo o grava antes do fechamento
+        await asyncio.to_thread(_esperar, lambda: _consultar(db, META, ("IFB", "ana-lima")))
+        await g.fechar()
+
+    asyncio.run(cenario())
+
+def test_falha_desfaz_o_lote_inteiro(db):
+    async def cenario():
+        g = gravador.GravadorSQLite(db, tamanho_lote=1000, intervalo=60).iniciar()
+        await g.salvar_meta_coleta([_meta("ana-lima", "h1")])
+        await g.salvar_estado_slugs([(1, "IFB", "ana-lima", "invalido")])  # viola o CHECK de status
+        with pytest.raises(RuntimeError, match="Gravador SQLite falhou"):
+            await g.fechar()
+
+    asyncio.run(cenario())
+    assert _consultar(db, META, ("IFB", "ana-lima")) == []
+
+def test_falha_preserva_lotes_anteriores_e_recusa_novos(db):
+    async def cenario():
+        g = gravador.GravadorSQLite(db, tamanho_lote=1, intervalo=60).iniciar()
+        await g.salvar_meta_coleta([_meta("ana-lima", "h1")])
+        await g.salvar_estado_slugs([(1, "IFB", "ana-lima", "invalido")])
+        await asyncio.to_thread(_esperar, lambda: g.erro is not None)
+        with pytest.raises(RuntimeError, match="Gravador SQLite falhou"):
+            await g.salvar_meta_coleta([_meta("bia-souza", "h2")])
+        with pytest.raises(RuntimeError, match="Gravador SQLite falhou"):
+            await g.fechar()
+
+    asyncio.run(cenario())
+    assert _consultar(db, META, ("IFB", "ana-lima")) == [("h1",)]
+    assert _consultar(db, META, ("IFB", "bia-souza")) == []
+
+def test_falha_nao_trava_produtores_com_fila_cheia(db):
+    async def cenario():
+        g = gravador.GravadorSQLite(db, tamanho_lote=1, intervalo=60, max_fila=1).iniciar()
+        await g.salvar_estado_slugs([(1, "IFB", "ana-lima", "invalido")])
+        with pytest.raises(RuntimeError):
+            # Depois da falha, a thread continua drenando a fila: os envios terminam ou falham, sem travar
+            for i in range(200):
+                await g.salvar_meta_coleta([_meta(f"slug-{i}", "h")])
+            await g.fechar()
+
+    asyncio.run(asyncio.wait_for(cenario(), timeout=30))
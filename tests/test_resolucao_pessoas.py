@@ -0,0 +1,66 @@
+# tests/test_resolucao_pessoas.py
+
+from conftest import importar
+
+resolucao_pessoas = importar("transformacoes", "resolucao_pessoas")
+
+def _resolvedor(**opcoes):
+    return resolucao_pessoas.ResolvedorPessoas(arquivo_cache=None, **opcoes)
+
+def test_variantes_unidas_ao_primeiro_nome_durante_a_carga():
+    r = _resolvedor()
+    assert r.resolver(["José Souza", "Jose Souza", "Maria da Silva", "Maria Silva"]) == [
+        "José Souza", "José Souza", "Maria da Silva", "Maria da Silva"]
+    assert r.unidos == 2
+
+def test_elege_o_nome_mais_frequente():
+    r = _resolvedor()
+    r.resolver(["José Souza", "Jose Souza", "Jose Souza"])
+    assert r.eleger_canonicos() == {"José Souza": "Jose Souza"}
+    assert r.resolver(["José Souza"]) == ["Jose Souza"]
+    # A nova ocorrência não muda a maioria
+    assert r.eleger_canonicos() == {}
+
+def test_empate_vai_para_o_menor_em_ordem_alfabetica():
+    nomes = ["Maria da Silva", "Maria Silva"]
+    for ordem in (nomes, nomes[::-1]):
+        r = _resolvedor()
+        r.resolver(ordem)
+        r.eleger_canonicos()
+        assert r.resolver(ordem) == ["Maria Silva", "Maria Silva"]
+
+def test_eleicao_nao_depende_da_ordem_dos_registros():
+    nomes = ["Ana Lima", "Ána Lima", "Ána Lima", "Ana  Lima", "Bia Souza"]
+    eleitos = set()
+    for ordem in (nomes, nomes[::-1], sorted(nomes)):
+        r = _resolvedor()
+        r.resolver(ordem)
+        r.eleger_canonicos()
+        eleitos.add(tuple(r.resolver(nomes)))
+    assert eleitos == {("Ána Lima", "Ána Lima", "Ána Lima", "Ána Lima", "Bia Souza")}
+
+def test_sem_ocorrencias_novas_nao_ha_eleicao():
+    r = _resolvedor()
+    r.semear(["José Souza"])
+    assert r.eleger_canonicos() == {}
+
+def test_carga_incremental_elege_como_a_completa(tmp_path):
+    completa = _resolvedor()
+    completa.resolver(["José Souza", "José Souza", "Jose Souza", "Jose Souza", "Jose Souza"])
+    assert completa.eleger_canonicos() == {"José Souza": "Jose Souza"}
+
+    cache = str(tmp_path / "cache_resolucao_pessoas.csv")
+    primeira = resolucao_pessoas.ResolvedorPessoas(arquivo_cache=cache)
+    primeira.resolver(["José Souza", "José Souza", "Jose Souza"])
+    assert primeira.eleger_canonicos() == {}
+    primeira.salvar_cache()
+
+    # As ocorrências do cache somam às novas
+    segunda = resolucao_pessoas.ResolvedorPessoas(arquivo_cache=cache, acumular=True)
+    segunda.resolver(["Jose Souza", "Jose Souza"])
+    assert segunda.eleger_canonicos() == {"José Souza": "Jose Souza"}
+
+    # Sem acumular, a contagem recomeça com o cache só como agrupamento
+    recomeco = resolucao_pessoas.ResolvedorPessoas(arquivo_cache=cache, acumular=False)
+    assert recomeco.resolver(["José Souza"]) == ["José Souza"]
+    assert recomeco.eleger_canonicos() == {}
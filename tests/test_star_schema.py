@@ -0,0 +1,78 @@
+# tests/test_star_schema.py
+
+import random
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from conftest import importar
+
+database = importar("extracao", "database")
+star_schema = importar("transformacoes", "star_schema")
+
+SIGLAS = ["IFAC", "IFAL", "IFAM"]
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa"]
+SOBRENOMES = ["Silva", "Souza", "Lima", "Costa"]
+# Variantes de grafia que a resolução de pessoas une; a segunda parte
+# muda a mais frequente, trocando nomes já carregados na incremental
+VARIANTES = (["José Araújo", "José Araújo"], ["Jose Araujo", "Jose Araujo", "Jose Araujo"])
+
+def _tccs(inicio, total, variantes):
+    rnd = random.Random(inicio)
+    linhas = []
+    for k in range(inicio, inicio + total):
+        sigla = SIGLAS[k % len(SIGLAS)]
+        nome_inst, _, uf = star_schema.INSTITUICOES[sigla][:3]
+        # Um em cada sete é de outra instituição e é rejeitado pela validação
+        nome_bruto = "Universidade Federal de Algum Lugar" if k % 7 == 0 else nome_inst
+        orientador = f"Prof {sigla} {k % 5}"
+        alunos = [f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)}" for _ in range(rnd.choice([1, 2]))]
+        if k - inicio < len(variantes):
+            alunos.append(variantes[k - inicio])
+        linhas.append((f"{sigla.lower()}-p{k % 5}", orientador, sigla, nome_bruto, uf, f"Campus {k % 3}",
+                       str(2018 + k % 4), rnd.choice(["Engenharia Civil", "Licenciatura em Química"]),
+                       ", ".join(alunos) + f", {orientador} (Orientador/a)", f"Título {k}", f"Resumo {k}", "a; b"))
+    return linhas
+
+PARTES = [_tccs(1, 60, VARIANTES[0]), _tccs(61, 40, VARIANTES[1])]
+
+def _datamart(pasta):
+    """Conteúdo do Data Mart sem as chaves substitutas: tcc_plano e os nomes das dimensões."""
+    with closing(sqlite3.connect(pasta / star_schema.PROCESSED_DB_NAME)) as conn:
+        plano = [(*linha[:-2], sorted((linha[-2] or "").split(",")), linha[-1])
+                 for linha in conn.execute("SELECT * FROM tcc_plano ORDER BY tcc_id")]
+        dimensoes = {tabela: sorted(conn.execute(f"SELECT {coluna} FROM {tabela}"))
+                     for tabela, coluna in [("dim_pessoa", "nome_pessoa"), ("dim_campus", "nome_campus"),
+                                            ("dim_curso", "nome_curso"), ("dim_instituicao", "sigla")]}
+        pontes = {tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                  for tabela in ("fato_tcc", "ponte_tcc_aluno", "ponte_tcc_orientador")}
+    return plano, dimensoes, pontes
+
+def _carregar(pasta, monkeypatch, partes, processos):
+    """Grava as partes no banco bruto de `pasta`, uma carga do ETL depois de cada."""
+    pasta.mkdir()
+    monkeypatch.chdir(pasta)
+    banco = database.DatabaseManager(star_schema.RAW_DB_NAME)
+    banco.init_db()
+    for numero, parte in enumerate(partes):
+        for linhas in parte:
+            banco.save_tccs(linhas)
+        star_schema.main(incremental=numero > 0, tamanho_lote=25, processos=processos)
+    return _datamart(pasta)
+
+@pytest.mark.parametrize("processos", [0, 1])
+def test_incremental_igual_a_completa(tmp_path, monkeypatch, processos):
+    completa = _carregar(tmp_path / "completa", monkeypatch, [PARTES], processos)
+    incremental = _carregar(tmp_path / "incremental", monkeypatch, [[parte] for parte in PARTES], processos)
+
+    plano, dimensoes, pontes = completa
+    assert len(plano) == pontes["fato_tcc"] == 86
+    assert "Jose Araujo" in [nome for (nome,) in dimensoes["dim_pessoa"]]
+    assert not any("José" in nome for (nome,) in dimensoes["dim_pessoa"])
+    assert incremental == completa
+
+def test_execucao_paralela_igual_a_sequencial(tmp_path, monkeypatch):
+    sequencial = _carregar(tmp_path / "sequencial", monkeypatch, [PARTES], 0)
+    paralela = _carregar(tmp_path / "paralela", monkeypatch, [PARTES], 1)
+    assert paralela == sequencial